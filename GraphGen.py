@@ -1,12 +1,30 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.font_manager as fm
-import numpy as np
-from io import StringIO
+import matplotlib as mpl
+from matplotlib.figure import Figure
 import os
+import json
+import numpy as np
+from emtp_core import ColumnCache
+from emtp_core.figures import LINE_COLORS, WAVEFORM_RC, scale_transform
+from emtp_core.gui import (FilteredListbox, NameIndex, StyledFigureCanvas, VirtualRowEditor,
+                           create_styled_figure)
+from emtp_core.expressions import DerivedSignal
+from emtp_core.metrics import METRIC_COLUMNS, metrics_table
+from emtp_core.overlay import WaveformCase, WaveformOverlay, load_case
+from emtp_core.spectrum import SPECTRUM_WINDOWS, SpectrumCache, compute_spectra
+from emtp_core.precision import storage_dtype
+from emtp_core.waveform import (SCALE_FACTORS, MinMaxPyramid, SignalFollower, load_signal_file,
+                                minmax_envelope_indices, scaled_label, visible_index_range)
+
+# Intervalo (ms) entre lecturas de un archivo que la simulación sigue escribiendo
+FOLLOW_INTERVAL_MS = 500
+# Tipos de análisis espectral (texto de la interfaz -> función de emtp_core.spectrum)
+SPECTRUM_KINDS = {'FFT': 'fft', 'Welch (PSD)': 'welch', 'Espectrograma': 'spectrogram'}
+# Espectrogramas por ventana (uno por señal)
+MAX_SPECTROGRAM_PLOTS = 4
+# Estadísticas móviles (texto de la interfaz -> función de ventana de las expresiones)
+MOVING_STATISTICS = {'RMS': 'rms', 'Media': 'mean', 'Máximo': 'max', 'Mínimo': 'min'}
 
 class SignalPlotter:
     def __init__(self, root):
@@ -19,6 +37,7 @@ class SignalPlotter:
         self.original_headers = []
         self.custom_headers = {}
         self.selected_signals = []
+        self.name_index = NameIndex([])
         
         # Variables para rangos de ejes
         self.auto_range_x = True
@@ -28,22 +47,38 @@ class SignalPlotter:
         self.y_min = None
         self.y_max = None
         
-        # Configurar matplotlib para Times New Roman
-        plt.rcParams['font.family'] = 'serif'
-        plt.rcParams['font.serif'] = ['Times New Roman']
-        plt.rcParams['font.size'] = 10
+        # Líneas de la vista previa (decimadas) y su señal original
+        self.plotted_lines = []
+        self.signal_lines = {}
+        self.plot_configured = False
+        self.time_values = None
+        self.pyramids = {}
+        
+        # Modo seguimiento: lector incremental y temporizador pendiente
+        self.follower = None
+        self.follow_job = None
+        
+        # Archivos de comparación y origen (caso, header) de cada una de sus señales
+        self.overlay = WaveformOverlay()
+        self.signal_sources = {}
+        # El archivo principal visto como caso (se recrea cuando cambian sus datos)
+        self.primary_case = None
+        
+        # Caché binaria de archivos ya cargados
+        self.cache = ColumnCache()
+        # Espectros ya calculados por (señal, tipo, parámetros, rango)
+        self.spectrum_cache = SpectrumCache()
+        # Señales calculadas con expresiones sobre el archivo principal
+        self.derived_signals = {}
+        
+        # Estilo Times New Roman aplicado solo a la figura de este graficador
+        self.plot_rc = WAVEFORM_RC
         
         # Colores predefinidos para las señales
-        self.colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown', 
-                      'pink', 'gray', 'olive', 'cyan', 'magenta', 'black']
+        self.colors = list(LINE_COLORS)
         
         # Diccionarios para escalado
-        self.scale_factors = {
-            'ninguno': (1, ''),
-            'mili': (1e3, 'm'),
-            'kilo': (1e-3, 'k'),
-            'mega': (1e-6, 'M')
-        }
+        self.scale_factors = dict(SCALE_FACTORS)
         
         self.setup_gui()
     
@@ -59,6 +94,22 @@ class SignalPlotter:
         ttk.Button(file_frame, text="Seleccionar Archivo TXT", 
                   command=self.load_file).pack(side=tk.LEFT, padx=(0, 10))
         
+        # Otros casos de simulación superpuestos al archivo principal
+        ttk.Button(file_frame, text="Agregar Archivo (comparar)", 
+                  command=self.add_comparison_file).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(file_frame, text="Quitar Comparaciones", 
+                  command=self.clear_comparisons).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Seguir un archivo que la simulación todavía está escribiendo
+        self.follow_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(file_frame, text="Seguir archivo (simulación en curso)", 
+                       variable=self.follow_var).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Señales en float32 (mitad de memoria); el tiempo se mantiene en float64
+        self.compact_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(file_frame, text="Memoria compacta (float32)", 
+                       variable=self.compact_var).pack(side=tk.LEFT, padx=(0, 10))
+        
         self.file_label = ttk.Label(file_frame, text="Ningún archivo seleccionado")
         self.file_label.pack(side=tk.LEFT)
         
@@ -66,21 +117,9 @@ class SignalPlotter:
         header_frame = ttk.LabelFrame(main_frame, text="Configurar Nombres de Señales", padding=10)
         header_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # Scrollable frame para headers - ALTURA REDUCIDA
-        canvas = tk.Canvas(header_frame, height=100)
-        scrollbar = ttk.Scrollbar(header_frame, orient="vertical", command=canvas.yview)
-        self.scrollable_frame = ttk.Frame(canvas)
-        
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # Editor virtual: solo existen widgets para las filas visibles (archivos con miles de señales)
+        self.header_editor = VirtualRowEditor(header_frame, n_rows=4, on_change=self.on_header_renamed)
+        self.header_editor.pack(fill=tk.BOTH, expand=True)
         
         # Frame inferior - Selección de señales y ploteo
         plot_frame = ttk.LabelFrame(main_frame, text="Selección de Señales y Ploteo", padding=10)
@@ -117,9 +156,18 @@ class SignalPlotter:
         ttk.Label(signals_section, text="(Todas las seleccionadas aparecerán superpuestas)", 
                  font=('TkDefaultFont', 8), foreground='gray').pack(anchor=tk.W)
         
+        # Búsqueda: filtra la lista y el editor de nombres (la selección oculta se conserva)
+        search_frame = ttk.Frame(signals_section)
+        search_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(search_frame, text="Buscar:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT, padx=(5, 0))
+        self.search_var.trace_add('write', lambda *args: self.apply_signal_filter())
+        
         # Listbox con altura optimizada
         self.signals_listbox = tk.Listbox(signals_section, selectmode=tk.MULTIPLE, width=50, height=8)
         self.signals_listbox.pack(fill=tk.X, pady=(5, 5))
+        self.signal_list = FilteredListbox(self.signals_listbox)
         
         # Botones de selección
         button_frame = ttk.Frame(signals_section)
@@ -218,6 +266,92 @@ class SignalPlotter:
         ttk.Checkbutton(config_section, text="Mostrar grid", 
                        variable=self.grid_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=2)
         
+        # Señales de comparación menos la señal homónima del archivo principal (grilla común)
+        self.difference_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(config_section, text="Comparaciones como diferencia con el principal", 
+                       variable=self.difference_var).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=2)
+        
+        # Señales derivadas: expresiones sobre las columnas del archivo principal
+        derived_section = ttk.LabelFrame(left_scrollable_frame, text="Señales Derivadas", padding=5)
+        derived_section.pack(fill=tk.X, pady=(0, 8), padx=5)
+        
+        ttk.Label(derived_section, text="Nombre:").grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.derived_name_var = tk.StringVar()
+        ttk.Entry(derived_section, textvariable=self.derived_name_var, width=30).grid(row=0, column=1, padx=(5, 0), pady=2)
+        
+        ttk.Label(derived_section, text="Expresión:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.expression_var = tk.StringVar()
+        ttk.Entry(derived_section, textvariable=self.expression_var, width=30).grid(row=1, column=1, padx=(5, 0), pady=2)
+        
+        ttk.Label(derived_section, text="Ej.: {V:BUSA} - {V:BUSB}, rms(IA, 1/60), abs(VA + VB + VC)", 
+                 font=('TkDefaultFont', 8), foreground='gray').grid(row=2, column=0, columnspan=2, sticky=tk.W)
+        
+        derived_buttons = ttk.Frame(derived_section)
+        derived_buttons.grid(row=3, column=0, columnspan=2, pady=(5, 0), sticky=tk.EW)
+        ttk.Button(derived_buttons, text="Agregar Señal Derivada", 
+                  command=self.add_derived_signal).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 2))
+        ttk.Button(derived_buttons, text="Quitar Derivadas", 
+                  command=self.clear_derived_signals).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(2, 0))
+        
+        # Estadística móvil de las señales seleccionadas (p. ej. RMS de un ciclo), como señal derivada
+        ttk.Label(derived_section, text="Estadística móvil:").grid(row=4, column=0, sticky=tk.W, pady=(8, 2))
+        self.moving_kind_var = tk.StringVar(value="RMS")
+        ttk.Combobox(derived_section, textvariable=self.moving_kind_var, values=list(MOVING_STATISTICS), 
+                    state="readonly", width=12).grid(row=4, column=1, padx=(5, 0), pady=(8, 2), sticky=tk.W)
+        
+        ttk.Label(derived_section, text="Ventana (s):").grid(row=5, column=0, sticky=tk.W, pady=2)
+        self.moving_window_var = tk.StringVar(value="1/60")
+        ttk.Entry(derived_section, textvariable=self.moving_window_var, width=12).grid(row=5, column=1, padx=(5, 0), pady=2, sticky=tk.W)
+        
+        ttk.Button(derived_section, text="Graficar Estadística (señales seleccionadas)", 
+                  command=self.add_moving_statistics).grid(row=6, column=0, columnspan=2, pady=(5, 0), sticky=tk.EW)
+        
+        # Sección de métricas (pico, cruce de umbral, subida y asentamiento de todas las señales)
+        metrics_section = ttk.LabelFrame(left_scrollable_frame, text="Métricas de Señales", padding=5)
+        metrics_section.pack(fill=tk.X, pady=(0, 8), padx=5)
+        
+        ttk.Label(metrics_section, text="(Valores en unidades del archivo; vacío = no calcular)", 
+                 font=('TkDefaultFont', 8), foreground='gray').grid(row=0, column=0, columnspan=2, sticky=tk.W)
+        
+        self.threshold_var = tk.StringVar()
+        self.band_var = tk.StringVar()
+        self.band_center_var = tk.StringVar(value="0")
+        self.base_var = tk.StringVar()
+        for row, (text, var) in enumerate([("Umbral |V|:", self.threshold_var),
+                                           ("Banda ±:", self.band_var),
+                                           ("Centro de banda:", self.band_center_var),
+                                           ("Valor base (pu):", self.base_var)], 1):
+            ttk.Label(metrics_section, text=text).grid(row=row, column=0, sticky=tk.W, pady=2)
+            ttk.Entry(metrics_section, textvariable=var, width=12).grid(row=row, column=1, padx=(5, 0), pady=2, sticky=tk.W)
+        
+        ttk.Button(metrics_section, text="Calcular Métricas (todas las señales)", 
+                  command=self.compute_metrics).grid(row=5, column=0, columnspan=2, pady=(8, 0), sticky=tk.EW)
+        
+        # Sección de análisis espectral de las señales seleccionadas
+        spectrum_section = ttk.LabelFrame(left_scrollable_frame, text="Análisis Espectral", padding=5)
+        spectrum_section.pack(fill=tk.X, pady=(0, 8), padx=5)
+        
+        ttk.Label(spectrum_section, text="Tipo:").grid(row=0, column=0, sticky=tk.W, pady=2)
+        self.spectrum_kind_var = tk.StringVar(value="FFT")
+        ttk.Combobox(spectrum_section, textvariable=self.spectrum_kind_var, values=list(SPECTRUM_KINDS), 
+                    state="readonly", width=14).grid(row=0, column=1, padx=(5, 0), pady=2, sticky=tk.W)
+        
+        ttk.Label(spectrum_section, text="Ventana:").grid(row=1, column=0, sticky=tk.W, pady=2)
+        self.spectrum_window_var = tk.StringVar(value="hann")
+        ttk.Combobox(spectrum_section, textvariable=self.spectrum_window_var, values=list(SPECTRUM_WINDOWS), 
+                    state="readonly", width=14).grid(row=1, column=1, padx=(5, 0), pady=2, sticky=tk.W)
+        
+        ttk.Label(spectrum_section, text="Segmento (muestras):").grid(row=2, column=0, sticky=tk.W, pady=2)
+        self.segment_var = tk.StringVar(value="4096")
+        ttk.Entry(spectrum_section, textvariable=self.segment_var, width=12).grid(row=2, column=1, padx=(5, 0), pady=2, sticky=tk.W)
+        
+        ttk.Label(spectrum_section, text="Solapamiento (%):").grid(row=3, column=0, sticky=tk.W, pady=2)
+        self.overlap_var = tk.StringVar(value="50")
+        ttk.Entry(spectrum_section, textvariable=self.overlap_var, width=12).grid(row=3, column=1, padx=(5, 0), pady=2, sticky=tk.W)
+        
+        ttk.Button(spectrum_section, text="Calcular Espectro (señales seleccionadas)", 
+                  command=self.compute_spectrum).grid(row=4, column=0, columnspan=2, pady=(8, 0), sticky=tk.EW)
+        
         # Botones principales
         buttons_section = ttk.Frame(left_scrollable_frame)
         buttons_section.pack(fill=tk.X, pady=(0, 10), padx=5)
@@ -226,6 +360,8 @@ class SignalPlotter:
                   command=self.generate_plot).pack(fill=tk.X, pady=(0, 5))
         ttk.Button(buttons_section, text="Guardar Gráfico", 
                   command=self.save_plot).pack(fill=tk.X)
+        ttk.Button(buttons_section, text="Guardar Configuración (lotes)", 
+                  command=self.save_plot_spec).pack(fill=tk.X, pady=(5, 0))
 
         # Bind para scroll con mouse wheel - IMPORTANTE
         def _on_mousewheel(event):
@@ -246,8 +382,8 @@ class SignalPlotter:
         ttk.Label(right_frame, text="Vista Previa:", font=('TkDefaultFont', 9, 'bold')).pack(anchor=tk.W)
         
         # Canvas para matplotlib - TAMAÑO REDUCIDO
-        self.fig, self.ax = plt.subplots(figsize=(4.5, 3.5))
-        self.canvas = FigureCanvasTkAgg(self.fig, right_frame)
+        self.fig, self.ax = create_styled_figure((4.5, 3.5), self.plot_rc)
+        self.canvas = StyledFigureCanvas(self.fig, right_frame, self.plot_rc)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Información de estado
@@ -318,9 +454,11 @@ class SignalPlotter:
                 messagebox.showerror("Error", "Los valores del rango Y deben ser números válidos")
                 return
         
-        # Regenerar gráfico con los nuevos rangos
-        if self.df is not None and self.signals_listbox.curselection():
-            self.generate_plot()
+        # Actualizar solo la ventana visible y los límites
+        if self.plotted_lines:
+            self.update_plot_data()
+            self.update_plot_limits()
+            self.redraw_plot()
     
     def reset_to_auto(self):
         """Resetea ambos ejes a rango automático"""
@@ -332,14 +470,20 @@ class SignalPlotter:
         self.x_max_var.set("")
         self.y_min_var.set("")
         self.y_max_var.set("")
-        # Regenerar gráfico
-        if self.df is not None and self.signals_listbox.curselection():
-            self.generate_plot()
+        # Volver a la vista completa sin reconstruir la figura
+        if self.plotted_lines:
+            self.update_plot_data()
+            self.update_plot_limits()
+            self.redraw_plot()
     
     def on_scale_change(self, event=None):
-        """Callback para regenerar gráfico cuando cambia la escala"""
-        if self.df is not None and self.signals_listbox.curselection():
-            self.generate_plot()
+        """Callback para reescalar las líneas existentes cuando cambia la escala"""
+        if self.plotted_lines:
+            self.update_plot_data()
+            self.update_plot_labels()
+            self.update_plot_limits()
+            self.redraw_plot(relayout=True)
+            self.update_selection_info()
     
     def get_scaled_data_and_label(self, data, scale_type, original_label):
         """Aplica escalado a los datos y devuelve etiqueta actualizada"""
@@ -354,44 +498,33 @@ class SignalPlotter:
         else:
             scaled_data = data
         
-        if prefix:
-            # Actualizar etiqueta con prefijo
-            if '(' in original_label and ')' in original_label:
-                # Extraer unidad entre paréntesis
-                start = original_label.find('(')
-                end = original_label.find(')')
-                base_label = original_label[:start+1]
-                unit = original_label[start+1:end]
-                rest = original_label[end:]
-                new_label = f"{base_label}{prefix}{unit}{rest}"
-            else:
-                new_label = f"{original_label} ({prefix})"
-        else:
-            new_label = original_label
+        new_label = scaled_label(scale_type, original_label)
         
         return scaled_data, new_label
     
     def get_scaled_label_only(self, scale_type, original_label):
         """Función auxiliar para obtener solo la etiqueta escalada sin procesar datos"""
-        if scale_type not in self.scale_factors:
-            return original_label
-        
-        _, prefix = self.scale_factors[scale_type]
-        
-        if prefix:
-            if '(' in original_label and ')' in original_label:
-                start = original_label.find('(')
-                end = original_label.find(')')
-                base_label = original_label[:start+1]
-                unit = original_label[start+1:end]
-                rest = original_label[end:]
-                new_label = f"{base_label}{prefix}{unit}{rest}"
-            else:
-                new_label = f"{original_label} ({prefix})"
-        else:
-            new_label = original_label
-        
-        return new_label
+        return scaled_label(scale_type, original_label)
+    
+    def get_plot_width_pixels(self):
+        """Ancho de la figura en píxeles (resolución de la envolvente decimada)"""
+        return max(int(self.fig.get_figwidth() * self.fig.dpi), 1)
+    
+    def get_visible_time_window(self):
+        """Límites X actuales en segundos (None si el eje es automático)"""
+        if self.auto_range_x:
+            return None, None
+        
+        # Los límites se ingresan en las unidades escaladas del eje X
+        factor, _ = self.scale_factors.get(self.x_scale_var.get(), (1, ''))
+        return (self.x_min / factor if self.x_min is not None else None,
+                self.x_max / factor if self.x_max is not None else None)
+    
+    def get_visible_index_range(self, time_values=None):
+        """Rango de muestras [inicio, fin) dentro de los límites X actuales"""
+        if time_values is None:
+            time_values = self.time_values
+        return visible_index_range(time_values, *self.get_visible_time_window())
     
     def load_file(self):
         file_path = filedialog.askopenfilename(
@@ -400,45 +533,34 @@ class SignalPlotter:
         )
         
         if file_path:
+            self.stop_following()
+            if self.follow_var.get():
+                self.start_following(file_path)
+                return
+            
             try:
-                # Leer el archivo
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
+                # Leer el archivo por bloques (sin cargarlo completo en memoria)
+                file_name = os.path.basename(file_path)
                 
-                # Procesar el formato del archivo
-                lines = content.strip().split('\n')
+                def report_progress(rows, total_rows):
+                    percent = 100 * rows / total_rows if total_rows else 100
+                    self.file_label.config(text=f"Cargando {file_name}: {percent:.0f}% ({rows:,} filas)")
+                    self.root.update_idletasks()
                 
-                # Extraer headers (primera línea)
-                header1 = lines[0].split('\t')
+                self.df = load_signal_file(file_path, progress_callback=report_progress, cache=self.cache,
+                                           dtype=storage_dtype(self.compact_var.get()))
                 
-                # Si hay segunda línea de headers, combinarla
-                if len(lines) > 1 and any(word in lines[1].lower() for word in ['time', 'voltage', 's)', 'v)']):
-                    header2 = lines[1].split('\t')
-                    headers = []
-                    for h1, h2 in zip(header1, header2):
-                        combined = f'{h1.strip()} {h2.strip()}' if h2.strip() else h1.strip()
-                        headers.append(combined.strip())
-                    data_start = 2
-                else:
-                    headers = [h.strip() for h in header1]
-                    data_start = 1
-                
-                # Extraer datos
-                data_lines = lines[data_start:]
-                data_content = '\n'.join(data_lines)
-                
-                # Crear DataFrame
-                self.df = pd.read_csv(StringIO(data_content), sep='\t', names=headers)
-                
-                # Convertir notación científica de forma moderna
-                for col in self.df.columns:
-                    try:
-                        self.df[col] = pd.to_numeric(self.df[col])
-                    except (ValueError, TypeError):
-                        pass
+                # Índices min/max multirresolución, construidos una sola vez por archivo
+                self.file_label.config(text=f"Indexando {file_name}...")
+                self.root.update_idletasks()
+                self.time_values = self.df[self.df.columns[0]].to_numpy()
+                self.pyramids = {col: MinMaxPyramid(self.df[col].to_numpy()) for col in self.df.columns}
+                self.primary_case = None
+                self.spectrum_cache.clear()
+                self.invalidate_derived_signals()
                 
-                self.original_headers = list(self.df.columns)
-                self.custom_headers = {header: header for header in self.original_headers}
+                self.reset_signal_names()
+                self.reset_plot_model()
                 
                 # Actualizar interfaz
                 self.file_label.config(text=f"Archivo cargado: {os.path.basename(file_path)}")
@@ -450,47 +572,339 @@ class SignalPlotter:
             except Exception as e:
                 messagebox.showerror("Error", f"Error al cargar el archivo:\n{str(e)}")
     
+    def start_following(self, file_path):
+        """Cargar lo que ya está escrito y leer periódicamente las filas nuevas"""
+        try:
+            self.follower = SignalFollower(file_path, storage_dtype(self.compact_var.get()))
+            self.follower.poll()
+        except Exception as e:
+            self.follower = None
+            messagebox.showerror("Error", f"Error al cargar el archivo:\n{str(e)}")
+            return
+        
+        self.update_followed_data(rebuild=True)
+        self.reset_signal_names()
+        self.reset_plot_model()
+        self.setup_header_editors()
+        self.update_signals_list()
+        self.follow_job = self.root.after(FOLLOW_INTERVAL_MS, self.poll_followed_file)
+    
+    def stop_following(self):
+        if self.follow_job is not None:
+            self.root.after_cancel(self.follow_job)
+            self.follow_job = None
+        self.follower = None
+    
+    def update_followed_data(self, rebuild=False):
+        """Publicar las filas leídas y extender los índices min/max solo con las muestras nuevas"""
+        self.df = self.follower.frame()
+        self.time_values = self.df[self.df.columns[0]].to_numpy()
+        self.primary_case = None
+        self.spectrum_cache.clear()
+        self.invalidate_derived_signals()
+        for col in self.df.columns:
+            if rebuild or col not in self.pyramids:
+                self.pyramids[col] = MinMaxPyramid(self.df[col].to_numpy())
+            else:
+                self.pyramids[col].extend(self.df[col].to_numpy())
+        
+        file_name = os.path.basename(self.follower.file_path)
+        self.file_label.config(text=f"Siguiendo {file_name}: {len(self.df):,} filas")
+    
+    def poll_followed_file(self):
+        """Incorporar las filas nuevas y actualizar las líneas existentes (cada FOLLOW_INTERVAL_MS)"""
+        self.follow_job = None
+        if self.follower is None:
+            return
+        if not self.follow_var.get():
+            file_name = os.path.basename(self.follower.file_path)
+            self.file_label.config(text=f"Archivo cargado: {file_name} (seguimiento detenido, {len(self.df):,} filas)")
+            self.follower = None
+            return
+        
+        try:
+            new_rows, restarted = self.follower.poll()
+        except Exception as e:
+            self.follower = None
+            messagebox.showerror("Error", f"Error al leer el archivo seguido:\n{str(e)}")
+            return
+        
+        if new_rows or restarted:
+            self.update_followed_data(rebuild=restarted)
+            # Solo cambian los datos: sin recrear líneas, leyenda ni tight_layout
+            if self.plotted_lines:
+                self.update_plot_data()
+                self.update_plot_limits()
+                self.redraw_plot()
+        
+        # El siguiente ciclo se programa al terminar este (no se acumulan lecturas)
+        self.follow_job = self.root.after(FOLLOW_INTERVAL_MS, self.poll_followed_file)
+    
+    def reset_signal_names(self):
+        """Señales del archivo principal seguidas de las de comparación y las derivadas (conservando sus nombres)"""
+        # Las derivadas que usan columnas que el archivo actual no tiene se descartan
+        self.derived_signals = {key: derived for key, derived in self.derived_signals.items()
+                                if all(ref in self.df.columns for ref in derived.references)}
+        kept_names = {key: self.custom_headers.get(key, key) for key in [*self.signal_sources, *self.derived_signals]}
+        self.original_headers = list(self.df.columns) + list(self.signal_sources) + list(self.derived_signals)
+        self.custom_headers = {header: header for header in self.df.columns}
+        self.custom_headers.update(kept_names)
+    
+    def add_comparison_file(self):
+        """Abrir otro caso de simulación y agregar sus señales a la lista para superponerlas"""
+        if self.df is None:
+            messagebox.showwarning("Advertencia", "Primero carga un archivo")
+            return
+        
+        file_path = filedialog.askopenfilename(
+            title="Seleccionar archivo TXT para comparar",
+            filetypes=[("Archivos de texto", "*.txt"), ("Todos los archivos", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        file_name = os.path.basename(file_path)
+        previous_label = self.file_label.cget("text")
+        
+        def report_progress(rows, total_rows):
+            percent = 100 * rows / total_rows if total_rows else 100
+            self.file_label.config(text=f"Cargando {file_name}: {percent:.0f}% ({rows:,} filas)")
+            self.root.update_idletasks()
+        
+        try:
+            case = load_case(file_path, report_progress, self.cache, storage_dtype(self.compact_var.get()))
+        except Exception as e:
+            self.file_label.config(text=previous_label)
+            messagebox.showerror("Error", f"Error al cargar el archivo:\n{str(e)}")
+            return
+        
+        # El tiempo no se ofrece como señal: todas comparten el eje X
+        case_key = self.overlay.add(case)
+        for header in case.headers[1:]:
+            self.signal_sources[f"{header} [{case_key}]"] = (case_key, header)
+        
+        self.reset_signal_names()
+        self.setup_header_editors()
+        self.update_signals_list()
+        self.file_label.config(text=f"{previous_label.split(' + ')[0]} + {len(self.overlay.cases)} comparación(es)")
+        self.info_label.config(text=f"Comparación {case_key}: {len(case):,} filas "
+                                    f"({self.overlay.nbytes / 1e6:.1f} MB en {len(self.overlay.cases)} archivo(s))")
+    
+    def clear_comparisons(self):
+        """Cerrar todos los archivos de comparación y quitar sus líneas"""
+        if not self.signal_sources:
+            return
+        
+        for key in self.signal_sources:
+            line = self.signal_lines.pop(key, None)
+            if line is not None:
+                line.remove()
+        self.plotted_lines = [(line, key) for line, key in self.plotted_lines if key not in self.signal_sources]
+        self.signal_sources = {}
+        self.overlay.clear()
+        self.spectrum_cache.clear()
+        
+        self.reset_signal_names()
+        self.setup_header_editors()
+        self.update_signals_list()
+        self.file_label.config(text=self.file_label.cget("text").split(" + ")[0])
+        if self.plotted_lines:
+            self.update_plot_legend()
+            self.update_plot_limits()
+            self.redraw_plot()
+    
+    def signal_data(self, key):
+        """(tiempo, valores, índice min/max) de una señal del archivo principal o de comparación"""
+        if key in self.signal_sources:
+            case_key, header = self.signal_sources[key]
+            case = self.overlay.cases[case_key]
+            return case.time, case.columns[header], case.pyramid(header)
+        return self.time_values, self.df[key].to_numpy(), self.pyramids[key]
+    
+    def expression_names(self):
+        """Nombres que puede usar una expresión: headers del archivo principal o sus nombres editados"""
+        names = {self.custom_headers[header]: header for header in self.df.columns}
+        names.update({header: header for header in self.df.columns})
+        return names
+    
+    def derived_values(self, key, start=0, stop=None):
+        """Valores de una señal derivada en las muestras [start, stop) del archivo principal"""
+        derived = self.derived_signals[key]
+        columns = {ref: self.df[ref].to_numpy() for ref in derived.references}
+        return derived.evaluate(columns, self.time_values, start, stop)
+    
+    def invalidate_derived_signals(self):
+        """Olvidar los valores calculados (los datos del archivo principal cambiaron)"""
+        for derived in self.derived_signals.values():
+            derived.clear()
+    
+    def add_derived_signal(self):
+        """Agregar a la lista una señal calculada con la expresión escrita"""
+        if self.df is None:
+            messagebox.showwarning("Advertencia", "Primero carga un archivo")
+            return
+        
+        self.header_editor.flush()
+        text = self.expression_var.get().strip()
+        if not text:
+            messagebox.showwarning("Advertencia", "Escribe una expresión")
+            return
+        name = self.derived_name_var.get().strip() or text
+        
+        try:
+            self.register_derived_signal(name, text)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo agregar la señal:\n{str(e)}")
+            return
+        
+        self.spectrum_cache.clear()
+        self.reset_signal_names()
+        self.setup_header_editors()
+        self.update_signals_list()
+        self.derived_name_var.set("")
+        self.expression_var.set("")
+        self.info_label.config(text=f"Señal derivada {name} = {text}")
+    
+    def register_derived_signal(self, name, text):
+        """Validar una expresión y guardarla como señal derivada (sin actualizar la lista)"""
+        if name in self.custom_headers or name in self.custom_headers.values():
+            raise ValueError(f"Ya existe una señal llamada {name}")
+        derived = DerivedSignal(text, self.expression_names())
+        # Evaluar unas pocas muestras detecta errores de tipos antes de graficar
+        derived.evaluate({ref: self.df[ref].to_numpy() for ref in derived.references}, self.time_values, 0, 2)
+        derived.clear()
+        self.derived_signals[name] = derived
+    
+    def add_moving_statistics(self):
+        """Graficar la estadística móvil de cada señal seleccionada como una nueva señal derivada
+        
+        La ventana se da en segundos y se convierte a muestras con el paso
+        medio de la columna de tiempo; RMS y media usan sumas acumuladas y
+        máximo y mínimo el método de van Herk / Gil-Werman (todas O(n)).
+        """
+        if self.df is None:
+            messagebox.showwarning("Advertencia", "Primero carga un archivo")
+            return
+        
+        self.header_editor.flush()
+        selected = self.signal_list.selected_positions()
+        keys = [self.original_headers[idx] for idx in selected if self.original_headers[idx] in self.df.columns[1:]]
+        if not keys:
+            messagebox.showwarning("Advertencia", "Selecciona al menos una señal del archivo principal")
+            return
+        
+        label = self.moving_kind_var.get()
+        window = self.moving_window_var.get().strip()
+        names = []
+        added = []
+        try:
+            for key in keys:
+                name = f"{label} {self.custom_headers[key]} ({window} s)"
+                # Una estadística ya agregada solo se vuelve a seleccionar
+                if name not in self.derived_signals:
+                    self.register_derived_signal(name, f"{MOVING_STATISTICS[label]}({{{key}}}, {window})")
+                    added.append(name)
+                names.append(name)
+        except Exception as e:
+            for name in added:
+                del self.derived_signals[name]
+            messagebox.showerror("Error", f"No se pudo calcular la estadística:\n{str(e)}")
+            return
+        
+        self.spectrum_cache.clear()
+        self.reset_signal_names()
+        self.setup_header_editors()
+        self.update_signals_list()
+        # La lista se reconstruyó: seleccionar otra vez las señales junto con sus estadísticas
+        self.signal_list.select(selected + [self.original_headers.index(name) for name in names])
+        self.generate_plot()
+    
+    def clear_derived_signals(self):
+        """Quitar todas las señales derivadas y sus líneas"""
+        if not self.derived_signals:
+            return
+        
+        for key in self.derived_signals:
+            line = self.signal_lines.pop(key, None)
+            if line is not None:
+                line.remove()
+        self.plotted_lines = [(line, key) for line, key in self.plotted_lines if key not in self.derived_signals]
+        self.derived_signals = {}
+        self.spectrum_cache.clear()
+        
+        self.reset_signal_names()
+        self.setup_header_editors()
+        self.update_signals_list()
+        if self.plotted_lines:
+            self.update_plot_legend()
+            self.update_plot_limits()
+            self.redraw_plot()
+    
+    def difference_reference(self, key):
+        """Header del archivo principal contra el que se resta una señal de comparación (o None)"""
+        if not self.difference_var.get() or key not in self.signal_sources:
+            return None
+        header = self.signal_sources[key][1]
+        return header if header in self.df.columns and header != self.df.columns[0] else None
+    
+    def difference_data(self, keys):
+        """Grilla común de la ventana visible y la diferencia con el principal de cada señal
+        
+        Todas las señales se alinean juntas para reutilizar la grilla y las
+        posiciones de interpolación de cada archivo.
+        """
+        if self.primary_case is None:
+            self.primary_case = WaveformCase('principal', self.df, self.pyramids)
+        primary = self.primary_case
+        signals = [(primary, self.signal_sources[key][1]) for key in keys]
+        signals += [(self.overlay.cases[self.signal_sources[key][0]], self.signal_sources[key][1]) for key in keys]
+        grid, aligned = self.overlay.aligned(signals, *self.get_visible_time_window())
+        n = len(keys)
+        return grid, {key: aligned[:, n + j] - aligned[:, j] for j, key in enumerate(keys)}
+    
     def setup_header_editors(self):
-        # Limpiar frame anterior
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        # Crear editores para cada header
-        for i, header in enumerate(self.original_headers):
-            row_frame = ttk.Frame(self.scrollable_frame)
-            row_frame.pack(fill=tk.X, pady=1)
-            
-            ttk.Label(row_frame, text=f"Original: {header[:35]}...", width=40).pack(side=tk.LEFT)
-            
-            entry_var = tk.StringVar(value=self.custom_headers[header])
-            entry = ttk.Entry(row_frame, textvariable=entry_var, width=20)
-            entry.pack(side=tk.LEFT, padx=(10, 0))
-            
-            # Callback para actualizar el diccionario
-            def update_header(var=entry_var, orig=header):
-                self.custom_headers[orig] = var.get()
-                self.update_signals_list()
-            
-            entry_var.trace('w', lambda *args, var=entry_var, orig=header: update_header(var, orig))
+        self.header_editor.set_items(self.original_headers, self.custom_headers)
+    
+    def on_header_renamed(self, position):
+        """Aplicar un nombre editado (una vez que se dejó de escribir) solo a su fila y su línea"""
+        header = self.original_headers[position]
+        self.name_index.update(position, f"{header}\n{self.custom_headers[header]}")
+        self.signal_list.rename(position, self.custom_headers[header])
+        self.update_line_label(header)
+    
+    def update_line_label(self, original_header):
+        """Renombrar la línea de una señal ya graficada y actualizar la leyenda"""
+        line = self.signal_lines.get(original_header)
+        if line is None:
+            return
+        line.set_label(self.line_label(original_header))
+        if line.get_visible():
+            self.update_plot_legend()
+            self.redraw_plot()
     
     def update_signals_list(self):
         if self.df is not None:
-            self.signals_listbox.delete(0, tk.END)
-            
-            for header in self.original_headers:
-                custom_name = self.custom_headers[header]
-                self.signals_listbox.insert(tk.END, custom_name)
+            self.signal_list.set_items([self.custom_headers[header] for header in self.original_headers])
+            self.name_index = NameIndex([f"{header}\n{self.custom_headers[header]}" for header in self.original_headers])
+            self.apply_signal_filter()
+    
+    def apply_signal_filter(self):
+        """Mostrar en la lista y en el editor solo las señales que coinciden con la búsqueda"""
+        positions = self.name_index.search(self.search_var.get())
+        self.signal_list.show(positions)
+        self.header_editor.show(positions)
+        self.update_selection_info()
     
     def select_all(self):
-        self.signals_listbox.select_set(0, tk.END)
+        self.signal_list.select_all()
         self.update_selection_info()
     
     def deselect_all(self):
-        self.signals_listbox.selection_clear(0, tk.END)
+        self.signal_list.deselect_all()
         self.update_selection_info()
     
     def update_selection_info(self, event=None):
-        selected_indices = self.signals_listbox.curselection()
+        selected_indices = self.signal_list.selection()
         if selected_indices:
             count = len(selected_indices)
             range_info = ""
@@ -518,98 +932,165 @@ class SignalPlotter:
             messagebox.showwarning("Advertencia", "Primero carga un archivo")
             return
         
-        selected_indices = self.signals_listbox.curselection()
+        # Nombres editados cuya espera todavía no terminó
+        self.header_editor.flush()
+        selected_indices = self.signal_list.selected_positions()
         if not selected_indices:
             messagebox.showwarning("Advertencia", "Selecciona al menos una señal")
             return
         
-        # Limpiar figura anterior
-        self.fig.clear()
+        # Configurar tamaño para Word (7.54 cm x 7.09 cm) una sola vez
+        if not self.plot_configured:
+            width_inches = 7.54 * 0.393701
+            height_inches = 7.09 * 0.393701
+            self.fig.set_size_inches(width_inches, height_inches)
+            self.ax.tick_params(labelsize=8)
+            self.plot_configured = True
+        
+        # Reutilizar las líneas existentes y actualizar solo su contenido
+        self.sync_plot_lines(selected_indices)
+        self.update_plot_data()
+        self.update_plot_labels()
+        self.update_plot_limits()
+        self.redraw_plot(relayout=True)
         
-        # Configurar tamaño para Word (7.54 cm x 7.09 cm)
-        width_inches = 7.54 * 0.393701
-        height_inches = 7.09 * 0.393701
-        
-        self.fig.set_size_inches(width_inches, height_inches)
-        
-        # Crear un solo subplot
-        ax = self.fig.add_subplot(1, 1, 1)
-        
-        # Obtener columna de tiempo (primera columna)
-        time_col = self.df.columns[0]
-        time_data = self.df[time_col]
-        
-        # Aplicar escalado al eje X (tiempo)
-        scaled_time_data, time_label = self.get_scaled_data_and_label(
-            time_data, self.x_scale_var.get(), "Tiempo (s)"
-        )
-        
-        # Plotear todas las señales seleccionadas en el mismo gráfico
-        legend_labels = []
-        
-        for i, idx in enumerate(selected_indices):
-            original_header = self.original_headers[idx]
-            custom_header = self.custom_headers[original_header]
-            signal_data = self.df[original_header]
-            
-            # Aplicar escalado al eje Y (señal)
-            scaled_signal_data, _ = self.get_scaled_data_and_label(
-                signal_data, self.y_scale_var.get(), custom_header
-            )
+        # Actualizar información
+        self.update_selection_info()
+    
+    def reset_plot_model(self):
+        """Eliminar las líneas del archivo anterior manteniendo la figura y los ejes"""
+        for line in self.signal_lines.values():
+            line.remove()
+        self.signal_lines = {}
+        self.plotted_lines = []
+        legend = self.ax.get_legend()
+        if legend:
+            legend.remove()
+    
+    def sync_plot_lines(self, selected_indices):
+        """Mostrar una Line2D por señal seleccionada, creando solo las que falten"""
+        selected_headers = [self.original_headers[idx] for idx in selected_indices]
+        selected_set = set(selected_headers)
+        
+        for header, line in self.signal_lines.items():
+            if header not in selected_set:
+                line.set_visible(False)
+        
+        self.plotted_lines = []
+        for i, header in enumerate(selected_headers):
+            line = self.signal_lines.get(header)
+            if line is None:
+                line, = self.ax.plot([], [], linewidth=1.5, alpha=0.8)
+                self.signal_lines[header] = line
             
             # Usar diferentes colores para cada señal
-            color = self.colors[i % len(self.colors)]
-            
-            # Plotear la señal
-            ax.plot(scaled_time_data, scaled_signal_data, linewidth=1.5, color=color, 
-                   label=custom_header, alpha=0.8)
+            line.set_color(self.colors[i % len(self.colors)])
+            line.set_label(self.line_label(header))
+            line.set_visible(True)
+            self.plotted_lines.append((line, header))
+    
+    def line_label(self, original_header):
+        label = self.custom_headers[original_header]
+        if self.difference_reference(original_header) is not None:
+            return f"{label} - {self.custom_headers[self.difference_reference(original_header)]}"
+        return label
+    
+    def update_plot_data(self):
+        """Actualizar los datos decimados y escalados de las líneas visibles"""
+        # Resolución que cabe en el canvas
+        n_bins = self.get_plot_width_pixels()
+        
+        # Diferencias: alineadas en la grilla común solo para la ventana visible
+        difference_keys = [h for _, h in self.plotted_lines if self.difference_reference(h) is not None]
+        if difference_keys:
+            grid, differences = self.difference_data(difference_keys)
+        
+        for line, original_header in self.plotted_lines:
+            if original_header in difference_keys:
+                values = differences[original_header]
+                sample_idx = minmax_envelope_indices(values, n_bins)
+                time_data, signal_data = grid[sample_idx], values[sample_idx]
+            elif original_header in self.derived_signals:
+                # Derivadas: solo se evalúan las muestras de la ventana visible
+                start, stop = self.get_visible_index_range()
+                values = self.derived_values(original_header, start, stop)
+                sample_idx = minmax_envelope_indices(values, n_bins)
+                time_data, signal_data = self.time_values[start + sample_idx], values[sample_idx]
+            else:
+                # Envolvente de la ventana visible (cada archivo en su propia base de tiempo)
+                time_values, values, pyramid = self.signal_data(original_header)
+                start, stop = self.get_visible_index_range(time_values)
+                sample_idx = pyramid.query(start, stop, n_bins)
+                time_data, signal_data = time_values[sample_idx], values[sample_idx]
             
-            legend_labels.append(custom_header)
+            # Aplicar escalado a los datos ya decimados
+            scaled_time_data, _ = self.get_scaled_data_and_label(
+                time_data, self.x_scale_var.get(), "Tiempo (s)"
+            )
+            scaled_signal_data, _ = self.get_scaled_data_and_label(
+                signal_data, self.y_scale_var.get(), original_header
+            )
+            line.set_data(scaled_time_data, scaled_signal_data)
+    
+    def update_plot_labels(self):
+        """Actualizar título, etiquetas de ejes, grid y leyenda"""
+        time_label = self.get_scaled_label_only(self.x_scale_var.get(), "Tiempo (s)")
         
         # Configurar etiquetas de los ejes con escalado
         ylabel_base = self.ylabel_var.get()
         ylabel_scaled = self.get_scaled_label_only(self.y_scale_var.get(), ylabel_base)
         
         # Configurar el gráfico
-        ax.set_title(self.title_var.get(), fontsize=10, pad=10, weight='bold')
-        ax.set_xlabel(time_label, fontsize=9)
-        ax.set_ylabel(ylabel_scaled, fontsize=9)
-        ax.tick_params(labelsize=8)
+        self.ax.set_title(self.title_var.get(), fontsize=10, pad=10, weight='bold')
+        self.ax.set_xlabel(time_label, fontsize=9)
+        self.ax.set_ylabel(ylabel_scaled, fontsize=9)
+        
+        # Mostrar grid si está habilitado
+        if self.grid_var.get():
+            self.ax.grid(True, alpha=0.3, linestyle='--')
+        else:
+            self.ax.grid(False)
+        
+        self.update_plot_legend()
+    
+    def update_plot_legend(self):
+        """Recrear la leyenda a partir de las líneas visibles"""
+        legend = self.ax.get_legend()
+        if legend:
+            legend.remove()
+        
+        # Mostrar leyenda si está habilitada y hay múltiples señales
+        if self.legend_var.get() and len(self.plotted_lines) > 1:
+            with mpl.rc_context(self.plot_rc):
+                self.ax.legend(handles=[line for line, _ in self.plotted_lines],
+                               fontsize=7, loc='best', framealpha=0.9)
+    
+    def update_plot_limits(self):
+        """Recalcular los límites automáticos y aplicar los rangos personalizados"""
+        self.ax.set_autoscale_on(True)
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
         
         # APLICAR RANGOS PERSONALIZADOS
         if not self.auto_range_x:
             if self.x_min is not None or self.x_max is not None:
-                current_xlim = ax.get_xlim()
+                current_xlim = self.ax.get_xlim()
                 x_min = self.x_min if self.x_min is not None else current_xlim[0]
                 x_max = self.x_max if self.x_max is not None else current_xlim[1]
-                ax.set_xlim(x_min, x_max)
+                self.ax.set_xlim(x_min, x_max)
         
         if not self.auto_range_y:
             if self.y_min is not None or self.y_max is not None:
-                current_ylim = ax.get_ylim()
+                current_ylim = self.ax.get_ylim()
                 y_min = self.y_min if self.y_min is not None else current_ylim[0]
                 y_max = self.y_max if self.y_max is not None else current_ylim[1]
-                ax.set_ylim(y_min, y_max)
-        
-        # Mostrar grid si está habilitado
-        if self.grid_var.get():
-            ax.grid(True, alpha=0.3, linestyle='--')
-        
-        # Mostrar leyenda si está habilitada y hay múltiples señales
-        if self.legend_var.get() and len(selected_indices) > 1:
-            ax.legend(fontsize=7, loc='best', framealpha=0.9)
-        
-        # Guardar referencia al axis para uso posterior
-        self.ax = ax
-        
-        # Ajustar layout
-        self.fig.tight_layout(pad=0.5)
-        
-        # Actualizar canvas
-        self.canvas.draw()
-        
-        # Actualizar información
-        self.update_selection_info()
+                self.ax.set_ylim(y_min, y_max)
+    
+    def redraw_plot(self, relayout=False):
+        """Programar el redibujado del canvas (tight_layout solo si cambian textos)"""
+        if relayout:
+            self.fig.tight_layout(pad=0.5)
+        self.canvas.draw_idle()
     
     def save_plot(self):
         if self.df is None:
@@ -628,13 +1109,262 @@ class SignalPlotter:
         )
         
         if file_path:
+            # Guardar con todas las muestras y restaurar después la envolvente escalada
+            decimated = [line.get_data() for line, _ in self.plotted_lines]
             try:
+                self.set_full_resolution_data()
                 # Configurar DPI alto para calidad de Word
-                self.fig.savefig(file_path, dpi=300, bbox_inches='tight', 
-                               facecolor='white', edgecolor='none')
+                with mpl.rc_context(self.plot_rc):
+                    self.fig.savefig(file_path, dpi=300, bbox_inches='tight', 
+                                   facecolor='white', edgecolor='none')
                 messagebox.showinfo("Éxito", f"Gráfico guardado como:\n{file_path}")
             except Exception as e:
                 messagebox.showerror("Error", f"Error al guardar:\n{str(e)}")
+            finally:
+                for (line, _), (x_data, y_data) in zip(self.plotted_lines, decimated):
+                    line.set_data(x_data, y_data)
+                    line.set_transform(self.ax.transData)
+    
+    def get_metric_options(self):
+        """Umbral, banda y base ingresados (None si el campo está vacío)"""
+        options = {}
+        for key, var in [('threshold', self.threshold_var), ('band', self.band_var),
+                         ('band_center', self.band_center_var), ('base', self.base_var)]:
+            text = var.get().strip()
+            if text:
+                options[key] = float(text)
+        return options
+    
+    def compute_metrics(self):
+        """Métricas de todas las señales cargadas en la ventana X actual"""
+        if self.df is None:
+            messagebox.showwarning("Advertencia", "Primero carga un archivo")
+            return
+        
+        try:
+            options = self.get_metric_options()
+        except ValueError:
+            messagebox.showerror("Error", "Ingresa valores numéricos válidos")
+            return
+        
+        self.header_editor.flush()
+        # Todas las señales menos el tiempo; las de comparación con su propia base de tiempo
+        keys = [key for key in self.original_headers if key != self.df.columns[0]]
+        window = self.get_visible_time_window()
+        # Derivadas: solo se evalúan las muestras de la ventana (su índice min/max se arma ahí)
+        start, stop = visible_index_range(self.time_values, *window, pad=False)
+        signals = []
+        for key in keys:
+            if key in self.derived_signals:
+                signals.append((self.custom_headers[key], self.time_values[start:stop],
+                                self.derived_values(key, start, stop), None))
+            else:
+                signals.append((self.custom_headers[key], *self.signal_data(key)))
+        table = metrics_table(signals, *window, **options)
+        self.show_metrics_table(table)
+    
+    def show_metrics_table(self, table):
+        """Ventana con la tabla de métricas y exportación a CSV"""
+        window = tk.Toplevel(self.root)
+        window.title("Métricas de Señales")
+        window.geometry("900x500")
+        
+        table_frame = ttk.Frame(window)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        tree = ttk.Treeview(table_frame, columns=METRIC_COLUMNS, show='headings')
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        for column in METRIC_COLUMNS:
+            tree.heading(column, text=column)
+            tree.column(column, width=200 if column == 'señal' else 110, anchor=tk.W if column == 'señal' else tk.E)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        
+        for row in table.itertuples(index=False):
+            tree.insert('', tk.END, values=[row[0]] + ['-' if value != value else f"{value:.6g}" for value in row[1:]])
+        
+        ttk.Button(window, text="Exportar CSV", 
+                  command=lambda: self.export_metrics(table)).pack(anchor=tk.E, padx=10, pady=(0, 10))
+    
+    def export_metrics(self, table):
+        file_path = filedialog.asksaveasfilename(
+            title="Exportar métricas",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")]
+        )
+        
+        if file_path:
+            try:
+                table.to_csv(file_path, index=False)
+                messagebox.showinfo("Éxito", f"Métricas guardadas como:\n{file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar:\n{str(e)}")
+    
+    def get_spectrum_options(self, kind):
+        options = {'window': self.spectrum_window_var.get()}
+        if kind != 'fft':
+            options['nperseg'] = int(self.segment_var.get())
+            options['overlap'] = float(self.overlap_var.get()) / 100
+            if options['nperseg'] < 2 or not 0 <= options['overlap'] < 1:
+                raise ValueError("Segmento o solapamiento fuera de rango")
+        return options
+    
+    def compute_spectrum(self):
+        """Espectro de las señales seleccionadas en la ventana X actual"""
+        if self.df is None:
+            messagebox.showwarning("Advertencia", "Primero carga un archivo")
+            return
+        
+        self.header_editor.flush()
+        keys = [self.original_headers[idx] for idx in self.signal_list.selected_positions()
+                if self.original_headers[idx] != self.df.columns[0]]
+        if not keys:
+            messagebox.showwarning("Advertencia", "Selecciona al menos una señal")
+            return
+        
+        kind = SPECTRUM_KINDS[self.spectrum_kind_var.get()]
+        if kind == 'spectrogram' and len(keys) > MAX_SPECTROGRAM_PLOTS:
+            messagebox.showwarning("Advertencia", f"El espectrograma admite hasta {MAX_SPECTROGRAM_PLOTS} señales")
+            return
+        
+        try:
+            options = self.get_spectrum_options(kind)
+            # Un lote por archivo: las señales de un mismo archivo comparten la base de tiempo
+            # (lote -> tiempo, señales y rango de muestras, None: la ventana visible; () son las derivadas)
+            groups = {}
+            for key in keys:
+                if key in self.signal_sources:
+                    case_key, header = self.signal_sources[key]
+                    case = self.overlay.cases[case_key]
+                    _, columns, _ = groups.setdefault(case_key, (case.time, {}, None))
+                    columns[key] = case.columns[header]
+                elif key in self.derived_signals:
+                    # Solo se evalúa la ventana visible: el lote usa ese tramo de tiempo
+                    start, stop = self.get_visible_index_range()
+                    _, columns, _ = groups.setdefault((), (self.time_values[start:stop], {}, (0, stop - start)))
+                    columns[key] = self.derived_values(key, start, stop)
+                else:
+                    _, columns, _ = groups.setdefault(None, (self.time_values, {}, None))
+                    columns[key] = self.df[key].to_numpy()
+            results = {}
+            for time_values, columns, index_range in groups.values():
+                start, stop = index_range or self.get_visible_index_range(time_values)
+                results.update(compute_spectra(kind, time_values, columns, start, stop,
+                                               self.spectrum_cache, **options))
+        except Exception as e:
+            messagebox.showerror("Error", f"Error en el análisis espectral:\n{str(e)}")
+            return
+        
+        self.show_spectrum_window(kind, [(self.custom_headers[key], results[key]) for key in keys])
+    
+    def show_spectrum_window(self, kind, results):
+        """Ventana con el espectro de cada señal (superpuestos, o un espectrograma por señal)"""
+        window = tk.Toplevel(self.root)
+        window.title(f"Análisis Espectral - {self.spectrum_kind_var.get()}")
+        window.geometry("900x600")
+        
+        with mpl.rc_context(self.plot_rc):
+            fig = Figure(figsize=(8, 5.5))
+            if kind == 'spectrogram':
+                axes = fig.subplots(len(results), 1, sharex=True, squeeze=False)[:, 0]
+                for ax, (name, (times, freqs, psd)) in zip(axes, results):
+                    # Densidad en dB (el piso evita log de cero)
+                    level = 10 * np.log10(np.maximum(psd, np.max(psd) * 1e-12 + np.finfo(float).tiny))
+                    mesh = ax.pcolormesh(times, freqs, level, shading='auto')
+                    fig.colorbar(mesh, ax=ax, label="dB/Hz")
+                    ax.set_ylabel("Frecuencia (Hz)")
+                    ax.set_title(name, fontsize=9)
+                axes[-1].set_xlabel("Tiempo (s)")
+            else:
+                ax = fig.add_subplot(1, 1, 1)
+                for i, (name, (freqs, values)) in enumerate(results):
+                    # Sin la componente continua: no cabe en un eje logarítmico de frecuencia
+                    ax.plot(freqs[1:], values[1:], linewidth=1, color=self.colors[i % len(self.colors)], label=name)
+                ax.set_xscale('log')
+                if kind == 'welch':
+                    ax.set_yscale('log')
+                    ax.set_ylabel("Densidad espectral (V²/Hz)")
+                else:
+                    ax.set_ylabel("Amplitud (V)")
+                ax.set_xlabel("Frecuencia (Hz)")
+                ax.grid(True, which='both', alpha=0.3, linestyle='--')
+                if len(results) > 1:
+                    ax.legend(fontsize=7, loc='best')
+            fig.tight_layout()
+        
+        canvas = StyledFigureCanvas(fig, window, self.plot_rc)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        canvas.draw()
+    
+    def get_plot_spec(self):
+        """Configuración actual del gráfico en el formato de WaveformBatch"""
+        self.header_editor.flush()
+        selected_indices = self.signal_list.selected_positions()
+        return {
+            # Las señales de comparación y las derivadas no existen en los archivos del lote
+            'signals': [self.original_headers[idx] for idx in selected_indices
+                        if self.original_headers[idx] in self.df.columns],
+            'custom_headers': {h: name for h, name in self.custom_headers.items()
+                               if name != h and h in self.df.columns},
+            'x_scale': self.x_scale_var.get(),
+            'y_scale': self.y_scale_var.get(),
+            'x_range': None if self.auto_range_x else [self.x_min, self.x_max],
+            'y_range': None if self.auto_range_y else [self.y_min, self.y_max],
+            'title': self.title_var.get(),
+            'ylabel': self.ylabel_var.get(),
+            'legend': self.legend_var.get(),
+            'grid': self.grid_var.get(),
+        }
+    
+    def save_plot_spec(self):
+        """Guardar la configuración actual en JSON para generar gráficos por lotes"""
+        if self.df is None:
+            messagebox.showwarning("Advertencia", "Primero carga un archivo")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            title="Guardar configuración",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json")]
+        )
+        
+        if file_path:
+            try:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.get_plot_spec(), f, indent=2, ensure_ascii=False)
+                messagebox.showinfo("Éxito", f"Configuración guardada como:\n{file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar:\n{str(e)}")
+    
+    def set_full_resolution_data(self):
+        """Reemplazar la envolvente de cada línea por la señal completa
+        
+        Las muestras se pasan en unidades SI (vistas, sin copiar) y el cambio
+        de prefijo lo aplica la transformación de la línea.
+        """
+        if not self.plotted_lines:
+            return
+        
+        x_factor, _ = self.scale_factors.get(self.x_scale_var.get(), (1, ''))
+        y_factor, _ = self.scale_factors.get(self.y_scale_var.get(), (1, ''))
+        transform = scale_transform(self.ax, x_factor, y_factor)
+        
+        difference_keys = [h for _, h in self.plotted_lines if self.difference_reference(h) is not None]
+        if difference_keys:
+            grid, differences = self.difference_data(difference_keys)
+        
+        for line, original_header in self.plotted_lines:
+            if original_header in difference_keys:
+                line.set_data(grid, differences[original_header])
+            elif original_header in self.derived_signals:
+                start, stop = self.get_visible_index_range()
+                line.set_data(self.time_values[start:stop], self.derived_values(original_header, start, stop))
+            else:
+                # Todas las muestras de la ventana visible
+                time_values, values, _ = self.signal_data(original_header)
+                start, stop = self.get_visible_index_range(time_values)
+                line.set_data(time_values[start:stop], values[start:stop])
+            line.set_transform(transform)
 
 def main():
     root = tk.Tk()
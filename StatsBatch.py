@@ -0,0 +1,226 @@
+"""Análisis estadístico por lotes sin interfaz gráfica
+
+Procesa muchos estudios (archivo de datos + archivo de labels) con la misma
+lógica de estadísticas y gráficos que StatsGraphGen, sin importar tkinter.
+
+Ejemplos:
+    python StatsBatch.py casos/ -o resultados
+    python StatsBatch.py "casos/*_datos.txt" --config estudio.json --workers 8
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from emtp_core import ColumnCache
+from emtp_core.analysis import (CHART_TYPES, UNIT_FACTORS, build_column_names, build_study_frame, read_labels,
+                                read_voltage_data, reference_in_units, run_statistical_analysis,
+                                voltage_columns)
+from emtp_core.figures import output_stems
+from emtp_core.parsing import count_columns
+from emtp_core.precision import storage_dtype
+
+# Misma configuración por defecto que la interfaz gráfica
+DEFAULT_CONFIG = {
+    'unit': 'Kilovoltios (kV)',
+    'reference_kv': 707.1,
+    'show_reference': True,
+    'graph_types': ['barras', 'boxplot', 'histograma'],
+    'percentiles': False,
+    'outliers': True,
+    'confidence': False,
+    'image_format': 'png',
+    'dpi': 300,
+    'alpha': 0.8,
+    'font_size': 10,
+    'create_summary': True,
+    'timestamp_folder': False,
+    'columns': None,
+    'custom_labels': {},
+    'labels_suffix': '_labels',
+    'chart_workers': 1,
+    # Estadísticas por bloques con memoria acotada (estudios mayores que la RAM)
+    'streaming': False,
+    # Guardar el estado por bloques y en cada ejecución leer solo los disparos nuevos
+    'incremental': False,
+    # Datos en memoria como float32 (las estadísticas se acumulan en float64)
+    'float32': False,
+    # U2%, U50% y P(U > referencia) con intervalos bootstrap en los resúmenes (requiere datos en memoria)
+    'bootstrap': False,
+    'bootstrap_resamples': 1000,
+    'bootstrap_seed': 0,
+}
+
+def load_config(config_path):
+    """Configuración por defecto actualizada con el archivo JSON (si existe)"""
+    config = dict(DEFAULT_CONFIG)
+    if config_path:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+
+    unknown = [t for t in config['graph_types'] if t not in CHART_TYPES]
+    if unknown:
+        raise ValueError(f"Tipos de gráfico no válidos: {unknown} (use {CHART_TYPES})")
+    if config['unit'] not in UNIT_FACTORS:
+        raise ValueError(f"Unidad no válida: {config['unit']}")
+    return config
+
+def is_labels_file(file_path, labels_suffix):
+    name = os.path.splitext(os.path.basename(file_path))[0].lower()
+    return name.endswith(labels_suffix.lower()) or 'labels' in name
+
+def find_labels_file(data_path, labels_suffix):
+    """Archivo de labels de un estudio: <nombre><sufijo>.txt o el único *labels*.txt de la carpeta"""
+    stem, ext = os.path.splitext(data_path)
+    candidate = f"{stem}{labels_suffix}{ext or '.txt'}"
+    if os.path.isfile(candidate):
+        return candidate
+
+    folder = os.path.dirname(data_path) or '.'
+    candidates = glob.glob(os.path.join(folder, '*labels*.txt'))
+    if len(candidates) == 1:
+        return candidates[0]
+    return None
+
+def find_studies(inputs, labels_suffix):
+    """Lista de pares (datos, labels) a partir de carpetas, archivos o patrones glob"""
+    data_files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '*.txt'))
+        else:
+            matches = glob.glob(pattern)
+        data_files.extend(sorted(m for m in matches if not is_labels_file(m, labels_suffix)))
+
+    studies = []
+    for data_path in dict.fromkeys(data_files):
+        studies.append((data_path, find_labels_file(data_path, labels_suffix)))
+    return studies
+
+def study_settings(df, config, output_folder, all_columns=None, data_file=None):
+    """Diccionario de configuración para run_statistical_analysis (como la interfaz gráfica)"""
+    factor, unit_symbol = UNIT_FACTORS[config['unit']]
+    columns = list(df.columns) if df is not None else list(all_columns)
+    if config['columns']:
+        columns = [c for c in columns if c in config['columns']]
+
+    return {
+        'df': df,
+        'data_file': data_file,
+        'all_columns': all_columns,
+        'columns': columns,
+        'graph_types': config['graph_types'],
+        'factor': factor,
+        'workers': config['chart_workers'],
+        'output_folder': output_folder,
+        'timestamp_folder': config['timestamp_folder'],
+        'incremental': config['incremental'],
+        'create_summary': config['create_summary'],
+        'bootstrap': {'resamples': config['bootstrap_resamples'], 'seed': config['bootstrap_seed']}
+                     if config['bootstrap'] else None,
+        'chart_options': {
+            'dpi': config['dpi'],
+            'alpha': config['alpha'],
+            'font_size': config['font_size'],
+            'image_format': config['image_format'],
+            'unit_symbol': unit_symbol,
+            'unit_label': config['unit'],
+            'show_percentiles': config['percentiles'],
+            'show_reference': config['show_reference'],
+            'reference_value': reference_in_units(config['reference_kv'], config['unit']),
+            'show_outliers': config['outliers'],
+            'show_confidence': config['confidence'],
+        },
+    }
+
+def run_study(data_path, labels_path, config, output_root, use_cache=True, name=None):
+    """Analizar un estudio completo en <output_root>/<name>; se ejecuta en un proceso del pool
+
+    name es por defecto el nombre del archivo de datos (ver output_stems).
+    """
+    start = time.perf_counter()
+    name = name or os.path.splitext(os.path.basename(data_path))[0]
+    messages = []
+
+    labels = read_labels(labels_path)
+    output_folder = os.path.join(output_root, name)
+    if config['streaming'] or config['incremental']:
+        n_voltage = len(voltage_columns(count_columns(data_path)))
+        all_columns = build_column_names(labels, config['custom_labels'], n_voltage)
+        settings = study_settings(None, config, output_folder, all_columns, data_path)
+    else:
+        cache = ColumnCache() if use_cache else None
+        data, _, _ = read_voltage_data(data_path, cache, dtype=storage_dtype(config['float32']))
+        n_voltage = data.shape[1]
+        df = build_study_frame(data, labels, config['custom_labels'])
+        settings = study_settings(df, config, output_folder)
+    if len(labels) != n_voltage:
+        messages.append(f"⚠️  {len(labels)} labels para {n_voltage} columnas de voltaje")
+    if not settings['columns']:
+        raise ValueError("Ninguna columna coincide con el filtro 'columns'")
+
+    analysis_folder, n_rendered, _ = run_statistical_analysis(settings, messages.append)
+    return analysis_folder, n_rendered, time.perf_counter() - start, messages
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help="Carpetas, archivos de datos o patrones glob")
+    parser.add_argument('-o', '--output', default='resultados_estadisticos', help="Carpeta de salida")
+    parser.add_argument('-c', '--config', help="Archivo JSON con la configuración del análisis")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Estudios procesados en paralelo")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché binaria de columnas")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Mostrar el registro de cada estudio")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    studies = find_studies(args.inputs, config['labels_suffix'])
+    if not studies:
+        print("No se encontraron archivos de datos")
+        return 1
+
+    pending = []
+    for data_path, labels_path in studies:
+        if labels_path is None:
+            print(f"⚠️  {data_path}: sin archivo de labels, se omite")
+        else:
+            pending.append((data_path, labels_path))
+
+    # Estudios con el mismo nombre en carpetas distintas: una carpeta (y un estado incremental) por estudio
+    names = output_stems([data_path for data_path, _ in pending])
+    if len(set(names)) < len(names):
+        print("Hay estudios que usarían la misma carpeta de salida; renombrarlos o procesarlos por separado")
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    print(f"Procesando {len(pending)} estudios con {args.workers} proceso(s)...")
+
+    failures = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(run_study, data_path, labels_path, config, args.output, not args.no_cache,
+                            name): data_path
+            for (data_path, labels_path), name in zip(pending, names)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            data_path = futures[future]
+            try:
+                analysis_folder, n_rendered, elapsed, messages = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(pending)}] ❌ {data_path}: {e}")
+                continue
+            print(f"[{done}/{len(pending)}] ✅ {data_path}: {n_rendered} gráficos en {elapsed:.1f} s -> {analysis_folder}")
+            for message in messages:
+                if args.verbose or message.startswith(('⚠️', '❌')):
+                    print(f"    {message}")
+
+    print(f"Terminado en {time.perf_counter() - start:.1f} s ({failures} con errores)")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
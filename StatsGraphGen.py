@@ -1,13 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib as mpl
-import numpy as np
 import os
-import glob
-from io import StringIO
+import queue
+import threading
+import time
+from emtp_core import ColumnCache
+from emtp_core.gui import (FilteredListbox, NameIndex, StyledFigureCanvas, VirtualRowEditor,
+                           create_styled_figure)
+from emtp_core.precision import storage_dtype
+from emtp_core.stats import compute_column_statistics
+from emtp_core.charts import CHART_RC
+from emtp_core.analysis import (UNIT_FACTORS, build_column_names, build_study_frame, read_labels,
+                                read_voltage_data, read_voltage_layout, reference_in_units,
+                                run_statistical_analysis)
+
+# Intervalo (ms) con que la GUI procesa los eventos de las tareas en segundo plano
+EVENT_POLL_MS = 100
+# Máximo de eventos procesados por ciclo (los mensajes se insertan en un solo bloque)
+EVENT_BATCH = 2000
 
 class StatisticalAnalyzer:
     def __init__(self, root):
@@ -18,33 +29,31 @@ class StatisticalAnalyzer:
         # Variables
         self.data = None
         self.df = None
+        # Archivo que se lee por bloques al generar el análisis (None: datos en memoria)
+        self.streaming_file = None
+        # Ruta del archivo de datos cargado (el modo incremental lo vuelve a leer desde el último estado)
+        self.data_file = None
         self.labels = []
         self.custom_labels = {}
+        self.name_index = NameIndex([])
         self.output_folder = ""
         
-        # Configurar matplotlib globalmente
-        mpl.rcParams['figure.figsize'] = [7.54/2.54, 7.09/2.54]
-        mpl.rcParams['font.family'] = 'Times New Roman'
-        mpl.rcParams['font.size'] = 10
-        mpl.rcParams['axes.titlesize'] = 10
-        mpl.rcParams['axes.labelsize'] = 10
-        mpl.rcParams['xtick.labelsize'] = 10
-        mpl.rcParams['ytick.labelsize'] = 10
-        mpl.rcParams['legend.fontsize'] = 10
-        mpl.rcParams['savefig.dpi'] = 300
-        mpl.rcParams['savefig.bbox'] = 'tight'
+        # Caché binaria de archivos ya cargados
+        self.cache = ColumnCache()
+        
+        # Tareas en segundo plano: eventos hacia la GUI y señal de cancelación
+        self.events = queue.Queue()
+        self.worker_thread = None
+        self.cancel_event = threading.Event()
+        
+        # Mismo formato que los gráficos exportados, solo para la vista previa
+        self.plot_rc = CHART_RC
         
         # Diccionarios para escalado de unidades del eje Y
-        self.y_unit_factors = {
-            'Voltios (V)': (1, 'V'),
-            'Kilovoltios (kV)': (1e-3, 'kV'),
-            'Megavoltios (MV)': (1e-6, 'MV'),
-            'Milivoltios (mV)': (1e3, 'mV'),
-            'time (s)': (1, 's'),
-            'time (ms)': (1e3, 'ms')
-        }
+        self.y_unit_factors = dict(UNIT_FACTORS)
         
         self.setup_gui()
+        self.root.after(EVENT_POLL_MS, self.process_events)
     
     def setup_gui(self):
         # Frame principal
@@ -66,6 +75,16 @@ class StatisticalAnalyzer:
         ttk.Button(button_frame, text="Seleccionar Carpeta de Salida", 
                   command=self.select_output_folder).pack(side=tk.LEFT)
         
+        # Estudios mayores que la RAM: no cargar los datos, leerlos por bloques en el análisis
+        self.streaming_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Leer por bloques (archivos grandes)", 
+                       variable=self.streaming_var).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Datos en float32 (mitad de memoria); media y desviación se acumulan en float64
+        self.compact_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(button_frame, text="Memoria compacta (float32)", 
+                       variable=self.compact_var).pack(side=tk.LEFT, padx=(10, 0))
+        
         # Labels de estado
         status_frame = ttk.Frame(file_frame)
         status_frame.pack(fill=tk.X, pady=(10, 0))
@@ -83,21 +102,10 @@ class StatisticalAnalyzer:
         labels_frame = ttk.LabelFrame(main_frame, text="Editar Nombres de Columnas", padding=10)
         labels_frame.pack(fill=tk.X, pady=(0, 10))
         
-        # Canvas scrollable para labels
-        labels_canvas = tk.Canvas(labels_frame, height=120)  # Reducido para más espacio
-        labels_scrollbar = ttk.Scrollbar(labels_frame, orient="vertical", command=labels_canvas.yview)
-        self.labels_scrollable_frame = ttk.Frame(labels_canvas)
-        
-        self.labels_scrollable_frame.bind(
-            "<Configure>",
-            lambda e: labels_canvas.configure(scrollregion=labels_canvas.bbox("all"))
-        )
-        
-        labels_canvas.create_window((0, 0), window=self.labels_scrollable_frame, anchor="nw")
-        labels_canvas.configure(yscrollcommand=labels_scrollbar.set)
-        
-        labels_canvas.pack(side="left", fill="both", expand=True)
-        labels_scrollbar.pack(side="right", fill="y")
+        # Editor virtual: solo existen widgets para las filas visibles (estudios con miles de nodos)
+        self.labels_editor = VirtualRowEditor(labels_frame, n_rows=4, on_change=self.on_label_renamed,
+                                              label_width=35, label_chars=30, entry_width=25, pady=2)
+        self.labels_editor.pack(fill=tk.BOTH, expand=True)
         
         # Frame inferior - Configuración y análisis CON SCROLL
         analysis_frame = ttk.LabelFrame(main_frame, text="Configuración de Análisis", padding=10)
@@ -130,8 +138,17 @@ class StatisticalAnalyzer:
         columns_section = ttk.LabelFrame(config_scrollable_frame, text="Seleccionar Columnas", padding=5)
         columns_section.pack(fill=tk.X, pady=(0, 10), padx=5)
         
+        # Búsqueda: filtra la lista y el editor de nombres (la selección oculta se conserva)
+        search_frame = ttk.Frame(columns_section)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="Buscar:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT, padx=(5, 0))
+        self.search_var.trace_add('write', lambda *args: self.apply_column_filter())
+        
         self.columns_listbox = tk.Listbox(columns_section, selectmode=tk.MULTIPLE, height=10, width=45)
         self.columns_listbox.pack(fill=tk.X, pady=(0, 10))
+        self.columns_list = FilteredListbox(self.columns_listbox)
         
         # Botones de selección
         columns_buttons = ttk.Frame(columns_section)
@@ -231,6 +248,11 @@ class StatisticalAnalyzer:
         ttk.Entry(alpha_frame, textvariable=self.alpha_var, width=5).pack(side=tk.LEFT)
         ttk.Label(alpha_frame, text="(0.0-1.0)").pack(side=tk.LEFT, padx=(2, 0))
         
+        # Procesos para renderizar gráficos en paralelo (1 = sin paralelismo)
+        ttk.Label(format_section, text="Procesos paralelos:").pack(anchor=tk.W, pady=(5, 2))
+        self.workers_var = tk.StringVar(value=str(os.cpu_count() or 1))
+        ttk.Entry(format_section, textvariable=self.workers_var, width=5).pack(anchor=tk.W, pady=(0, 5))
+        
         # Configuración de estadísticas adicionales
         stats_section = ttk.LabelFrame(config_scrollable_frame, text="Estadísticas Adicionales", padding=5)
         stats_section.pack(fill=tk.X, pady=(0, 10), padx=5)
@@ -247,6 +269,20 @@ class StatisticalAnalyzer:
         ttk.Checkbutton(stats_section, text="Intervalos de Confianza", 
                        variable=self.show_confidence_var).pack(anchor=tk.W)
         
+        # U2%, U50% y probabilidad de superar la referencia con intervalos bootstrap (resumen CSV)
+        self.bootstrap_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(stats_section, text="Bootstrap U2%, U50% y P(U > referencia) en el resumen", 
+                       variable=self.bootstrap_var).pack(anchor=tk.W)
+        
+        bootstrap_frame = ttk.Frame(stats_section)
+        bootstrap_frame.pack(anchor=tk.W, pady=(2, 0))
+        ttk.Label(bootstrap_frame, text="Remuestreos:").pack(side=tk.LEFT)
+        self.bootstrap_resamples_var = tk.StringVar(value="1000")
+        ttk.Entry(bootstrap_frame, textvariable=self.bootstrap_resamples_var, width=7).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(bootstrap_frame, text="Semilla:").pack(side=tk.LEFT)
+        self.bootstrap_seed_var = tk.StringVar(value="0")
+        ttk.Entry(bootstrap_frame, textvariable=self.bootstrap_seed_var, width=7).pack(side=tk.LEFT, padx=(5, 0))
+        
         # Configuración de exportación
         export_section = ttk.LabelFrame(config_scrollable_frame, text="Opciones de Exportación", padding=5)
         export_section.pack(fill=tk.X, pady=(0, 10), padx=5)
@@ -266,14 +302,23 @@ class StatisticalAnalyzer:
         ttk.Checkbutton(export_section, text="Carpeta con Timestamp", 
                        variable=self.timestamp_folder_var).pack(anchor=tk.W)
         
+        # Reutilizar el estado guardado: solo se leen los disparos agregados al archivo
+        self.incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(export_section, text="Actualización Incremental (solo disparos nuevos)", 
+                       variable=self.incremental_var).pack(anchor=tk.W)
+        
         # Botones principales
         main_buttons_section = ttk.Frame(config_scrollable_frame)
         main_buttons_section.pack(fill=tk.X, pady=(10, 0), padx=5)
         
         ttk.Button(main_buttons_section, text="Procesar Datos", 
                   command=self.process_data).pack(fill=tk.X, pady=(0, 5))
-        ttk.Button(main_buttons_section, text="Generar Análisis", 
-                  command=self.generate_analysis).pack(fill=tk.X, pady=(0, 5))
+        self.analysis_button = ttk.Button(main_buttons_section, text="Generar Análisis", 
+                                          command=self.generate_analysis)
+        self.analysis_button.pack(fill=tk.X, pady=(0, 5))
+        self.cancel_button = ttk.Button(main_buttons_section, text="Cancelar", 
+                                        command=self.cancel_background_task, state="disabled")
+        self.cancel_button.pack(fill=tk.X, pady=(0, 5))
         ttk.Button(main_buttons_section, text="Abrir Carpeta Salida", 
                   command=self.open_output_folder).pack(fill=tk.X)
         
@@ -293,8 +338,8 @@ class StatisticalAnalyzer:
         preview_section = ttk.LabelFrame(right_analysis_frame, text="Vista Previa", padding=5)
         preview_section.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
-        self.fig, self.ax = plt.subplots(figsize=(4, 3))
-        self.canvas = FigureCanvasTkAgg(self.fig, preview_section)
+        self.fig, self.ax = create_styled_figure((4, 3), self.plot_rc)
+        self.canvas = StyledFigureCanvas(self.fig, preview_section, self.plot_rc)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
         # Log de actividades
@@ -308,6 +353,10 @@ class StatisticalAnalyzer:
         self.log_text.pack(side="left", fill="both", expand=True)
         log_scrollbar.pack(side="right", fill="y")
         
+        # Progreso y velocidad de la tarea en curso
+        self.progress_label = ttk.Label(right_analysis_frame, text="", foreground="blue")
+        self.progress_label.pack(anchor=tk.W, pady=(5, 0))
+        
         # Mensaje inicial
         self.log_message("Analizador Estadístico iniciado. Cargue los archivos de datos y labels para comenzar.")
     
@@ -336,10 +385,75 @@ class StatisticalAnalyzer:
             self.generate_preview()
     
     def log_message(self, message):
-        """Agregar mensaje al log"""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update()
+        """Agregar mensaje al log (se puede llamar desde cualquier hilo)"""
+        self.events.put(('log', message))
+    
+    def call_in_gui(self, function, *args):
+        """Ejecutar una función en el hilo de Tk en el próximo ciclo de eventos"""
+        self.events.put(('call', function, args))
+    
+    def process_events(self):
+        """Vaciar la cola de eventos: mensajes agrupados en una sola inserción"""
+        messages = []
+        try:
+            for _ in range(EVENT_BATCH):
+                event = self.events.get_nowait()
+                if event[0] == 'log':
+                    messages.append(event[1])
+                    continue
+                # Respetar el orden: escribir los mensajes previos antes de la llamada
+                self.flush_log(messages)
+                messages = []
+                _, function, args = event
+                try:
+                    function(*args)
+                except Exception as e:
+                    messages.append(f"❌ Error en la interfaz: {str(e)}")
+        except queue.Empty:
+            pass
+        self.flush_log(messages)
+        self.root.after(EVENT_POLL_MS, self.process_events)
+    
+    def flush_log(self, messages):
+        """Insertar varios mensajes en el log con un único redibujado"""
+        if messages:
+            self.log_text.insert(tk.END, "\n".join(messages) + "\n")
+            self.log_text.see(tk.END)
+    
+    def is_busy(self):
+        """Indicar si hay una tarea en segundo plano en curso"""
+        return self.worker_thread is not None and self.worker_thread.is_alive()
+    
+    def run_in_background(self, task, on_success, on_error):
+        """Ejecutar task en un hilo; el resultado o el error vuelven al hilo de Tk"""
+        def worker():
+            try:
+                result = task()
+            except Exception as e:
+                self.call_in_gui(on_error, e)
+            else:
+                self.call_in_gui(on_success, result)
+        
+        self.cancel_event.clear()
+        self.cancel_button.config(state="normal")
+        self.worker_thread = threading.Thread(target=worker, daemon=True)
+        self.worker_thread.start()
+    
+    def finish_background_task(self):
+        """Restablecer los controles al terminar una tarea"""
+        self.cancel_button.config(state="disabled")
+        self.analysis_button.config(state="normal")
+    
+    def cancel_background_task(self):
+        """Pedir la cancelación de la tarea en curso"""
+        if self.is_busy():
+            self.cancel_event.set()
+            self.log_message("Cancelando...")
+    
+    def report_progress(self, done, total, start_time, unit="gráficos"):
+        """Mostrar avance y velocidad (llamar desde el hilo de Tk)"""
+        elapsed = max(time.perf_counter() - start_time, 1e-9)
+        self.progress_label.config(text=f"Progreso: {done}/{total} {unit} | {done / elapsed:.1f} {unit}/s")
     
     def load_data_file(self):
         """Cargar archivo de datos"""
@@ -349,15 +463,57 @@ class StatisticalAnalyzer:
         )
         
         if file_path:
-            try:
-                self.data = np.loadtxt(file_path)
-                self.data_label.config(text=f"Datos: {os.path.basename(file_path)} ({self.data.shape})", foreground="green")
-                self.log_message(f"Datos cargados: {file_path}")
-                self.log_message(f"Forma de los datos: {self.data.shape}")
-                self.process_data()
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al cargar datos:\n{str(e)}")
-                self.log_message(f"Error cargando datos: {str(e)}")
+            if self.is_busy():
+                messagebox.showwarning("Advertencia", "Hay una tarea en curso")
+                return
+            self.log_message(f"Leyendo datos: {file_path}")
+            streaming = self.streaming_var.get()
+            dtype = storage_dtype(self.compact_var.get())
+            self.run_in_background(
+                lambda: self.read_data_file(file_path, streaming, dtype),
+                lambda result: self.on_data_loaded(file_path, result, streaming),
+                self.on_data_load_error
+            )
+    
+    def read_data_file(self, file_path, streaming=False, dtype=None):
+        """Leer las columnas de voltaje del archivo (se ejecuta en segundo plano)"""
+        if streaming:
+            # Solo se cuentan las columnas; los datos se leen por bloques en el análisis
+            return read_voltage_layout(file_path)
+        
+        # Solo se parsean las columnas de voltaje (impares); las de tiempo se descartan
+        data, n_columns, from_cache = read_voltage_data(file_path, self.cache, dtype=dtype,
+                                                        cancel_event=self.cancel_event)
+        if from_cache:
+            self.log_message("Datos leídos desde la caché binaria")
+        return data, n_columns
+    
+    def on_data_loaded(self, file_path, result, streaming=False):
+        """Publicar en la GUI los datos leídos"""
+        self.finish_background_task()
+        # Cancelada (aunque la lectura haya terminado): se conservan los datos anteriores
+        if self.cancel_event.is_set():
+            self.log_message(f"⚠️ Carga cancelada: {file_path}")
+            return
+        self.data, n_columns = result
+        self.data_file = file_path
+        self.streaming_file = file_path if streaming else None
+        if self.streaming_file:
+            self.data_label.config(text=f"Datos: {os.path.basename(file_path)} (por bloques, {n_columns} columnas)", foreground="green")
+            self.log_message(f"Datos por bloques: {file_path} - {self.data.shape[1]} columnas de voltaje")
+            self.log_message("Las estadísticas se calculan al generar el análisis, sin cargar el archivo")
+            self.process_data()
+            return
+        self.data_label.config(text=f"Datos: {os.path.basename(file_path)} ({self.data.shape[0]}, {n_columns})", foreground="green")
+        self.log_message(f"Datos cargados: {file_path}")
+        self.log_message(f"Forma de los datos: {(self.data.shape[0], n_columns)} - {self.data.shape[1]} columnas de voltaje")
+        self.log_message(f"Memoria de datos: {self.data.nbytes / 1e6:.1f} MB ({self.data.dtype})")
+        self.process_data()
+    
+    def on_data_load_error(self, error):
+        self.finish_background_task()
+        messagebox.showerror("Error", f"Error al cargar datos:\n{str(error)}")
+        self.log_message(f"Error cargando datos: {str(error)}")
     
     def load_labels_file(self):
         """Cargar archivo de labels"""
@@ -368,11 +524,8 @@ class StatisticalAnalyzer:
         
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    labels_raw = f.read().strip().split('\n')
-                
                 # Procesar labels (cada dos líneas: descripción y label)
-                self.labels = [labels_raw[i+1].strip() for i in range(0, len(labels_raw), 2)]
+                self.labels = read_labels(file_path)
                 self.custom_labels = {label: label for label in self.labels}
                 
                 self.labels_label.config(text=f"Labels: {os.path.basename(file_path)} ({len(self.labels)})", foreground="green")
@@ -397,26 +550,36 @@ class StatisticalAnalyzer:
     
     def setup_labels_editor(self):
         """Configurar editor de labels"""
-        # Limpiar frame anterior
-        for widget in self.labels_scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        # Crear editores para cada label
-        for i, label in enumerate(self.labels):
-            row_frame = ttk.Frame(self.labels_scrollable_frame)
-            row_frame.pack(fill=tk.X, pady=2)
-            
-            ttk.Label(row_frame, text=f"Original: {label[:30]}...", width=35).pack(side=tk.LEFT)
-            
-            entry_var = tk.StringVar(value=self.custom_labels[label])
-            entry = ttk.Entry(row_frame, textvariable=entry_var, width=25)
-            entry.pack(side=tk.LEFT, padx=(10, 0))
-            
-            # Callback para actualizar el diccionario
-            def update_label(var=entry_var, orig=label):
-                self.custom_labels[orig] = var.get()
-            
-            entry_var.trace('w', lambda *args, var=entry_var, orig=label: update_label(var, orig))
+        self.labels_editor.set_items(self.labels, self.custom_labels)
+        self.rebuild_name_index()
+    
+    def on_label_renamed(self, position):
+        """Renombrar las columnas afectadas por un label editado (una vez que se dejó de escribir)"""
+        if self.df is None:
+            return
+        
+        names = build_column_names(self.labels, self.custom_labels, self.data.shape[1])
+        changed = [i for i, (old, new) in enumerate(zip(self.df.columns, names)) if old != new]
+        if not changed:
+            return
+        # DataFrame nuevo sobre los mismos datos: un análisis en curso conserva el suyo
+        self.df = build_study_frame(self.data, self.labels, self.custom_labels)
+        for i in changed:
+            self.columns_list.rename(i, names[i])
+            self.name_index.update(i, f"{self.labels[i]}\n{names[i]}")
+    
+    def rebuild_name_index(self):
+        """Índice de búsqueda por label original y nombre de columna"""
+        columns = list(self.df.columns) if self.df is not None else []
+        self.name_index = NameIndex([f"{label}\n{columns[i]}" if i < len(columns) else label
+                                     for i, label in enumerate(self.labels)])
+        self.apply_column_filter()
+    
+    def apply_column_filter(self):
+        """Mostrar en la lista y en el editor solo las columnas que coinciden con la búsqueda"""
+        positions = self.name_index.search(self.search_var.get())
+        self.labels_editor.show(positions)
+        self.columns_list.show([i for i in positions if i < len(self.columns_list.items)])
     
     def process_data(self):
         """Procesar datos cargados"""
@@ -424,27 +587,9 @@ class StatisticalAnalyzer:
             return
         
         try:
-            # Seleccionar solo columnas pares (datos de voltaje)
-            columnas_pares_idx = [i for i in range(1, self.data.shape[1], 2)]
-            data_filtrada = self.data[:, columnas_pares_idx]
-            
-            # Crear nombres únicos para las columnas
-            cols = []
-            for i, label in enumerate(self.labels):
-                if i < len(columnas_pares_idx):
-                    # Usar nombre personalizado
-                    base_name = self.custom_labels[label].strip()
-                    if base_name in cols:
-                        # Si ya existe, agregar índice
-                        counter = 2
-                        while f"{base_name}_{counter}" in cols:
-                            counter += 1
-                        cols.append(f"{base_name}_{counter}")
-                    else:
-                        cols.append(base_name)
-            
-            # Crear DataFrame con datos en voltios (sin conversión automática a kV)
-            self.df = pd.DataFrame(data_filtrada, columns=cols)
+            # self.data ya contiene solo las columnas de voltaje: se envuelve sin copiarlo
+            # (datos en voltios, sin conversión automática a kV)
+            self.df = build_study_frame(self.data, self.labels, self.custom_labels)
             
             # Actualizar lista de columnas
             self.update_columns_list()
@@ -461,27 +606,28 @@ class StatisticalAnalyzer:
     
     def update_columns_list(self):
         """Actualizar lista de columnas disponibles"""
-        self.columns_listbox.delete(0, tk.END)
-        
-        if self.df is not None:
-            for col in self.df.columns:
-                self.columns_listbox.insert(tk.END, col)
+        self.columns_list.set_items(self.df.columns if self.df is not None else [])
+        self.rebuild_name_index()
     
     def select_all_columns(self):
-        """Seleccionar todas las columnas"""
-        self.columns_listbox.select_set(0, tk.END)
+        """Seleccionar todas las columnas visibles"""
+        self.columns_list.select_all()
     
     def deselect_all_columns(self):
         """Deseleccionar todas las columnas"""
-        self.columns_listbox.selection_clear(0, tk.END)
+        self.columns_list.deselect_all()
     
-    def apply_unit_conversion(self, data):
-        """Aplicar conversión de unidades a los datos"""
-        selected_unit = self.y_unit_var.get()
-        if selected_unit in self.y_unit_factors:
-            factor, _ = self.y_unit_factors[selected_unit]
-            return data * factor
-        return data
+    def compute_statistics(self, columns, factor=None, include_percentiles=None, df=None):
+        """Calcular una sola vez las estadísticas de las columnas dadas
+        
+        Sin argumentos usa la unidad y opciones actuales de la GUI.
+        """
+        if factor is None:
+            factor = self.y_unit_factors.get(self.y_unit_var.get(), (1, ''))[0]
+        if include_percentiles is None:
+            include_percentiles = self.show_percentiles_var.get()
+        df = self.df if df is None else df
+        return compute_column_statistics(df[columns].to_numpy(), columns, factor, include_percentiles)
     
     def get_unit_label(self):
         """Obtener la etiqueta de la unidad actual"""
@@ -495,18 +641,7 @@ class StatisticalAnalyzer:
         try:
             # El valor de referencia se asume que está en kV
             ref_value_kv = float(self.reference_line_var.get())
-            selected_unit = self.y_unit_var.get()
-            
-            if selected_unit == 'Voltios (V)':
-                return ref_value_kv * 1000  # kV a V
-            elif selected_unit == 'Kilovoltios (kV)':
-                return ref_value_kv  # kV a kV
-            elif selected_unit == 'Megavoltios (MV)':
-                return ref_value_kv / 1000  # kV a MV
-            elif selected_unit == 'Milivoltios (mV)':
-                return ref_value_kv * 1000000  # kV a mV
-            else:
-                return ref_value_kv
+            return reference_in_units(ref_value_kv, self.y_unit_var.get())
         except ValueError:
             return 707.1  # Valor por defecto
     
@@ -516,52 +651,42 @@ class StatisticalAnalyzer:
             return
         
         try:
-            self.ax.clear()
-            
-            # Usar primera columna para preview
-            col = self.df.columns[0]
-            data = self.df[col].dropna()
-            
-            if len(data) > 0:
-                # Aplicar conversión de unidades
-                converted_data = self.apply_unit_conversion(data)
-                
-                # Calcular estadísticas básicas
-                stats = {
-                    'mean': np.mean(converted_data),
-                    'median': np.median(converted_data),
-                    'std': np.std(converted_data),
-                    'min': np.min(converted_data),
-                    'max': np.max(converted_data)
-                }
-                
-                # Crear gráfico de barras simple
-                estadisticas = ['Media', 'Mediana', 'Std', 'Min', 'Max']
-                valores = [stats['mean'], stats['median'], stats['std'], stats['min'], stats['max']]
+            # Textos y leyenda con el estilo de los gráficos exportados
+            with mpl.rc_context(self.plot_rc):
+                self.ax.clear()
                 
-                bars = self.ax.bar(estadisticas, valores, color='steelblue', alpha=0.8)
+                # Usar primera columna para preview
+                col = self.df.columns[0]
+                stats = self.compute_statistics([col]).get(col)
                 
-                # Línea de referencia (si está habilitada)
-                if self.show_reference_var.get():
-                    ref_value = self.get_reference_value_in_current_units()
-                    unit_symbol = self.y_unit_factors[self.y_unit_var.get()][1]
-                    self.ax.axhline(y=ref_value, color='red', linestyle='--', linewidth=1.5, 
-                                   label=f'Referencia ({ref_value:.1f} {unit_symbol})')
-                    self.ax.legend(fontsize=8)
-                
-                self.ax.set_title(f'Vista Previa: {col[:20]}...', fontsize=9)
-                self.ax.set_ylabel(self.get_unit_label(), fontsize=8)
-                self.ax.tick_params(axis='x', rotation=45, labelsize=7)
-                self.ax.tick_params(axis='y', labelsize=7)
-                
-                self.fig.tight_layout()
-                self.canvas.draw()
+                if stats:
+                    # Crear gráfico de barras simple
+                    estadisticas = ['Media', 'Mediana', 'Std', 'Min', 'Max']
+                    valores = [stats['mean'], stats['median'], stats['std'], stats['min'], stats['max']]
+                    
+                    bars = self.ax.bar(estadisticas, valores, color='steelblue', alpha=0.8)
+                    
+                    # Línea de referencia (si está habilitada)
+                    if self.show_reference_var.get():
+                        ref_value = self.get_reference_value_in_current_units()
+                        unit_symbol = self.y_unit_factors[self.y_unit_var.get()][1]
+                        self.ax.axhline(y=ref_value, color='red', linestyle='--', linewidth=1.5, 
+                                       label=f'Referencia ({ref_value:.1f} {unit_symbol})')
+                        self.ax.legend(fontsize=8)
+                    
+                    self.ax.set_title(f'Vista Previa: {col[:20]}...', fontsize=9)
+                    self.ax.set_ylabel(self.get_unit_label(), fontsize=8)
+                    self.ax.tick_params(axis='x', rotation=45, labelsize=7)
+                    self.ax.tick_params(axis='y', labelsize=7)
+                    
+                    self.fig.tight_layout()
+                    self.canvas.draw()
                 
         except Exception as e:
             self.log_message(f"Error en vista previa: {str(e)}")
     
     def generate_analysis(self):
-        """Generar análisis estadístico completo"""
+        """Generar análisis estadístico completo en segundo plano"""
         if self.df is None:
             messagebox.showwarning("Advertencia", "Primero procese los datos")
             return
@@ -570,230 +695,107 @@ class StatisticalAnalyzer:
             messagebox.showwarning("Advertencia", "Seleccione una carpeta de salida")
             return
         
-        selected_indices = self.columns_listbox.curselection()
+        # Labels editados cuya espera todavía no terminó
+        self.labels_editor.flush()
+        selected_indices = self.columns_list.selected_positions()
         if not selected_indices:
             messagebox.showwarning("Advertencia", "Seleccione al menos una columna")
             return
         
+        if self.is_busy():
+            messagebox.showwarning("Advertencia", "Hay una tarea en curso")
+            return
+        
+        # Las variables de Tk se leen aquí; el hilo de trabajo solo usa esta copia
+        settings = self.get_analysis_settings([self.df.columns[i] for i in selected_indices])
+        self.analysis_button.config(state="disabled")
+        self.run_in_background(
+            lambda: run_statistical_analysis(
+                settings, self.log_message,
+                lambda done, total, start: self.call_in_gui(self.report_progress, done, total, start),
+                self.cancel_event
+            ),
+            self.on_analysis_finished,
+            self.on_analysis_error
+        )
+    
+    def get_analysis_settings(self, selected_columns):
+        """Copiar la configuración de la GUI en un diccionario independiente de Tk"""
+        # Obtener configuración
         try:
-            # Crear carpeta de salida específica
-            if self.timestamp_folder_var.get():
-                timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-                analysis_folder = os.path.join(self.output_folder, f"analisis_estadistico_{timestamp}")
-            else:
-                analysis_folder = os.path.join(self.output_folder, "analisis_estadistico")
-            
-            os.makedirs(analysis_folder, exist_ok=True)
-            
-            self.log_message(f"Iniciando análisis en: {analysis_folder}")
-            
-            # Limpiar imágenes anteriores
-            self.clean_previous_images(analysis_folder)
-            
-            # Obtener configuración
+            font_size = int(self.font_size_var.get())
+            dpi_value = int(self.dpi_var.get())
+            alpha_value = float(self.alpha_var.get())
+        except ValueError:
+            font_size = 10
+            dpi_value = 300
+            alpha_value = 0.8
+        
+        try:
+            workers = max(int(self.workers_var.get()), 1)
+        except ValueError:
+            workers = 1
+        
+        bootstrap = None
+        if self.bootstrap_var.get():
             try:
-                font_size = int(self.font_size_var.get())
-                dpi_value = int(self.dpi_var.get())
-                alpha_value = float(self.alpha_var.get())
+                bootstrap = {'resamples': max(int(self.bootstrap_resamples_var.get()), 1),
+                             'seed': int(self.bootstrap_seed_var.get())}
             except ValueError:
-                font_size = 10
-                dpi_value = 300
-                alpha_value = 0.8
-            
-            # Actualizar configuración matplotlib
-            mpl.rcParams['font.size'] = font_size
-            
-            # Generar gráficos para columnas seleccionadas
-            selected_columns = [self.df.columns[i] for i in selected_indices]
-            
-            total_graphs = 0
-            graph_types = []
-            
-            if self.barras_var.get():
-                graph_types.append('barras')
-            if self.boxplot_var.get():
-                graph_types.append('boxplot')
-            if self.histogram_var.get():
-                graph_types.append('histograma')
-            
-            total_graphs = len(selected_columns) * len(graph_types)
-            
-            self.log_message(f"Generando {total_graphs} gráficos para {len(selected_columns)} columnas...")
-            
-            progress = 0
-            all_statistics = {}
-            
-            for graph_type in graph_types:
-                type_statistics = {}
-                
-                for col in selected_columns:
-                    progress += 1
-                    self.log_message(f"[{progress}/{total_graphs}] Generando {graph_type}: {col[:30]}...")
-                    
-                    stats = self.generate_statistical_chart(
-                        self.df, col, graph_type, analysis_folder, dpi_value, alpha_value
-                    )
-                    
-                    if stats:
-                        type_statistics[col] = stats
-                
-                all_statistics[graph_type] = type_statistics
-            
-            # Generar resúmenes CSV si está habilitado
-            if self.create_summary_var.get():
-                self.generate_summary_reports(all_statistics, analysis_folder)
-            
-            self.log_message(f"✅ Análisis completado: {analysis_folder}")
-            messagebox.showinfo("Éxito", f"Análisis estadístico completado.\n{total_graphs} gráficos generados.")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error durante el análisis:\n{str(e)}")
-            self.log_message(f"❌ Error en análisis: {str(e)}")
-    
-    def clean_previous_images(self, folder_path):
-        """Limpiar imágenes anteriores"""
-        for ext in ['*.png', '*.pdf', '*.svg', '*.jpg']:
-            for file_path in glob.glob(os.path.join(folder_path, ext)):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    self.log_message(f"No se pudo eliminar {file_path}: {e}")
+                bootstrap = {'resamples': 1000, 'seed': 0}
+        
+        graph_types = []
+        if self.barras_var.get():
+            graph_types.append('barras')
+        if self.boxplot_var.get():
+            graph_types.append('boxplot')
+        if self.histogram_var.get():
+            graph_types.append('histograma')
+        
+        factor, unit_symbol = self.y_unit_factors.get(self.y_unit_var.get(), (1, ''))
+        
+        return {
+            'df': None if self.streaming_file else self.df,
+            'data_file': self.data_file,
+            'incremental': self.incremental_var.get(),
+            'all_columns': list(self.df.columns),
+            'columns': selected_columns,
+            'graph_types': graph_types,
+            'factor': factor,
+            'workers': workers,
+            'output_folder': self.output_folder,
+            'timestamp_folder': self.timestamp_folder_var.get(),
+            'create_summary': self.create_summary_var.get(),
+            'bootstrap': bootstrap,
+            'chart_options': {
+                'dpi': dpi_value,
+                'alpha': alpha_value,
+                'font_size': font_size,
+                'image_format': self.image_format_var.get(),
+                'unit_symbol': unit_symbol,
+                'unit_label': self.get_unit_label(),
+                'show_percentiles': self.show_percentiles_var.get(),
+                'show_reference': self.show_reference_var.get(),
+                'reference_value': self.get_reference_value_in_current_units(),
+                'show_outliers': self.show_outliers_var.get(),
+                'show_confidence': self.show_confidence_var.get(),
+            },
+        }
     
-    def generate_statistical_chart(self, df, column, chart_type, output_folder, dpi_value, alpha_value):
-        """Generar gráfico estadístico para una columna"""
-        try:
-            # Obtener datos originales en voltios
-            data = df[column].dropna()
-            if len(data) == 0:
-                self.log_message(f"⚠️  Columna '{column}' sin datos válidos")
-                return None
-            
-            # Aplicar conversión de unidades
-            converted_data = self.apply_unit_conversion(data)
-            
-            # Calcular estadísticas
-            stats = {
-                'mean': np.mean(converted_data),
-                'median': np.median(converted_data),
-                'std': np.std(converted_data),
-                'min': np.min(converted_data),
-                'max': np.max(converted_data),
-                'count': len(converted_data)
-            }
-            
-            # Agregar estadísticas adicionales si están habilitadas
-            if self.show_percentiles_var.get():
-                stats['25%'] = np.percentile(converted_data, 25)
-                stats['75%'] = np.percentile(converted_data, 75)
-            
-            # Crear figura con tamaño específico
-            plt.figure(figsize=(7.54/2.54, 7.09/2.54))
-            
-            # Obtener etiqueta de unidad
-            unit_label = self.get_unit_label()
-            
-            if chart_type == 'barras':
-                estadisticas = ['Media', 'Mediana', 'Std', 'Min', 'Max']
-                valores = [stats['mean'], stats['median'], stats['std'], stats['min'], stats['max']]
-                
-                if self.show_percentiles_var.get():
-                    estadisticas.extend(['Q1', 'Q3'])
-                    valores.extend([stats['25%'], stats['75%']])
-                
-                bars = plt.bar(estadisticas, valores, color='steelblue', alpha=alpha_value, edgecolor='black')
-                
-                # Línea de referencia (si está habilitada)
-                if self.show_reference_var.get():
-                    ref_value = self.get_reference_value_in_current_units()
-                    unit_symbol = self.y_unit_factors[self.y_unit_var.get()][1]
-                    plt.axhline(y=ref_value, color='red', linestyle='--', linewidth=2, 
-                               label=f'Vp Admitido ({ref_value:.1f} {unit_symbol})')
-                    plt.legend(fontsize=8)
-                
-                # Valores en las barras
-                for bar, valor in zip(bars, valores):
-                    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + abs(valor)*0.01, 
-                            f'{valor:.1f}', ha='center', va='bottom', fontsize=8)
-                
-                plt.title(f'Estadísticas: {column[:25]}...' if len(column) > 25 else f'Estadísticas: {column}')
-                plt.ylabel(unit_label)
-                plt.xticks(rotation=45)
-                
-            elif chart_type == 'boxplot':
-                if stats['std'] < 1e-6:
-                    plt.text(0.5, 0.5, f'Valor Constante:\n{stats["mean"]:.1f} {self.y_unit_factors[self.y_unit_var.get()][1]}', 
-                            ha='center', va='center', transform=plt.gca().transAxes, fontsize=10)
-                else:
-                    box_plot = plt.boxplot(converted_data, patch_artist=True, 
-                                          boxprops=dict(facecolor='lightblue', alpha=alpha_value))
-                    
-                    # Configurar outliers si está habilitado
-                    if not self.show_outliers_var.get():
-                        for outlier in box_plot['fliers']:
-                            outlier.set_visible(False)
-                
-                plt.title(f'Boxplot: {column[:25]}...' if len(column) > 25 else f'Boxplot: {column}')
-                plt.ylabel(unit_label)
-                plt.xticks([1], [column.split('@')[0] if '@' in column else column[:10]])
-                
-            elif chart_type == 'histograma':
-                if stats['std'] < 1e-6:
-                    plt.text(0.5, 0.5, f'Valor Constante:\n{stats["mean"]:.1f} {self.y_unit_factors[self.y_unit_var.get()][1]}', 
-                            ha='center', va='center', transform=plt.gca().transAxes, fontsize=10)
-                else:
-                    plt.hist(converted_data, bins=20, color='lightgreen', alpha=alpha_value, edgecolor='black')
-                    plt.axvline(stats['mean'], color='red', linestyle='--', 
-                               label=f'Media: {stats["mean"]:.1f} {self.y_unit_factors[self.y_unit_var.get()][1]}')
-                    plt.axvline(stats['median'], color='blue', linestyle='--', 
-                               label=f'Mediana: {stats["median"]:.1f} {self.y_unit_factors[self.y_unit_var.get()][1]}')
-                    
-                    # Añadir intervalos de confianza si está habilitado
-                    if self.show_confidence_var.get():
-                        ci_lower = stats['mean'] - 1.96 * stats['std'] / np.sqrt(stats['count'])
-                        ci_upper = stats['mean'] + 1.96 * stats['std'] / np.sqrt(stats['count'])
-                        plt.axvline(ci_lower, color='orange', linestyle=':', alpha=0.7)
-                        plt.axvline(ci_upper, color='orange', linestyle=':', alpha=0.7)
-                    
-                    plt.legend(fontsize=8)
-                
-                plt.title(f'Histograma: {column[:25]}...' if len(column) > 25 else f'Histograma: {column}')
-                plt.xlabel(unit_label)
-                plt.ylabel('Frecuencia')
-            
-            plt.tight_layout()
-            
-            # Guardar imagen
-            safe_filename = column.replace('@', '_').replace('/', '_').replace(' ', '_').replace(':', '_')
-            image_format = self.image_format_var.get()
-            unit_suffix = self.y_unit_factors[self.y_unit_var.get()][1]
-            file_path = os.path.join(output_folder, f'stats_{chart_type}_{safe_filename}_{unit_suffix}.{image_format}')
-            
-            plt.savefig(file_path, dpi=dpi_value, bbox_inches='tight', format=image_format)
-            plt.close()  # Importante: cerrar para liberar memoria
-            
-            return stats
-            
-        except Exception as e:
-            self.log_message(f"❌ Error generando {chart_type} para {column}: {str(e)}")
-            plt.close()  # Asegurar que se cierre en caso de error
-            return None
+    def on_analysis_finished(self, result):
+        """Informar el resultado del análisis (hilo de Tk)"""
+        self.finish_background_task()
+        analysis_folder, n_rendered, cancelled = result
+        if cancelled:
+            self.log_message(f"⚠️ Análisis cancelado: {n_rendered} gráficos generados en {analysis_folder}")
+            return
+        self.log_message(f"✅ Análisis completado: {analysis_folder}")
+        messagebox.showinfo("Éxito", f"Análisis estadístico completado.\n{n_rendered} gráficos generados.")
     
-    def generate_summary_reports(self, all_statistics, output_folder):
-        """Generar reportes resumen en CSV"""
-        try:
-            unit_suffix = self.y_unit_factors[self.y_unit_var.get()][1]
-            
-            for graph_type, statistics in all_statistics.items():
-                if statistics:
-                    df_stats = pd.DataFrame(statistics).T
-                    csv_file = os.path.join(output_folder, f'resumen_estadisticas_{graph_type}_{unit_suffix}.csv')
-                    df_stats.to_csv(csv_file, index=True)
-                    self.log_message(f"📊 Resumen guardado: resumen_estadisticas_{graph_type}_{unit_suffix}.csv")
-            
-            self.log_message("📈 Todos los resúmenes CSV generados")
-            
-        except Exception as e:
-            self.log_message(f"❌ Error generando resúmenes: {str(e)}")
+    def on_analysis_error(self, error):
+        self.finish_background_task()
+        messagebox.showerror("Error", f"Error durante el análisis:\n{str(error)}")
+        self.log_message(f"❌ Error en análisis: {str(error)}")
     
     def open_output_folder(self):
         """Abrir carpeta de salida en el explorador"""
@@ -0,0 +1,98 @@
+"""Gráficos de señales por lotes sin interfaz gráfica
+
+Genera con el backend Agg los mismos gráficos que "Guardar Gráfico" de
+GraphGen para muchos archivos TXT de EMTP, sin importar tkinter. La
+configuración es un JSON como el que exporta "Guardar Configuración (lotes)";
+con una lista "figures" se generan varios gráficos por archivo (cada uno
+hereda los campos de nivel superior).
+
+Ejemplos:
+    python WaveformBatch.py casos/ --spec grafico.json -o apendice
+    python WaveformBatch.py "casos/*.txt" --spec figuras.json --workers 8 --format pdf
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from emtp_core.figures import output_stems, plot_spec, render_waveform_batch
+
+def load_figure_specs(spec_path, overrides):
+    """Lista de configuraciones de gráfico a partir del JSON (una o varias por archivo)"""
+    spec = {}
+    if spec_path:
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+
+    figures = spec.pop('figures', None) or [{}]
+    return [plot_spec({**spec, **figure, **overrides}) for figure in figures]
+
+def find_waveform_files(inputs):
+    """Archivos TXT a partir de carpetas, archivos o patrones glob"""
+    files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, '*.txt'))))
+        else:
+            files.extend(sorted(glob.glob(pattern)))
+    return list(dict.fromkeys(files))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help="Carpetas, archivos TXT o patrones glob")
+    parser.add_argument('-s', '--spec', help="Archivo JSON con la configuración de los gráficos")
+    parser.add_argument('-o', '--output', default='graficos', help="Carpeta de salida")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="Archivos procesados en paralelo")
+    parser.add_argument('-f', '--format', choices=['png', 'pdf', 'svg', 'jpg'], help="Formato de imagen")
+    parser.add_argument('--dpi', type=int, help="Resolución de las imágenes")
+    parser.add_argument('--no-cache', action='store_true', help="No usar la caché binaria de columnas")
+    parser.add_argument('--float32', action='store_true',
+                        help="Guardar las señales en float32 (mitad de memoria por archivo)")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.format:
+        overrides['image_format'] = args.format
+    if args.dpi:
+        overrides['dpi'] = args.dpi
+    figures = load_figure_specs(args.spec, overrides)
+
+    files = find_waveform_files(args.inputs)
+    if not files:
+        print("No se encontraron archivos de señales")
+        return 1
+
+    # Archivos con el mismo nombre en carpetas distintas no deben pisarse las imágenes
+    stems = output_stems(files)
+    if len(set(stems)) < len(stems):
+        print("Hay archivos que producirían imágenes con el mismo nombre; renombrarlos o procesarlos por separado")
+        return 1
+
+    os.makedirs(args.output, exist_ok=True)
+    tasks = [{'file_path': file_path, 'figures': figures, 'output_folder': args.output, 'output_stem': stem,
+              'use_cache': not args.no_cache, 'float32': args.float32} for file_path, stem in zip(files, stems)]
+    print(f"Generando {len(files) * len(figures)} gráficos de {len(files)} archivos "
+          f"con {args.workers} proceso(s)...")
+
+    failures = 0
+    start = time.perf_counter()
+    for done, (task, results, error) in enumerate(render_waveform_batch(tasks, args.workers), 1):
+        if error is not None:
+            failures += len(figures)
+            print(f"[{done}/{len(tasks)}] ❌ {task['file_path']}: {error}")
+            continue
+        for output_path, figure_error in results:
+            if figure_error is not None:
+                failures += 1
+                print(f"[{done}/{len(tasks)}] ❌ {output_path}: {figure_error}")
+            else:
+                print(f"[{done}/{len(tasks)}] ✅ {output_path}")
+
+    print(f"Terminado en {time.perf_counter() - start:.1f} s ({failures} con errores)")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,660 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+def make_stats_file(file_path, shots, columns, seed=0):
+    """Generar un archivo de estudio estadístico sintético (pares tiempo/voltaje)"""
+    rng = np.random.default_rng(seed)
+    data = np.empty((shots, columns))
+    data[:, 0::2] = np.linspace(0, 0.02, (columns + 1) // 2)
+    data[:, 1::2] = rng.normal(5e5, 5e4, (shots, columns // 2))
+    np.savetxt(file_path, data, fmt='%15.8E')
+
+def make_waveform_file(file_path, samples, signals, seed=0):
+    """Generar un TXT de EMTP sintético (tiempo + señales, headers en dos líneas)"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(samples) * 1e-6
+    phases = rng.uniform(0, 2 * np.pi, signals)
+    data = np.column_stack([t] + [1e5 * np.sin(2 * np.pi * 60 * t + phase) for phase in phases])
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('\t'.join(['Time'] + [f'v:N{i}' for i in range(signals)]) + '\n')
+        f.write('\t'.join(['(s)'] + ['Voltage (V)'] * signals) + '\n')
+        np.savetxt(f, data, fmt='%.6E', delimiter='\t')
+
+def timed(function, repeat=3):
+    """Mejor tiempo de varias ejecuciones y el último resultado"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def bench_parser(args):
+    """np.loadtxt frente a parse_float_matrix"""
+    from emtp_core.parsing import parse_float_matrix
+    
+    file_path = args.file
+    if file_path is None:
+        file_path = os.path.join(tempfile.gettempdir(), f'emtp_bench_{args.shots}x{args.columns}.txt')
+        if not os.path.exists(file_path):
+            make_stats_file(file_path, args.shots, args.columns)
+    
+    size_mb = os.path.getsize(file_path) / 1e6
+    print(f"Archivo: {file_path} ({size_mb:.1f} MB)")
+    
+    t_loadtxt, reference = timed(lambda: np.loadtxt(file_path), args.repeat)
+    print(f"np.loadtxt:            {t_loadtxt:8.3f} s")
+    
+    t_parallel, result = timed(lambda: parse_float_matrix(file_path, workers=args.workers), args.repeat)
+    print(f"parse_float_matrix:    {t_parallel:8.3f} s  (x{t_loadtxt / t_parallel:.2f})")
+    
+    same = result.shape == reference.shape and np.array_equal(result, reference)
+    print(f"Misma forma y valores: {same} {result.shape}")
+
+def bench_figures(args):
+    """Una figura pyplot nueva por gráfico frente a render_waveform_batch"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from emtp_core.figures import plot_spec, render_waveform_batch
+    from emtp_core.waveform import load_signal_file
+    
+    folder = os.path.join(tempfile.gettempdir(), f'emtp_bench_figures_{args.samples}')
+    os.makedirs(folder, exist_ok=True)
+    files = []
+    for i in range(args.files):
+        file_path = os.path.join(folder, f'caso{i}.txt')
+        if not os.path.exists(file_path):
+            make_waveform_file(file_path, args.samples, 3, seed=i)
+        files.append(file_path)
+    output_folder = os.path.join(folder, 'salida')
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"{args.files} archivos de {args.samples} muestras, dpi={args.dpi}")
+    
+    def baseline():
+        # Como "Guardar Gráfico": figura pyplot nueva por gráfico
+        for file_path in files:
+            df = load_signal_file(file_path)
+            fig, ax = plt.subplots(figsize=(7.54 * 0.393701, 7.09 * 0.393701))
+            for header in df.columns[1:]:
+                ax.plot(df[df.columns[0]], df[header], linewidth=1.5, alpha=0.8, label=header)
+            ax.legend(fontsize=7)
+            fig.tight_layout(pad=0.5)
+            fig.savefig(os.path.join(output_folder, 'base.png'), dpi=args.dpi, bbox_inches='tight')
+            plt.close(fig)
+    
+    spec = plot_spec(dpi=args.dpi)
+    tasks = [{'file_path': f, 'figures': [spec], 'output_folder': output_folder, 'use_cache': False}
+             for f in files]
+    
+    t_baseline, _ = timed(baseline, args.repeat)
+    print(f"pyplot por gráfico:       {t_baseline:8.3f} s")
+    
+    t_batch, _ = timed(lambda: list(render_waveform_batch(tasks, args.workers)), args.repeat)
+    print(f"render_waveform_batch:    {t_batch:8.3f} s  (x{t_baseline / t_batch:.2f}, {args.workers} proceso(s))")
+
+def bench_streaming(args):
+    """Estadísticas en memoria frente a la lectura por bloques (tiempo, memoria pico, error)"""
+    import tracemalloc
+    from emtp_core.analysis import read_voltage_data, voltage_columns
+    from emtp_core.parsing import count_columns
+    from emtp_core.stats import compute_column_statistics
+    from emtp_core.streaming import stream_file_statistics
+    
+    file_path = args.file
+    if file_path is None:
+        file_path = os.path.join(tempfile.gettempdir(), f'emtp_bench_{args.shots}x{args.columns}.txt')
+        if not os.path.exists(file_path):
+            make_stats_file(file_path, args.shots, args.columns)
+    print(f"Archivo: {file_path} ({os.path.getsize(file_path) / 1e6:.1f} MB)")
+    
+    usecols = voltage_columns(count_columns(file_path))
+    columns = [str(i) for i in range(len(usecols))]
+    
+    def measure(function):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak, result
+    
+    def in_memory():
+        data, _, _ = read_voltage_data(file_path, workers=1)
+        return data, compute_column_statistics(data, columns, include_percentiles=True)
+    
+    t_memory, peak_memory, (data, reference) = measure(in_memory)
+    print(f"En memoria:  {t_memory:8.3f} s  pico {peak_memory / 1e6:8.1f} MB")
+    
+    t_stream, peak_stream, streaming = measure(
+        lambda: stream_file_statistics(file_path, usecols, chunk_bytes=args.chunk_mb * 1024 * 1024)[0])
+    print(f"Por bloques: {t_stream:8.3f} s  pico {peak_stream / 1e6:8.1f} MB")
+    
+    # Error de rango de los cuantiles aproximados (fracción de las muestras)
+    result = streaming.statistics(columns, include_percentiles=True)
+    sorted_data = np.sort(data, axis=0)
+    worst = 0.0
+    for key, q in [('median', 0.5), ('25%', 0.25), ('75%', 0.75)]:
+        for i, column in enumerate(columns):
+            rank = np.searchsorted(sorted_data[:, i], result[column][key]) / len(sorted_data)
+            worst = max(worst, abs(rank - q))
+    exact = all(np.isclose(result[c][k], reference[c][k], rtol=1e-9)
+                for c in columns for k in ('mean', 'std', 'min', 'max', 'count'))
+    print(f"Media/std/min/max exactos: {exact}; error de rango máximo en cuantiles: {worst:.4%}")
+
+def bench_incremental(args):
+    """Análisis completo frente a la actualización incremental tras agregar disparos"""
+    import shutil
+    from StatsBatch import load_config, study_settings
+    from emtp_core.analysis import run_statistical_analysis
+    
+    folder = tempfile.mkdtemp(prefix='emtp_incremental_')
+    try:
+        file_path = os.path.join(folder, 'estudio.txt')
+        make_stats_file(file_path, args.shots, args.columns)
+        all_columns = [f'V{i}' for i in range(args.columns // 2)]
+        config = load_config(None)
+        config['incremental'] = True
+        settings = study_settings(None, config, os.path.join(folder, 'salida'), all_columns, file_path)
+        log = lambda message: None
+        
+        elapsed, (_, n_rendered, _) = timed(lambda: run_statistical_analysis(settings, log), 1)
+        print(f"Análisis inicial ({args.shots} disparos):  {elapsed:8.3f} s  ({n_rendered} gráficos)")
+        
+        new_path = os.path.join(folder, 'nuevos.txt')
+        make_stats_file(new_path, args.new_shots, args.columns, seed=1)
+        with open(file_path, 'ab') as f, open(new_path, 'rb') as new:
+            f.write(new.read())
+        
+        elapsed, (_, n_rendered, _) = timed(lambda: run_statistical_analysis(settings, log), 1)
+        print(f"Incremental (+{args.new_shots} disparos):     {elapsed:8.3f} s  ({n_rendered} gráficos regenerados)")
+        
+        settings['incremental'] = False
+        elapsed, (_, n_rendered, _) = timed(lambda: run_statistical_analysis(settings, log), 1)
+        print(f"Recalcular todo:                 {elapsed:8.3f} s  ({n_rendered} gráficos)")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+def bench_scaling(args):
+    """Memoria pico de escalar unidades en cada redibujado (en columnas completas)"""
+    import tracemalloc
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from emtp_core.figures import FIGURE_SIZE, draw_waveform, plot_spec
+    from emtp_core.stats import column_chart_summary
+    from emtp_core.waveform import MinMaxPyramid
+    
+    rng = np.random.default_rng(0)
+    time_values = np.arange(args.samples) * 1e-6
+    signals = [rng.normal(0, 1e5, args.samples) for _ in range(args.signals)]
+    column_bytes = time_values.nbytes
+    pyramids = [MinMaxPyramid(y) for y in signals]
+    n_bins = int(FIGURE_SIZE[0] * 100)
+    x_factor, y_factor = 1e3, 1e-3
+    print(f"{args.samples:,} muestras x {args.signals} señales (columna de {column_bytes / 1e6:.0f} MB)")
+    
+    def peak_columns(function):
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak / column_bytes
+    
+    def scale_full_series():
+        scaled_time = time_values * x_factor
+        for y in signals:
+            y * y_factor
+    
+    def scale_envelope():
+        for pyramid, y in zip(pyramids, signals):
+            sample_idx = pyramid.query(0, len(y), n_bins)
+            time_values[sample_idx] * x_factor, y[sample_idx] * y_factor
+    
+    import pandas as pd
+    # Columnas contiguas (orden Fortran), como las deja load_signal_file
+    data = np.asfortranarray(np.column_stack([time_values] + signals))
+    df = pd.DataFrame(data, columns=['t'] + [f's{i}' for i in range(args.signals)], copy=False)
+    fig = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(fig)
+    spec = plot_spec(x_scale='mili', y_scale='kilo', legend=False)
+    
+    def redraw_figure():
+        fig.clear()
+        draw_waveform(fig.add_subplot(1, 1, 1), df, spec, n_bins)
+        fig.canvas.draw()
+    
+    def chart_summaries():
+        for y in signals:
+            column_chart_summary(y, y_factor)
+    
+    redraw_figure()
+    print(f"{'Escalar series completas (antes)':<38}{peak_columns(scale_full_series):8.2f} columnas")
+    print(f"{'Envolvente y luego escalar':<38}{peak_columns(scale_envelope):8.2f} columnas")
+    print(f"{'Redibujado completo (draw_waveform)':<38}{peak_columns(redraw_figure):8.2f} columnas")
+    print(f"{'Resumen de histograma/boxplot':<38}{peak_columns(chart_summaries):8.2f} columnas "
+          f"(copia temporal de np.percentile, sin copia por unidad)")
+
+def bench_overlay(args):
+    """Superposición de muchos casos: envolventes por ventana y alineación en la grilla común"""
+    from emtp_core.overlay import WaveformCase, WaveformOverlay
+    from emtp_core.waveform import signal_frame
+    
+    rng = np.random.default_rng(0)
+    dtype = np.float32 if args.float32 else np.float64
+    overlay = WaveformOverlay()
+    for i in range(args.cases):
+        # Pasos de tiempo distintos en cada caso
+        time_values = np.arange(args.samples) * (1e-6 * (1 + 0.05 * i))
+        signal = (np.sin(2 * np.pi * 50 * time_values) * 1e5 + rng.normal(0, 1e3, args.samples)).astype(dtype)
+        df = signal_frame(['Time', 'V'], signal[:, None], time_values)
+        overlay.add(WaveformCase(f'caso_{i}.txt', df))
+    cases = list(overlay.cases.values())
+    span = float(cases[0].time[-1])
+    n_bins = 300
+    print(f"{args.cases} casos x {args.samples:,} muestras ({overlay.nbytes / 1e6:.0f} MB, señales {np.dtype(dtype).name})")
+    
+    def draw(t_start=None, t_stop=None):
+        for case in cases:
+            case.envelope('V', n_bins, t_start, t_stop)
+    
+    def align(t_start=None, t_stop=None):
+        signals = [(case, 'V') for case in cases]
+        overlay._aligned_key = None
+        return overlay.aligned(signals, t_start, t_stop)
+    
+    start = time.perf_counter()
+    draw()
+    print(f"{'Primer dibujo (índices min/max)':<40}{time.perf_counter() - start:8.3f} s")
+    print(f"{'Redibujado ventana completa':<40}{timed(draw)[0]:8.3f} s")
+    print(f"{'Redibujado ventana al 1 %':<40}{timed(lambda: draw(0.5 * span, 0.51 * span))[0]:8.3f} s")
+    elapsed, (grid, _) = timed(lambda: align(0.5 * span, 0.51 * span))
+    print(f"{'Alineación ventana al 1 %':<40}{elapsed:8.3f} s ({len(grid):,} puntos)")
+    elapsed, (grid, _) = timed(lambda: align(), repeat=1)
+    print(f"{'Alineación ventana completa':<40}{elapsed:8.3f} s ({len(grid):,} puntos)")
+
+def bench_metrics(args):
+    """Métricas de todas las señales con búsquedas en el índice min/max frente a pasadas completas"""
+    from emtp_core.metrics import metrics_table
+    from emtp_core.waveform import MinMaxPyramid
+    
+    rng = np.random.default_rng(0)
+    dtype = np.float64 if args.float64 else np.float32
+    time_values = np.arange(args.samples) * 1e-6
+    # Impulsos amortiguados con amplitud, retardo y frecuencia distintos en cada señal
+    signals = []
+    for i in range(args.signals):
+        delay = rng.uniform(0, 0.2) * time_values[-1]
+        shifted = np.maximum(time_values - delay, 0)
+        y = rng.uniform(1e5, 5e5) * np.exp(-shifted / 2e-2) * np.sin(2 * np.pi * rng.uniform(50, 500) * shifted)
+        signals.append(y.astype(dtype))
+    data_bytes = sum(y.nbytes for y in signals)
+    print(f"{args.signals} señales x {args.samples:,} muestras ({data_bytes / 1e9:.1f} GB, {np.dtype(dtype).name})")
+    
+    start = time.perf_counter()
+    pyramids = [MinMaxPyramid(y) for y in signals]
+    print(f"{'Índices min/max (al cargar el archivo)':<40}{time.perf_counter() - start:8.2f} s")
+    
+    options = dict(threshold=1e5, band=1e4, base=4e5)
+    named = [(f's{i}', time_values, y, pyramid) for i, (y, pyramid) in enumerate(zip(signals, pyramids))]
+    elapsed, table = timed(lambda: metrics_table(named, **options))
+    print(f"{'Métricas con el índice (todas)':<40}{elapsed:8.3f} s")
+    elapsed, _ = timed(lambda: metrics_table(named, 0.3 * time_values[-1], 0.6 * time_values[-1], **options))
+    print(f"{'Métricas en una ventana (todas)':<40}{elapsed:8.3f} s")
+    
+    def direct(y):
+        # Pasadas completas equivalentes (pico, cruce, asentamiento), sin interpolar
+        magnitude = np.abs(y)
+        peak = int(np.argmax(magnitude))
+        above = np.flatnonzero(magnitude > options['threshold'])
+        outside = np.flatnonzero(magnitude > options['band'])
+        return peak, above[:1], outside[-1:]
+    
+    sample = signals[:min(args.signals, 20)]
+    elapsed, _ = timed(lambda: [direct(y) for y in sample], repeat=1)
+    print(f"{'Pasadas completas (estimado, todas)':<40}{elapsed * args.signals / len(sample):8.3f} s")
+    
+    # Comprobación contra las pasadas completas
+    mismatches = 0
+    for (name, _, y, _), row in zip(named[:len(sample)], table.itertuples(index=False)):
+        peak, above, outside = direct(y)
+        mismatches += abs(row.pico) != abs(float(y[peak]))
+        mismatches += len(above) and not time_values[above[0] - 1] <= row.cruce_umbral <= time_values[above[0]]
+    print(f"Diferencias con las pasadas completas: {mismatches}")
+
+def bench_spectrum(args):
+    """FFT, Welch y espectrograma de un registro largo: tiempo, memoria pico y caché"""
+    import tracemalloc
+    from emtp_core.spectrum import SpectrumCache, compute_spectra
+    
+    rng = np.random.default_rng(0)
+    step = 1e-6
+    time_values = np.arange(args.samples) * step
+    # 60 Hz con una armónica y un transitorio de alta frecuencia, más ruido
+    columns = {}
+    for i in range(args.signals):
+        y = 3e5 * np.sin(2 * np.pi * 60 * time_values) + 2e4 * np.sin(2 * np.pi * 300 * time_values)
+        y += 5e4 * np.exp(-time_values / 5e-3) * np.sin(2 * np.pi * rng.uniform(2e3, 2e4) * time_values)
+        y += rng.normal(0, 1e3, args.samples)
+        columns[f's{i}'] = y.astype(np.float32)
+    data_bytes = sum(y.nbytes for y in columns.values())
+    print(f"{args.signals} señales x {args.samples:,} muestras ({data_bytes / 1e6:.0f} MB, float32)")
+    
+    fft_stop = min(args.samples, 1 << 22)
+    cases = [
+        ('FFT (ventana de 4M muestras)', 'fft', fft_stop, {'window': 'hann'}),
+        ('Welch (segmentos de 4096)', 'welch', args.samples, {'window': 'hann', 'nperseg': 4096, 'overlap': 0.5}),
+        ('Espectrograma (1024, 1000 columnas)', 'spectrogram', args.samples,
+         {'window': 'hann', 'nperseg': 1024, 'overlap': 0.5}),
+    ]
+    cache = SpectrumCache()
+    for label, kind, stop, options in cases:
+        tracemalloc.start()
+        start = time.perf_counter()
+        results = compute_spectra(kind, time_values, columns, 0, stop, cache, **options)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        cached, _ = timed(lambda: compute_spectra(kind, time_values, columns, 0, stop, cache, **options))
+        print(f"{label:<40}{elapsed:8.2f} s  memoria pico {peak / 1e6:6.0f} MB  caché {cached * 1e3:6.2f} ms")
+        
+        if kind == 'fft':
+            # La componente de 60 Hz con su amplitud (menos la pérdida de la ventana fuera de un bin)
+            freqs, values = results['s0']
+            peak = np.argmax(values[1:]) + 1
+            print(f"    máximo en {freqs[peak]:.1f} Hz, amplitud {values[peak]:.4g}")
+    print(f"Resultados en caché: {cache.nbytes / 1e6:.1f} MB")
+
+def bench_expressions(args):
+    """Señales derivadas: evaluación por bloques de la ventana visible y memoria frente a NumPy directo"""
+    import tracemalloc
+    from emtp_core.expressions import DerivedSignal
+    
+    time_values = np.arange(args.samples) * 1e-6
+    columns = {f'V{phase}': (3e5 * np.sin(2 * np.pi * 60 * time_values - k * 2 * np.pi / 3)).astype(np.float32)
+               for k, phase in enumerate('ABC')}
+    names = {name: name for name in columns}
+    column_bytes = columns['VA'].nbytes
+    print(f"3 señales x {args.samples:,} muestras (columna de {column_bytes / 1e6:.0f} MB, float32)")
+    
+    expressions = ['VA - VB', 'abs(VA + VB + VC) / 3', 'sqrt(VA**2 + VB**2 + VC**2)', 'rms(VA - VB, 1/60)']
+    for text in expressions:
+        derived = DerivedSignal(text, names)
+        tracemalloc.start()
+        start = time.perf_counter()
+        derived.evaluate(columns, time_values)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        derived.clear()
+        window, _ = timed(lambda: (derived.clear(), derived.evaluate(columns, time_values, args.samples // 2,
+                                                                     args.samples // 2 + args.samples // 100)))
+        cached, _ = timed(lambda: derived.evaluate(columns, time_values, args.samples // 2,
+                                                   args.samples // 2 + args.samples // 100))
+        print(f"{text:<30}completa {elapsed:6.3f} s ({peak / column_bytes:4.1f} columnas)  "
+              f"ventana 1 % {window * 1e3:7.2f} ms  memorizada {cached * 1e6:5.1f} µs")
+    
+    # Referencia: la misma expresión con NumPy sobre las columnas completas
+    tracemalloc.start()
+    start = time.perf_counter()
+    va, vb, vc = (columns[name] for name in ('VA', 'VB', 'VC'))
+    np.sqrt(va.astype(np.float64) ** 2 + vb.astype(np.float64) ** 2 + vc.astype(np.float64) ** 2)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{'NumPy directo (sqrt, float64)':<30}completa {elapsed:6.3f} s ({peak / column_bytes:4.1f} columnas)")
+
+def bench_windowed(args):
+    """Estadísticas móviles O(n) frente a recorrer cada ventana completa"""
+    import tracemalloc
+    from numpy.lib.stride_tricks import sliding_window_view
+    from emtp_core.windowed import WINDOW_KERNELS, moving_statistic, window_samples
+    
+    rng = np.random.default_rng(0)
+    time_values = np.arange(args.samples) * 1e-6
+    y = (3e5 * np.sin(2 * np.pi * 60 * time_values) + rng.normal(0, 1e3, args.samples)).astype(np.float32)
+    print(f"{args.samples:,} muestras (columna de {y.nbytes / 1e6:.0f} MB, float32)")
+    
+    naive = {
+        'rms': lambda w: np.sqrt(np.mean(w.astype(np.float64) ** 2, axis=1)),
+        'mean': lambda w: np.mean(w, axis=1, dtype=np.float64),
+        'max': lambda w: np.max(w, axis=1),
+        'min': lambda w: np.min(w, axis=1),
+    }
+    for seconds in args.windows:
+        n = window_samples(time_values, seconds)
+        print(f"Ventana {seconds * 1e3:g} ms ({n:,} muestras)")
+        # La muestra de comparación debe contener al menos una ventana completa
+        sample = y[:max(args.check, 2 * n)]
+        for kind, kernel in WINDOW_KERNELS.items():
+            tracemalloc.start()
+            start = time.perf_counter()
+            kernel(y, n)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            visible, _ = timed(lambda: moving_statistic(kind, y, n, args.samples // 2,
+                                                        args.samples // 2 + args.samples // 100))
+            
+            summary = f"    {kind:<6}{elapsed:8.3f} s ({peak / y.nbytes:4.1f} columnas)  ventana 1 % {visible * 1e3:7.2f} ms  "
+            if len(sample) < n:
+                print(f"{summary}comparación omitida (la señal es más corta que la ventana)")
+                continue
+            # Ventanas completas (O(n x ventana)) en una muestra, extrapolado a la señal entera
+            windows = sliding_window_view(sample, n)[:max(len(sample) // n, 1) * 100]
+            direct, expected = timed(lambda: naive[kind](windows), repeat=1)
+            error = np.max(np.abs(kernel(sample, n)[n - 1:n - 1 + len(windows)] - expected)) / np.max(np.abs(expected))
+            print(f"{summary}ventanas completas (estimado) {direct * args.samples / len(windows):8.1f} s  "
+                  f"error relativo {error:.1e}")
+
+def bench_bootstrap(args):
+    """Intervalos bootstrap de U2%, U50% y P(U > referencia) de muchos nodos frente a remuestrear los datos"""
+    import tracemalloc
+    from emtp_core.bootstrap import bootstrap_statistics
+    
+    rng = np.random.default_rng(0)
+    data = rng.normal(5e5, 5e4, (args.shots, args.columns)).astype(np.float32)
+    columns = [f'N{i}' for i in range(args.columns)]
+    threshold = 6e5
+    print(f"{args.columns} nodos x {args.shots} disparos, {args.resamples} remuestreos")
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    statistics = bootstrap_statistics(data, columns, threshold=threshold, resamples=args.resamples, seed=1)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{'Conteos multinomiales por lotes':<40}{elapsed:8.2f} s  memoria pico {peak / 1e6:6.0f} MB")
+    
+    again = bootstrap_statistics(data, columns, threshold=threshold, resamples=args.resamples, seed=1,
+                                 batch_values=args.shots * args.columns * 7)
+    print(f"Mismo resultado con otro tamaño de lote: {all(statistics[c] == again[c] for c in columns)}")
+    
+    # Referencia: remuestrear los valores y calcular percentiles (en una muestra de remuestreos)
+    sample = max(args.resamples // 20, 1)
+    def resample_directly():
+        draw = np.random.default_rng(1)
+        for _ in range(sample):
+            resampled = data[draw.integers(0, args.shots, args.shots)]
+            np.percentile(resampled, [50, 98], axis=0)
+            np.mean(resampled > threshold, axis=0)
+    direct, _ = timed(resample_directly, repeat=1)
+    print(f"{'Remuestreo de los datos (estimado)':<40}{direct * args.resamples / sample:8.2f} s")
+    
+    u2 = np.array([statistics[c]['U2%'] for c in columns])
+    width = np.array([statistics[c]['U2%_ic_sup'] - statistics[c]['U2%_ic_inf'] for c in columns])
+    print(f"U2% medio {u2.mean():.4g} (teórico {5e5 + 2.054 * 5e4:.4g}), ancho medio del intervalo {width.mean():.3g}")
+
+def bench_precision(args):
+    """Reporte de validación de float32 frente a float64 (memoria y error de los resultados)"""
+    from emtp_core.analysis import read_voltage_data
+    from emtp_core.precision import report_frame, statistics_report, waveform_report
+    from emtp_core.waveform import load_signal_file
+    
+    stats_file = args.stats_file
+    if stats_file is None:
+        stats_file = os.path.join(tempfile.gettempdir(), f'emtp_bench_{args.shots}x{args.columns}.txt')
+        if not os.path.exists(stats_file):
+            make_stats_file(stats_file, args.shots, args.columns)
+    waveform_file = args.waveform_file
+    if waveform_file is None:
+        waveform_file = os.path.join(tempfile.gettempdir(), f'emtp_wave_{args.samples}.txt')
+        if not os.path.exists(waveform_file):
+            make_waveform_file(waveform_file, args.samples, 4)
+    
+    data, _, _ = read_voltage_data(stats_file, workers=1)
+    compact, _, _ = read_voltage_data(stats_file, workers=1, dtype=np.float32)
+    print(f"Estadísticas: {stats_file}")
+    print(f"  memoria float64 {data.nbytes / 1e6:8.1f} MB, float32 {compact.nbytes / 1e6:8.1f} MB")
+    stats_report = report_frame(statistics_report(data, [str(i) for i in range(data.shape[1])], 1e-3))
+    
+    df = load_signal_file(waveform_file)
+    compact_df = load_signal_file(waveform_file, dtype=np.float32)
+    print(f"Señales: {waveform_file}")
+    print(f"  memoria float64 {df.memory_usage(index=False).sum() / 1e6:8.1f} MB, "
+          f"float32 {compact_df.memory_usage(index=False).sum() / 1e6:8.1f} MB (tiempo en float64)")
+    signals_report = report_frame(waveform_report(df))
+    
+    for name, report in [('estadísticas', stats_report), ('señales', signals_report)]:
+        summary = report.groupby('estadistico', sort=False)['error_relativo'].max()
+        print(f"Error relativo máximo ({name}):")
+        for key, error in summary.items():
+            print(f"  {key:<16}{error:10.2e}")
+        failed = report[~report['ok']]
+        print(f"  {len(failed)} de {len(report)} valores fuera de tolerancia")
+    
+    if args.csv:
+        import pandas as pd
+        pd.concat([stats_report.assign(tipo='estadisticas'), signals_report.assign(tipo='señales')]).to_csv(
+            args.csv, index=False)
+        print(f"Reporte completo: {args.csv}")
+
+# Módulos cuyo tiempo de importación se mide y dependencias pesadas a vigilar
+IMPORT_MODULES = ['emtp_core.stats', 'emtp_core.parsing', 'emtp_core.waveform', 'emtp_core.analysis',
+                  'emtp_core.figures', 'StatsBatch', 'WaveformBatch', 'GraphGen', 'StatsGraphGen']
+HEAVY_MODULES = ['numpy', 'pandas', 'matplotlib', 'matplotlib.pyplot', 'tkinter']
+
+def bench_imports(args):
+    """Tiempo de importación de cada módulo en un intérprete nuevo"""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(elapsed, ' '.join(m for m in {heavy!r} if m in sys.modules))\n"
+    )
+    root = os.path.dirname(os.path.abspath(__file__))
+    
+    print(f"{'Módulo':<22}{'Tiempo':>10}  Dependencias cargadas")
+    for module in args.modules or IMPORT_MODULES:
+        best = float('inf')
+        loaded = ''
+        for _ in range(args.repeat):
+            result = subprocess.run([sys.executable, '-c', code.format(module=module, heavy=HEAVY_MODULES)],
+                                    cwd=root, capture_output=True, text=True)
+            if result.returncode != 0:
+                loaded = result.stderr.strip().splitlines()[-1]
+                break
+            elapsed, _, loaded = result.stdout.strip().partition(' ')
+            best = min(best, float(elapsed))
+        print(f"{module:<22}{best:>9.3f}s  {loaded}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de EMTPGraphGen")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    parser_bench = subparsers.add_parser('parser', help="Lectura de archivos de datos estadísticos")
+    parser_bench.add_argument('--file', help="Archivo existente (por defecto se genera uno sintético)")
+    parser_bench.add_argument('--shots', type=int, default=20000)
+    parser_bench.add_argument('--columns', type=int, default=400)
+    parser_bench.add_argument('--workers', type=int, default=None)
+    parser_bench.add_argument('--repeat', type=int, default=3)
+    parser_bench.set_defaults(function=bench_parser)
+    
+    parser_bench = subparsers.add_parser('figures', help="Gráficos de señales por lotes")
+    parser_bench.add_argument('--files', type=int, default=50)
+    parser_bench.add_argument('--samples', type=int, default=20000)
+    parser_bench.add_argument('--dpi', type=int, default=150)
+    parser_bench.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser_bench.add_argument('--repeat', type=int, default=1)
+    parser_bench.set_defaults(function=bench_figures)
+    
+    parser_bench = subparsers.add_parser('streaming', help="Estadísticas por bloques con memoria acotada")
+    parser_bench.add_argument('--file', help="Archivo existente (por defecto se genera uno sintético)")
+    parser_bench.add_argument('--shots', type=int, default=100000)
+    parser_bench.add_argument('--columns', type=int, default=40)
+    parser_bench.add_argument('--chunk-mb', type=int, default=8)
+    parser_bench.set_defaults(function=bench_streaming)
+    
+    parser_bench = subparsers.add_parser('incremental', help="Actualización incremental de un estudio")
+    parser_bench.add_argument('--shots', type=int, default=50000)
+    parser_bench.add_argument('--new-shots', type=int, default=1000)
+    parser_bench.add_argument('--columns', type=int, default=40)
+    parser_bench.set_defaults(function=bench_incremental)
+    
+    parser_bench = subparsers.add_parser('scaling', help="Memoria del escalado de unidades por redibujado")
+    parser_bench.add_argument('--samples', type=int, default=5_000_000)
+    parser_bench.add_argument('--signals', type=int, default=3)
+    parser_bench.set_defaults(function=bench_scaling)
+    
+    parser_bench = subparsers.add_parser('overlay', help="Superposición de casos con distinto paso de tiempo")
+    parser_bench.add_argument('--cases', type=int, default=20)
+    parser_bench.add_argument('--samples', type=int, default=1_000_000)
+    parser_bench.add_argument('--float32', action='store_true')
+    parser_bench.set_defaults(function=bench_overlay)
+    
+    parser_bench = subparsers.add_parser('metrics', help="Pico, cruces, subida y asentamiento de muchas señales")
+    parser_bench.add_argument('--signals', type=int, default=500)
+    parser_bench.add_argument('--samples', type=int, default=1_000_000)
+    parser_bench.add_argument('--float64', action='store_true', help="Señales en float64 (por defecto float32)")
+    parser_bench.set_defaults(function=bench_metrics)
+    
+    parser_bench = subparsers.add_parser('spectrum', help="FFT, Welch y espectrograma de registros largos")
+    parser_bench.add_argument('--signals', type=int, default=4)
+    parser_bench.add_argument('--samples', type=int, default=10_000_000)
+    parser_bench.set_defaults(function=bench_spectrum)
+    
+    parser_bench = subparsers.add_parser('expressions', help="Señales derivadas evaluadas por bloques")
+    parser_bench.add_argument('--samples', type=int, default=10_000_000)
+    parser_bench.set_defaults(function=bench_expressions)
+    
+    parser_bench = subparsers.add_parser('windowed', help="Estadísticas móviles (RMS, media, máximo, mínimo)")
+    parser_bench.add_argument('--samples', type=int, default=10_000_000)
+    parser_bench.add_argument('--windows', type=float, nargs='+', default=[1e-4, 1 / 60],
+                              help="Ventanas en segundos (paso de 1 µs)")
+    parser_bench.add_argument('--check', type=int, default=100_000,
+                              help="Muestras comparadas contra el cálculo de cada ventana completa")
+    parser_bench.set_defaults(function=bench_windowed)
+    
+    parser_bench = subparsers.add_parser('bootstrap', help="Intervalos bootstrap y probabilidad de superar la referencia")
+    parser_bench.add_argument('--columns', type=int, default=500)
+    parser_bench.add_argument('--shots', type=int, default=1000)
+    parser_bench.add_argument('--resamples', type=int, default=1000)
+    parser_bench.set_defaults(function=bench_bootstrap)
+    
+    parser_bench = subparsers.add_parser('precision', help="Validación de float32 frente a float64")
+    parser_bench.add_argument('--stats-file', help="Archivo de estudio estadístico (por defecto sintético)")
+    parser_bench.add_argument('--waveform-file', help="TXT de señales de EMTP (por defecto sintético)")
+    parser_bench.add_argument('--shots', type=int, default=20000)
+    parser_bench.add_argument('--columns', type=int, default=40)
+    parser_bench.add_argument('--samples', type=int, default=1_000_000)
+    parser_bench.add_argument('--csv', help="Guardar el reporte completo en CSV")
+    parser_bench.set_defaults(function=bench_precision)
+    
+    parser_bench = subparsers.add_parser('imports', help="Tiempo de importación de los módulos")
+    parser_bench.add_argument('modules', nargs='*', help="Módulos a medir (por defecto todos)")
+    parser_bench.add_argument('--repeat', type=int, default=3)
+    parser_bench.set_defaults(function=bench_imports)
+    
+    args = parser.parse_args()
+    args.function(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import glob
+import hashlib
+import json
+import os
+import time
+
+from .bootstrap import bootstrap_statistics
+from .charts import chart_file_name, render_charts
+from .parsing import count_columns, parse_float_matrix
+from .stats import column_chart_summary, compute_column_statistics
+from .streaming import stream_file_statistics, update_file_statistics
+
+# Factores de escalado de unidades del eje Y (los datos están en voltios)
+UNIT_FACTORS = {
+    'Voltios (V)': (1, 'V'),
+    'Kilovoltios (kV)': (1e-3, 'kV'),
+    'Megavoltios (MV)': (1e-6, 'MV'),
+    'Milivoltios (mV)': (1e3, 'mV'),
+    'time (s)': (1, 's'),
+    'time (ms)': (1e3, 'ms')
+}
+
+CHART_TYPES = ['barras', 'boxplot', 'histograma']
+
+# Estado del modo incremental, guardado junto a los gráficos del análisis
+STATE_FILE_NAME = '.estado_incremental.npz'
+# Fracción del rango por debajo de la cual un cambio no se nota en la imagen
+CHART_RESOLUTION = 1e-3
+
+def reference_in_units(ref_value_kv, unit_name):
+    """Convertir el valor de referencia (en kV) a la unidad seleccionada"""
+    if unit_name == 'Voltios (V)':
+        return ref_value_kv * 1000  # kV a V
+    elif unit_name == 'Kilovoltios (kV)':
+        return ref_value_kv  # kV a kV
+    elif unit_name == 'Megavoltios (MV)':
+        return ref_value_kv / 1000  # kV a MV
+    elif unit_name == 'Milivoltios (mV)':
+        return ref_value_kv * 1000000  # kV a mV
+    else:
+        return ref_value_kv
+
+def read_labels(file_path):
+    """Leer un archivo de labels (cada dos líneas: descripción y label)"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        labels_raw = f.read().strip().split('\n')
+    return [labels_raw[i+1].strip() for i in range(0, len(labels_raw), 2)]
+
+def voltage_columns(n_columns):
+    """Índices de las columnas de voltaje (impares) en un archivo de n_columns columnas"""
+    return list(range(1, n_columns, 2))
+
+def read_voltage_data(file_path, cache=None, workers=None, dtype=None, cancel_event=None):
+    """Leer solo las columnas de voltaje (impares) de un archivo de estudio estadístico
+
+    dtype=np.float32 guarda los datos en la mitad de memoria (las
+    estadísticas se siguen acumulando en float64).
+    Devuelve (datos, número total de columnas del archivo, True si vino de la caché);
+    datos es None si se canceló con cancel_event.
+    """
+    import numpy as np
+    
+    dtype = np.dtype(dtype or np.float64)
+    variant = 'voltajes' if dtype == np.float64 else f'voltajes_{dtype.name}'
+    n_columns = count_columns(file_path)
+
+    if cache is not None:
+        cached = cache.get(file_path, variant=variant)
+        if cached is not None:
+            return cached[0], n_columns, True
+
+    data = parse_float_matrix(file_path, usecols=voltage_columns(n_columns), ndmin=2, workers=workers,
+                              dtype=dtype, cancel_event=cancel_event)
+    if data is not None and cache is not None:
+        cache.put(file_path, data, variant=variant)
+    return data, n_columns, False
+
+def read_voltage_layout(file_path):
+    """Solo la forma del archivo, para leerlo después por bloques
+
+    Devuelve (arreglo sin filas con una columna por voltaje, número total de columnas).
+    """
+    import numpy as np
+    
+    n_columns = count_columns(file_path)
+    return np.empty((0, len(voltage_columns(n_columns)))), n_columns
+
+def build_column_names(labels, custom_labels, n_columns):
+    """Nombres únicos de columna a partir de los labels (personalizados si existen)"""
+    cols = []
+    # Nombres ya usados (búsqueda O(1) con miles de columnas)
+    used = set()
+    for i, label in enumerate(labels):
+        if i < n_columns:
+            # Usar nombre personalizado
+            base_name = custom_labels.get(label, label).strip()
+            if base_name in used:
+                # Si ya existe, agregar índice
+                counter = 2
+                while f"{base_name}_{counter}" in used:
+                    counter += 1
+                name = f"{base_name}_{counter}"
+            else:
+                name = base_name
+            cols.append(name)
+            used.add(name)
+    return cols
+
+def build_study_frame(data, labels, custom_labels=None):
+    """DataFrame de voltajes (en voltios) que envuelve los datos sin copiarlos"""
+    import pandas as pd
+    
+    cols = build_column_names(labels, custom_labels or {}, data.shape[1])
+    return pd.DataFrame(data, columns=cols, copy=False)
+
+def clean_previous_images(folder_path, log=print):
+    """Limpiar imágenes anteriores"""
+    for ext in ['*.png', '*.pdf', '*.svg', '*.jpg']:
+        for file_path in glob.glob(os.path.join(folder_path, ext)):
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                log(f"No se pudo eliminar {file_path}: {e}")
+
+def build_chart_job(column, chart_type, stats, output_folder, chart_options, summary=None):
+    """Reunir en un diccionario todo lo necesario para dibujar un gráfico
+
+    summary (histogram y box, ya en las unidades del gráfico) es necesario
+    para boxplot e histograma; el trabajo nunca lleva la columna completa.
+    """
+    job = dict(chart_options)
+    job.update({
+        'column': column,
+        'chart_type': chart_type,
+        'stats': stats,
+        'output_folder': output_folder,
+    })
+    job.update(summary or {})
+    return job
+
+def _quantized(values, step):
+    """Valores redondeados a múltiplos de step (para comparar lo que se ve en un gráfico)"""
+    import numpy as np
+    
+    values = np.asarray(values, dtype=np.float64)
+    return np.round(values / max(step, 1e-300)).astype(np.int64).tolist()
+
+def chart_fingerprint(job):
+    """Huella de lo que muestra un gráfico
+
+    Las etiquetas se comparan con un decimal (como se escriben) y las formas
+    (cajas, barras del histograma) a la resolución CHART_RESOLUTION del rango,
+    así que dos trabajos con la misma huella producen la misma imagen a la vista.
+    """
+    stats = job['stats']
+    span = abs(stats['max'] - stats['min'])
+    key = {name: job[name] for name in ('column', 'chart_type', 'dpi', 'alpha', 'font_size', 'image_format',
+                                        'unit_symbol', 'unit_label', 'show_percentiles', 'show_reference',
+                                        'reference_value', 'show_outliers', 'show_confidence')}
+
+    if job['chart_type'] == 'barras':
+        names = ['mean', 'median', 'std', 'min', 'max'] + (['25%', '75%'] if job['show_percentiles'] else [])
+        key['values'] = _quantized([stats[name] for name in names], 0.1)
+    elif stats['std'] < 1e-6:
+        key['constant'] = _quantized(stats['mean'], 0.1)
+    elif job['chart_type'] == 'boxplot':
+        box = job['box']
+        key['box'] = _quantized([box['whislo'], box['q1'], box['med'], box['q3'], box['whishi']],
+                                span * CHART_RESOLUTION)
+        if job['show_outliers']:
+            key['fliers'] = sorted(set(_quantized(box['fliers'], span * CHART_RESOLUTION)))
+    else:
+        counts, edges = job['histogram']
+        key['counts'] = _quantized(counts, max(counts.max(), 1) * CHART_RESOLUTION)
+        key['edges'] = _quantized(edges[[0, -1]], span * CHART_RESOLUTION)
+        key['labels'] = _quantized([stats['mean'], stats['median']], 0.1)
+        if job['show_confidence']:
+            key['confidence'] = _quantized(1.96 * stats['std'] / stats['count'] ** 0.5, span * CHART_RESOLUTION)
+
+    return hashlib.sha1(json.dumps(key, sort_keys=True, default=float).encode('utf-8')).hexdigest()
+
+def write_summary_reports(all_statistics, output_folder, unit_suffix, log=print):
+    """Generar reportes resumen en CSV"""
+    import pandas as pd
+    
+    try:
+        for graph_type, statistics in all_statistics.items():
+            if statistics:
+                df_stats = pd.DataFrame(statistics).T
+                csv_file = os.path.join(output_folder, f'resumen_estadisticas_{graph_type}_{unit_suffix}.csv')
+                df_stats.to_csv(csv_file, index=True)
+                log(f"📊 Resumen guardado: resumen_estadisticas_{graph_type}_{unit_suffix}.csv")
+
+        log("📈 Todos los resúmenes CSV generados")
+
+    except Exception as e:
+        log(f"❌ Error generando resúmenes: {str(e)}")
+
+def run_statistical_analysis(settings, log=print, progress=None, cancel_event=None):
+    """Estadísticas, gráficos y resúmenes CSV de un estudio, sin interfaz gráfica
+
+    settings contiene df, columns, graph_types, factor, workers, output_folder,
+    timestamp_folder, create_summary y chart_options (ver render_statistical_chart).
+    Si df es None se lee data_file por bloques (all_columns son los nombres de
+    todas sus columnas de voltaje) con memoria acotada.
+    Con incremental se guarda el estado por bloques junto a los gráficos y en
+    la siguiente ejecución solo se leen las filas agregadas al archivo y se
+    regeneran los gráficos cuyo contenido cambió.
+    Con bootstrap ({'resamples', 'seed'}) los resúmenes CSV agregan U2%, U50%
+    y la probabilidad de superar la referencia con sus intervalos (requiere df y
+    no se calcula en modo incremental).
+    progress(hechos, total, inicio) se llama tras cada gráfico.
+    Devuelve (carpeta de análisis, gráficos generados, cancelado).
+    """
+    df = settings['df']
+    selected_columns = settings['columns']
+    graph_types = settings['graph_types']
+    chart_options = settings['chart_options']
+    incremental = settings.get('incremental', False)
+
+    # Crear carpeta de salida específica
+    if settings['timestamp_folder'] and incremental:
+        log("Modo incremental: se usa siempre la misma carpeta (sin timestamp)")
+    if settings['timestamp_folder'] and not incremental:
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        analysis_folder = os.path.join(settings['output_folder'], f"analisis_estadistico_{timestamp}")
+    else:
+        analysis_folder = os.path.join(settings['output_folder'], "analisis_estadistico")
+
+    os.makedirs(analysis_folder, exist_ok=True)
+
+    log(f"Iniciando análisis en: {analysis_folder}")
+
+    # Limpiar imágenes anteriores (en modo incremental solo si no hay estado que reutilizar)
+    if not incremental:
+        clean_previous_images(analysis_folder, log)
+
+    # Estadísticas de todas las columnas calculadas una sola vez
+    streaming = None
+    state_path = os.path.join(analysis_folder, STATE_FILE_NAME)
+    state_meta = {}
+    if incremental:
+        all_columns = settings['all_columns']
+        usecols = [2 * all_columns.index(col) + 1 for col in selected_columns]
+        streaming, state_meta, new_rows, cancelled = update_file_statistics(
+            settings['data_file'], usecols, state_path, cancel_event=cancel_event, log=log
+        )
+        if cancelled:
+            return analysis_folder, 0, True
+        log(f"{new_rows:,} filas nuevas incorporadas al estado incremental")
+        if not state_meta.get('charts'):
+            clean_previous_images(analysis_folder, log)
+        column_statistics = streaming.statistics(
+            selected_columns, settings['factor'], chart_options['show_percentiles']
+        )
+    elif df is None:
+        # Una sola pasada por bloques: no se cargan los datos completos
+        all_columns = settings['all_columns']
+        # La columna de voltaje i es la columna 2*i + 1 del archivo
+        usecols = [2 * all_columns.index(col) + 1 for col in selected_columns]
+        log(f"Leyendo {settings['data_file']} por bloques...")
+        streaming, _ = stream_file_statistics(settings['data_file'], usecols, cancel_event=cancel_event, log=log)
+        if cancel_event is not None and cancel_event.is_set():
+            return analysis_folder, 0, True
+        column_statistics = streaming.statistics(
+            selected_columns, settings['factor'], chart_options['show_percentiles']
+        )
+    else:
+        column_statistics = compute_column_statistics(
+            df[selected_columns].to_numpy(), selected_columns, settings['factor'], chart_options['show_percentiles']
+        )
+    log(f"Estadísticas calculadas para {len(column_statistics)} columnas")
+
+    # Un trabajo autocontenido por (columna, tipo de gráfico)
+    jobs = []
+    summaries = {}
+    for graph_type in graph_types:
+        for col in selected_columns:
+            stats = column_statistics.get(col)
+            if stats is None:
+                log(f"⚠️  Columna '{col}' sin datos válidos")
+                continue
+            # Histograma y boxplot se reducen en unidades SI; solo el resumen se convierte
+            if graph_type in ('boxplot', 'histograma') and col not in summaries:
+                if streaming is not None:
+                    summaries[col] = streaming.chart_summary(selected_columns.index(col), settings['factor'])
+                else:
+                    summaries[col] = column_chart_summary(df[col].to_numpy(), settings['factor'])
+            jobs.append(build_chart_job(col, graph_type, stats, analysis_folder, chart_options,
+                                        summaries.get(col)))
+
+    # Modo incremental: no redibujar los gráficos que se verían igual que los guardados
+    rendered = set()
+    previous_charts = state_meta.get('charts', {})
+    chart_fingerprints = {}
+    if incremental:
+        pending = []
+        for job in jobs:
+            key = f"{job['chart_type']}|{job['column']}"
+            chart_fingerprints[key] = chart_fingerprint(job)
+            file_path = os.path.join(analysis_folder, chart_file_name(
+                job['column'], job['chart_type'], job['unit_symbol'], job['image_format']))
+            if previous_charts.get(key) == chart_fingerprints[key] and os.path.exists(file_path):
+                rendered.add((job['chart_type'], job['column']))
+            else:
+                pending.append(job)
+        log(f"{len(rendered)} gráficos sin cambios visibles; se regeneran {len(pending)}")
+        jobs = pending
+
+    total_graphs = len(jobs)
+
+    log(f"Generando {total_graphs} gráficos para {len(selected_columns)} columnas "
+        f"con {settings['workers']} proceso(s)...")
+
+    done = 0
+    n_generated = 0
+    start_time = time.perf_counter()
+    for job, file_path, error in render_charts(jobs, settings['workers'], cancel_event):
+        done += 1
+        if progress:
+            progress(done, total_graphs, start_time)
+        if error is not None:
+            log(f"❌ Error generando {job['chart_type']} para {job['column']}: {str(error)}")
+            continue
+        rendered.add((job['chart_type'], job['column']))
+        n_generated += 1
+        log(f"[{done}/{total_graphs}] {job['chart_type']}: {job['column'][:30]}")
+
+    cancelled = cancel_event is not None and cancel_event.is_set()
+
+    if incremental:
+        # Recordar qué muestra cada gráfico guardado para la próxima actualización
+        state_meta['charts'] = {
+            f"{chart_type}|{col}": chart_fingerprints[f"{chart_type}|{col}"] for chart_type, col in rendered
+        }
+        streaming.save(state_path, state_meta)
+
+    # Valores estadísticos con intervalos bootstrap (solo para los resúmenes)
+    bootstrap = settings.get('bootstrap')
+    extra_statistics = {}
+    if bootstrap and settings['create_summary'] and not cancelled:
+        # En modo incremental df (si lo hay) no incluye las filas agregadas al archivo:
+        # sus intervalos no corresponderían al resto de la fila del resumen
+        if df is None or incremental:
+            log("⚠️  El bootstrap necesita los datos en memoria: se omite en modo por bloques o incremental")
+        else:
+            start_time = time.perf_counter()
+            extra_statistics = bootstrap_statistics(
+                df[selected_columns].to_numpy(), selected_columns, settings['factor'],
+                threshold=chart_options['reference_value'] / settings['factor'],
+                resamples=bootstrap['resamples'], seed=bootstrap['seed']
+            )
+            log(f"Bootstrap: {bootstrap['resamples']} remuestreos de {len(df)} disparos para "
+                f"{len(extra_statistics)} columnas en {time.perf_counter() - start_time:.1f} s")
+    
+    # Resultados en el orden de selección, independiente del orden de finalización
+    all_statistics = {}
+    for graph_type in graph_types:
+        all_statistics[graph_type] = {
+            col: {**column_statistics[col], **extra_statistics.get(col, {})} for col in selected_columns
+            if (graph_type, col) in rendered
+        }
+
+    # Generar resúmenes CSV si está habilitado
+    if settings['create_summary'] and not cancelled:
+        write_summary_reports(all_statistics, analysis_folder, chart_options['unit_symbol'], log)
+
+    return analysis_folder, n_generated, cancelled
@@ -0,0 +1,126 @@
+import numpy as np
+
+from .stats import _sorted_quantile
+
+# Valores estadísticos: probabilidad de no ser superados (U2% lo supera el 2 % de los disparos)
+BOOTSTRAP_QUANTILES = {'U2%': 0.98, 'U50%': 0.5}
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_CONFIDENCE = 0.95
+# Conteos (remuestreos x disparos x columnas) por lote: acota la memoria con cientos de nodos
+BOOTSTRAP_BATCH_VALUES = 1 << 24
+EXCEEDANCE_KEY = 'P_supera_ref'
+
+def _first_above(cumulative, rank):
+    """Primera posición cuya suma acumulada supera rank, para cada (columna, remuestreo)
+
+    Las sumas crecen a lo largo de los disparos: búsqueda binaria vectorizada
+    (log2(disparos) lecturas de un valor por par, sin recorrer el arreglo).
+    """
+    n = len(cumulative)
+    columns, resamples = np.indices(rank.shape)
+    low = np.zeros(rank.shape, dtype=np.intp)
+    high = np.full(rank.shape, n, dtype=np.intp)
+    for _ in range(n.bit_length()):
+        active = low < high
+        middle = (low + high) // 2
+        below = active & (cumulative[np.minimum(middle, n - 1), columns, resamples] <= rank)
+        low = np.where(below, middle + 1, low)
+        high = np.where(active & ~below, middle, high)
+    return low
+
+def _resample_quantiles(counts, order, sorted_data, n_valid, quantiles):
+    """Cuantiles de cada remuestreo a partir de cuántas veces se eligió cada disparo
+
+    Los conteos se reordenan según el orden de cada columna; su suma
+    acumulada dice cuántos valores del remuestreo hay hasta cada posición
+    del orden, así que el valor k-ésimo del remuestreo es el primero cuya
+    suma supera k (no se ordena ningún remuestreo). Devuelve matrices
+    (remuestreos x columnas).
+    """
+    # (disparos, columnas, remuestreos): cada paso de la suma suma una fila contigua
+    cumulative = counts.T[order]
+    for i in range(1, len(cumulative)):
+        np.add(cumulative[i], cumulative[i - 1], out=cumulative[i])
+    columns = np.arange(order.shape[1])[:, None]
+    # Valores válidos elegidos en cada remuestreo (los NaN quedan al final del orden)
+    picked = cumulative[np.maximum(n_valid - 1, 0), columns[:, 0]]
+
+    results = {}
+    for name, q in quantiles.items():
+        position = q * (picked - 1)
+        lower = np.floor(position)
+        fraction = position - lower
+        low = sorted_data[_first_above(cumulative, lower), columns]
+        high = sorted_data[_first_above(cumulative, np.minimum(lower + 1, picked - 1)), columns]
+        # Un remuestreo sin valores válidos no tiene cuantil
+        results[name] = np.where(picked > 0, low + (high - low) * fraction, np.nan).T
+    return results
+
+def bootstrap_statistics(data, columns, factor=1.0, threshold=None, resamples=BOOTSTRAP_RESAMPLES, seed=0,
+                         confidence=BOOTSTRAP_CONFIDENCE, quantiles=BOOTSTRAP_QUANTILES,
+                         batch_values=BOOTSTRAP_BATCH_VALUES):
+    """U2%, U50% y probabilidad de superar threshold de todas las columnas, con intervalos bootstrap
+
+    data es (disparos x columnas). Cada remuestreo elige disparos completos
+    con reemplazo, los mismos para todas las columnas (conserva la
+    correlación entre nodos de un mismo disparo), así que solo se sortean
+    conteos multinomiales por disparo. Los remuestreos se procesan por lotes
+    de a lo sumo batch_values conteos y el resultado depende solo de seed.
+    threshold está en las unidades de data; los cuantiles se devuelven
+    convertidos con factor. Los intervalos son los percentiles de la
+    distribución bootstrap. Los NaN se ignoran y las columnas sin datos
+    válidos se omiten.
+    """
+    data = np.asarray(data)
+    if data.dtype not in (np.float32, np.float64):
+        data = data.astype(np.float64)
+    data = data.reshape(len(data), -1)
+    n_shots, n_columns = data.shape
+
+    # Un único ordenamiento por columna (NaN al final)
+    order = np.argsort(data, axis=0, kind='stable')
+    sorted_data = np.take_along_axis(data, order, axis=0)
+    n_valid = (~np.isnan(sorted_data)).sum(axis=0)
+    safe_valid = np.maximum(n_valid, 1)
+    estimates = {name: _sorted_quantile(sorted_data, safe_valid, q) for name, q in quantiles.items()}
+
+    if threshold is not None:
+        valid = (~np.isnan(data)).astype(np.float64)
+        exceeds = (data > threshold).astype(np.float64)
+        estimates[EXCEEDANCE_KEY] = exceeds.sum(axis=0) / safe_valid
+
+    # Lotes: remuestreos completos para todas las columnas si entran, si no menos columnas por vez
+    batch = int(min(max(batch_values // (n_shots * n_columns), 1), resamples))
+    column_batch = int(min(max(batch_values // (batch * n_shots), 1), n_columns))
+    count_dtype = np.int16 if n_shots < np.iinfo(np.int16).max else np.int32
+    boot = {name: np.empty((resamples, n_columns)) for name in estimates}
+
+    rng = np.random.default_rng(seed)
+    probabilities = np.full(n_shots, 1 / n_shots)
+    for first in range(0, resamples, batch):
+        rows = slice(first, min(first + batch, resamples))
+        counts = rng.multinomial(n_shots, probabilities, size=rows.stop - rows.start).astype(count_dtype)
+        if threshold is not None:
+            weights = counts.astype(np.float64)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                boot[EXCEEDANCE_KEY][rows] = (weights @ exceeds) / (weights @ valid)
+        for start in range(0, n_columns, column_batch):
+            part = slice(start, start + column_batch)
+            for name, values in _resample_quantiles(counts, order[:, part], sorted_data[:, part],
+                                                    n_valid[part], quantiles).items():
+                boot[name][rows, part] = values
+
+    tail = 100 * (1 - confidence) / 2
+    has_data = np.flatnonzero(n_valid > 0)
+    intervals = {name: np.nanpercentile(values[:, has_data], [tail, 100 - tail], axis=0)
+                 for name, values in boot.items()}
+    statistics = {}
+    for j, i in enumerate(has_data):
+        stats = {}
+        for name, values in estimates.items():
+            scale = 1.0 if name == EXCEEDANCE_KEY else factor
+            stats[name] = values[i] * scale
+            stats[f'{name}_ic_inf'] = intervals[name][0, j] * scale
+            stats[f'{name}_ic_sup'] = intervals[name][1, j] * scale
+        statistics[columns[i]] = stats
+    return statistics
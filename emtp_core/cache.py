@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Carpeta y tamaño máximo por defecto (se pueden cambiar con variables de entorno)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.emtp_cache')
+DEFAULT_MAX_MB = 4096
+
+class ColumnCache:
+    """Caché binaria (.npy mapeado en memoria) de archivos de texto ya parseados
+    
+    Cada entrada se identifica por la ruta absoluta, el mtime y el tamaño del
+    archivo de origen, más una variante que distingue la forma de parseo.
+    Al superar max_bytes se eliminan las entradas usadas hace más tiempo.
+    """
+    
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or os.environ.get('EMTP_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('EMTP_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+    
+    def _key(self, file_path, variant):
+        """Clave de la entrada según ruta, mtime, tamaño y variante"""
+        stat = os.stat(file_path)
+        source = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{variant}"
+        return hashlib.sha1(source.encode('utf-8')).hexdigest()
+    
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.npy', base + '.json'
+    
+    def get(self, file_path, variant=''):
+        """Devolver (arreglo mapeado en memoria, metadatos) o None si no está en caché"""
+        try:
+            npy_path, meta_path = self._paths(self._key(file_path, variant))
+            if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+                return None
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            data = np.load(npy_path, mmap_mode='r')
+            # Marcar como usada recientemente (orden LRU)
+            os.utime(meta_path)
+            return data, meta
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, file_path, data, meta=None, variant=''):
+        """Guardar el arreglo y sus metadatos; los errores de disco no se propagan"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            npy_path, meta_path = self._paths(self._key(file_path, variant))
+            meta = dict(meta or {})
+            meta['source'] = os.path.abspath(file_path)
+            
+            # Escritura atómica: primero a temporales y luego renombrar
+            tmp_npy = npy_path + '.tmp'
+            with open(tmp_npy, 'wb') as f:
+                np.save(f, data)
+            os.replace(tmp_npy, npy_path)
+            tmp_meta = meta_path + '.tmp'
+            with open(tmp_meta, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_meta, meta_path)
+            
+            self.evict()
+            return True
+        except OSError:
+            return False
+    
+    def evict(self):
+        """Eliminar las entradas menos usadas hasta respetar el tamaño máximo"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            meta_path = os.path.join(self.cache_dir, name)
+            npy_path = meta_path[:-5] + '.npy'
+            try:
+                size = os.path.getsize(npy_path) + os.path.getsize(meta_path)
+                last_used = os.path.getmtime(meta_path)
+            except OSError:
+                continue
+            entries.append((last_used, size, npy_path, meta_path))
+            total += size
+        
+        for _, size, npy_path, meta_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(npy_path)
+                os.remove(meta_path)
+                total -= size
+            except OSError:
+                # En Windows un .npy abierto como memmap no se puede borrar
+                pass
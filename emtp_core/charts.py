@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Formato de los gráficos exportados (tamaño para Word: 7.54 cm x 7.09 cm)
+CHART_FIGSIZE = (7.54/2.54, 7.09/2.54)
+CHART_RC = {
+    'figure.figsize': list(CHART_FIGSIZE),
+    'font.family': 'Times New Roman',
+    'font.size': 10,
+    'axes.titlesize': 10,
+    'axes.labelsize': 10,
+    'xtick.labelsize': 10,
+    'ytick.labelsize': 10,
+    'legend.fontsize': 10,
+    'savefig.dpi': 300,
+    'savefig.bbox': 'tight',
+}
+
+def chart_file_name(column, chart_type, unit_symbol, image_format):
+    """Nombre de archivo determinista para un gráfico"""
+    safe_filename = column.replace('@', '_').replace('/', '_').replace(' ', '_').replace(':', '_')
+    return f'stats_{chart_type}_{safe_filename}_{unit_symbol}.{image_format}'
+
+def render_statistical_chart(job):
+    """Dibujar y guardar un gráfico estadístico con una Figure propia (backend Agg)
+
+    job es un diccionario autocontenido (se puede enviar a otro proceso) con
+    column, chart_type, stats, box e histogram (resúmenes ya convertidos, solo
+    boxplot e histograma), output_folder y las opciones de formato. Devuelve
+    la ruta del archivo guardado.
+    """
+    # Importación diferida: matplotlib solo se carga en los procesos que dibujan
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    
+    column = job['column']
+    chart_type = job['chart_type']
+    stats = job['stats']
+    unit_symbol = job['unit_symbol']
+    unit_label = job['unit_label']
+    alpha_value = job['alpha']
+
+    rc = dict(CHART_RC)
+    rc['font.size'] = job.get('font_size', rc['font.size'])
+
+    with matplotlib.rc_context(rc):
+        fig = Figure(figsize=CHART_FIGSIZE)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(1, 1, 1)
+
+        if chart_type == 'barras':
+            estadisticas = ['Media', 'Mediana', 'Std', 'Min', 'Max']
+            valores = [stats['mean'], stats['median'], stats['std'], stats['min'], stats['max']]
+
+            if job['show_percentiles']:
+                estadisticas.extend(['Q1', 'Q3'])
+                valores.extend([stats['25%'], stats['75%']])
+
+            bars = ax.bar(estadisticas, valores, color='steelblue', alpha=alpha_value, edgecolor='black')
+
+            # Línea de referencia (si está habilitada)
+            if job['show_reference']:
+                ref_value = job['reference_value']
+                ax.axhline(y=ref_value, color='red', linestyle='--', linewidth=2,
+                           label=f'Vp Admitido ({ref_value:.1f} {unit_symbol})')
+                ax.legend(fontsize=8)
+
+            # Valores en las barras
+            for bar, valor in zip(bars, valores):
+                ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + abs(valor)*0.01,
+                        f'{valor:.1f}', ha='center', va='bottom', fontsize=8)
+
+            ax.set_title(f'Estadísticas: {column[:25]}...' if len(column) > 25 else f'Estadísticas: {column}')
+            ax.set_ylabel(unit_label)
+            ax.tick_params(axis='x', rotation=45)
+
+        elif chart_type == 'boxplot':
+            if stats['std'] < 1e-6:
+                ax.text(0.5, 0.5, f'Valor Constante:\n{stats["mean"]:.1f} {unit_symbol}',
+                        ha='center', va='center', transform=ax.transAxes, fontsize=10)
+            else:
+                # Resumen precalculado (cuartiles, bigotes y atípicos), sin los datos completos
+                box_plot = ax.bxp([job['box']], patch_artist=True,
+                                  boxprops=dict(facecolor='lightblue', alpha=alpha_value))
+
+                # Configurar outliers si está habilitado
+                if not job['show_outliers']:
+                    for outlier in box_plot['fliers']:
+                        outlier.set_visible(False)
+
+            ax.set_title(f'Boxplot: {column[:25]}...' if len(column) > 25 else f'Boxplot: {column}')
+            ax.set_ylabel(unit_label)
+            ax.set_xticks([1], [column.split('@')[0] if '@' in column else column[:10]])
+
+        elif chart_type == 'histograma':
+            if stats['std'] < 1e-6:
+                ax.text(0.5, 0.5, f'Valor Constante:\n{stats["mean"]:.1f} {unit_symbol}',
+                        ha='center', va='center', transform=ax.transAxes, fontsize=10)
+            else:
+                counts, edges = job['histogram']
+                ax.hist(edges[:-1], bins=edges, weights=counts,
+                        color='lightgreen', alpha=alpha_value, edgecolor='black')
+                ax.axvline(stats['mean'], color='red', linestyle='--',
+                           label=f'Media: {stats["mean"]:.1f} {unit_symbol}')
+                ax.axvline(stats['median'], color='blue', linestyle='--',
+                           label=f'Mediana: {stats["median"]:.1f} {unit_symbol}')
+
+                # Añadir intervalos de confianza si está habilitado
+                if job['show_confidence']:
+                    ci_lower = stats['mean'] - 1.96 * stats['std'] / np.sqrt(stats['count'])
+                    ci_upper = stats['mean'] + 1.96 * stats['std'] / np.sqrt(stats['count'])
+                    ax.axvline(ci_lower, color='orange', linestyle=':', alpha=0.7)
+                    ax.axvline(ci_upper, color='orange', linestyle=':', alpha=0.7)
+
+                ax.legend(fontsize=8)
+
+            ax.set_title(f'Histograma: {column[:25]}...' if len(column) > 25 else f'Histograma: {column}')
+            ax.set_xlabel(unit_label)
+            ax.set_ylabel('Frecuencia')
+
+        fig.tight_layout()
+
+        # Guardar imagen
+        image_format = job['image_format']
+        file_path = os.path.join(job['output_folder'],
+                                 chart_file_name(column, chart_type, unit_symbol, image_format))
+        fig.savefig(file_path, dpi=job['dpi'], bbox_inches='tight', format=image_format)
+
+    return file_path
+
+def render_charts(jobs, workers=1, cancel_event=None):
+    """Renderizar trabajos de gráficos y producir (job, ruta, error) a medida que terminan
+
+    Con workers > 1 se usa un pool de procesos; con 1 se dibuja en el proceso
+    actual. Si cancel_event se activa no se inician más trabajos.
+    """
+    if workers <= 1:
+        for job in jobs:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                yield job, render_statistical_chart(job), None
+            except Exception as e:
+                yield job, None, e
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(render_statistical_chart, job): job for job in jobs}
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            job = futures[future]
+            try:
+                yield job, future.result(), None
+            except Exception as e:
+                yield job, None, e
+    finally:
+        # Descartar los trabajos pendientes si se canceló o se abandonó el generador
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,182 @@
+import ast
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+from .windowed import WINDOW_KERNELS
+
+# Muestras evaluadas por bloque: acota los temporales de cada operación
+EXPRESSION_CHUNK = 1 << 20
+# Rangos evaluados que se recuerdan por señal derivada
+DERIVED_CACHE_ENTRIES = 4
+
+# Funciones punto a punto
+ELEMENTWISE_FUNCTIONS = {
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+    'log': np.log,
+    'log10': np.log10,
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'arctan': np.arctan,
+    'sign': np.sign,
+    'minimum': np.minimum,
+    'maximum': np.maximum,
+}
+# Funciones punto a punto de dos argumentos (el resto recibe uno)
+BINARY_FUNCTIONS = {'minimum', 'maximum'}
+CONSTANTS = {'pi': np.pi}
+
+_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+# Señales entre llaves: {v:BUSA-BUSB} (nombres de EMTP que no son identificadores)
+_BRACED = re.compile(r'\{([^{}]+)\}')
+
+# Funciones de ventana: f(señal, ventana en segundos); la ventana termina en cada muestra
+WINDOW_FUNCTIONS = WINDOW_KERNELS
+
+class DerivedSignal:
+    """Señal calculada con una expresión sobre las columnas de un archivo
+
+    La expresión admite + - * / **, números, las funciones de
+    ELEMENTWISE_FUNCTIONS y WINDOW_FUNCTIONS y las señales por nombre
+    (entre llaves si el nombre no es un identificador). Se valida el árbol
+    sintáctico completo: no hay atributos, índices ni otras llamadas.
+
+    Solo se evalúa el rango de muestras pedido, por bloques, y cada rango
+    se recuerda hasta llamar a clear() (cuando cambian los datos).
+    """
+
+    def __init__(self, text, columns):
+        self.text = text
+        placeholders = {}
+
+        def replace(match):
+            name = match.group(1).strip()
+            if name not in columns:
+                raise ValueError(f"Señal no encontrada: {name}")
+            placeholder = placeholders.setdefault(columns[name], f"__s{len(placeholders)}")
+            return f" {placeholder} "
+
+        try:
+            tree = ast.parse(_BRACED.sub(replace, text).strip(), mode='eval')
+        except SyntaxError:
+            raise ValueError(f"Expresión no válida: {text}") from None
+
+        self.names = {placeholder: key for key, placeholder in placeholders.items()}
+        self._check(tree.body, columns)
+        self.references = list(dict.fromkeys(self.names.values()))
+        self.tree = tree
+        self.code = compile(tree, '<expresión>', 'eval')
+        self._memo = OrderedDict()
+
+    def _check(self, node, columns):
+        """Recorrer el árbol rechazando todo lo que no sea aritmética, señales y funciones conocidas"""
+        if isinstance(node, ast.BinOp) and isinstance(node.op, _OPERATORS):
+            self._check(node.left, columns)
+            self._check(node.right, columns)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, _OPERATORS):
+            self._check(node.operand, columns)
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError(f"Constante no válida: {node.value!r}")
+            # En float: potencias de enteros enormes fallan en vez de calcularse
+            node.value = float(node.value)
+        elif isinstance(node, ast.Name):
+            if node.id in self.names or node.id in CONSTANTS:
+                return
+            if node.id not in columns:
+                raise ValueError(f"Señal no encontrada: {node.id}")
+            # Identificador que nombra una señal: se reemplaza por su marcador
+            placeholder = next((p for p, key in self.names.items() if key == columns[node.id]),
+                               f"__s{len(self.names)}")
+            self.names[placeholder] = columns[node.id]
+            node.id = placeholder
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name in WINDOW_FUNCTIONS:
+                if len(node.args) != 2 or not self._window_seconds(node.args[1]) > 0:
+                    raise ValueError(f"{name}(señal, ventana): la ventana debe ser un número positivo en segundos")
+                self._check(node.args[0], columns)
+            elif name in ELEMENTWISE_FUNCTIONS:
+                # Un argumento de más llegaría a numpy como out= y escribiría sobre él
+                arity = 2 if name in BINARY_FUNCTIONS else 1
+                if len(node.args) != arity:
+                    raise ValueError(f"{name}(...) recibe {arity} argumento(s)")
+                for arg in node.args:
+                    self._check(arg, columns)
+            else:
+                raise ValueError(f"Función no permitida: {name}")
+        else:
+            raise ValueError(f"Elemento no permitido en la expresión: {ast.unparse(node)}")
+
+    @staticmethod
+    def _window_seconds(node):
+        """Ventana en segundos: aritmética solo con números y constantes (p. ej. 1/60); 0 si no lo es"""
+        for child in ast.walk(node):
+            if isinstance(child, ast.Constant) and isinstance(child.value, (int, float)) \
+                    and not isinstance(child.value, bool):
+                child.value = float(child.value)
+            elif not (isinstance(child, (ast.BinOp, ast.UnaryOp, *_OPERATORS)) or
+                      (isinstance(child, ast.Name) and child.id in CONSTANTS) or isinstance(child, ast.Load)):
+                return 0
+        try:
+            value = eval(compile(ast.Expression(node), '<ventana>', 'eval'), {'__builtins__': {}, **CONSTANTS})
+        except (ArithmeticError, ValueError):
+            return 0
+        return float(value) if np.isfinite(value) else 0
+
+    def _lookback(self, node, step):
+        """Muestras anteriores que necesita el valor de una muestra (ventanas anidadas se suman)"""
+        if isinstance(node, ast.Call) and node.func.id in WINDOW_FUNCTIONS:
+            return self._window_samples(node.args[1], step) - 1 + self._lookback(node.args[0], step)
+        return max((self._lookback(child, step) for child in ast.iter_child_nodes(node)), default=0)
+
+    def _window_samples(self, node, step):
+        return max(int(round(self._window_seconds(node) / step)), 1)
+
+    def _namespace(self, columns, first, last, step):
+        namespace = {'__builtins__': {}, **ELEMENTWISE_FUNCTIONS, **CONSTANTS}
+        for placeholder, key in self.names.items():
+            # Vistas de solo lectura: ninguna expresión puede modificar los datos cargados
+            values = columns[key][first:last].view()
+            values.flags.writeable = False
+            namespace[placeholder] = values
+        for name, kernel in WINDOW_FUNCTIONS.items():
+            namespace[name] = lambda x, seconds, kernel=kernel: kernel(
+                np.broadcast_to(x, (last - first,)), max(int(round(seconds / step)), 1))
+        return namespace
+
+    def evaluate(self, columns, time_values, start=0, stop=None):
+        """Valores en [start, stop); columns es un diccionario señal -> valores del mismo archivo"""
+        stop = len(time_values) if stop is None else min(stop, len(time_values))
+        key = (start, stop)
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        # Paso medio del archivo: define las muestras de cada ventana (igual en todos los bloques)
+        step = (float(time_values[-1]) - float(time_values[0])) / max(len(time_values) - 1, 1) or 1.0
+        lookback = self._lookback(self.tree.body, step)
+        result = None
+        for first in range(start, stop, EXPRESSION_CHUNK):
+            last = min(first + EXPRESSION_CHUNK, stop)
+            # Cada bloque se evalúa desde antes para que las ventanas vean sus muestras previas
+            lead = max(first - lookback, 0)
+            values = eval(self.code, self._namespace(columns, lead, last, step))
+            values = np.broadcast_to(values, (last - lead,))[first - lead:]
+            if result is None:
+                result = np.empty(stop - start, dtype=np.result_type(values.dtype, np.float32))
+            result[first - start:last - start] = values
+        if result is None:
+            result = np.empty(0)
+
+        self._memo[key] = result
+        while len(self._memo) > DERIVED_CACHE_ENTRIES:
+            self._memo.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._memo.clear()
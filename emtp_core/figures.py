@@ -0,0 +1,244 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .cache import ColumnCache
+from .precision import storage_dtype
+from .waveform import (SCALE_FACTORS, load_signal_file, minmax_envelope_indices, scaled_label,
+                       visible_index_range)
+
+# Tamaño para Word (7.54 cm x 7.09 cm), igual que la vista previa de GraphGen
+FIGURE_SIZE = (7.54 * 0.393701, 7.09 * 0.393701)
+WAVEFORM_RC = {
+    'font.family': 'serif',
+    'font.serif': ['Times New Roman'],
+    'font.size': 10,
+}
+# Formatos vectoriales: se guardan todas las muestras (se puede ampliar el documento)
+VECTOR_FORMATS = {'pdf', 'svg', 'eps', 'ps'}
+# Columnas de la envolvente min/max por píxel de ancho en formatos raster
+ENVELOPE_OVERSAMPLING = 2
+LINE_COLORS = ['blue', 'red', 'green', 'orange', 'purple', 'brown',
+               'pink', 'gray', 'olive', 'cyan', 'magenta', 'black']
+
+# Configuración de un gráfico (los mismos campos que guarda la interfaz)
+DEFAULT_PLOT_SPEC = {
+    'name': None,
+    'signals': None,
+    'custom_headers': {},
+    'x_scale': 'ninguno',
+    'y_scale': 'ninguno',
+    'x_range': None,
+    'y_range': None,
+    'title': 'Señales vs Tiempo',
+    'ylabel': 'Voltaje (V)',
+    'legend': True,
+    'grid': True,
+    'dpi': 300,
+    'image_format': 'png',
+}
+
+# Figura reutilizada por todos los gráficos de un mismo proceso
+_worker_figure = None
+
+def plot_spec(spec=None, **overrides):
+    """Configuración por defecto actualizada con spec y overrides"""
+    result = dict(DEFAULT_PLOT_SPEC)
+    result.update(spec or {})
+    result.update(overrides)
+    return result
+
+def select_signals(headers, spec):
+    """Headers originales a graficar; spec['signals'] admite nombres originales o personalizados"""
+    if not spec['signals']:
+        return list(headers[1:])
+
+    by_custom_name = {name: header for header, name in spec['custom_headers'].items()}
+    selected = []
+    for name in spec['signals']:
+        if name in headers:
+            selected.append(name)
+        elif name in by_custom_name:
+            selected.append(by_custom_name[name])
+        else:
+            raise ValueError(f"Señal no encontrada: {name}")
+    return selected
+
+def output_stems(file_paths):
+    """Nombre base de salida por archivo, sin repetidos
+
+    Es el nombre del archivo sin extensión; si dos archivos se llaman igual
+    (casos en carpetas distintas con el mismo resultado.txt) se antepone a
+    cada uno la cantidad necesaria de carpetas: caso1_resultado, caso2_resultado.
+    """
+    parts = [[part for part in os.path.splitdrive(os.path.abspath(path))[1].split(os.sep) if part]
+             for path in file_paths]
+    depths = [1] * len(parts)
+    while True:
+        stems = ['_'.join(part[len(part) - depth:-1] + [os.path.splitext(part[-1])[0]])
+                 for part, depth in zip(parts, depths)]
+        counts = Counter(stems)
+        repeated = [i for i, stem in enumerate(stems) if counts[stem] > 1 and depths[i] < len(parts[i])]
+        if not repeated:
+            return stems
+        for i in repeated:
+            depths[i] += 1
+
+def figure_file_name(file_path, spec, index, n_figures, stem=None):
+    """Nombre del archivo de salida: <archivo>[_<nombre o número>].<formato>
+
+    stem reemplaza el nombre del archivo (ver output_stems).
+    """
+    stem = stem or os.path.splitext(os.path.basename(file_path))[0]
+    if spec['name']:
+        stem = f"{stem}_{spec['name']}"
+    elif n_figures > 1:
+        stem = f"{stem}_{index + 1}"
+    return f"{stem}.{spec['image_format']}"
+
+def get_worker_figure():
+    """Figure con canvas Agg creada una sola vez por proceso"""
+    global _worker_figure
+    if _worker_figure is None:
+        # Importación diferida: matplotlib solo se carga en los procesos que dibujan
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        
+        _worker_figure = Figure(figsize=FIGURE_SIZE)
+        FigureCanvasAgg(_worker_figure)
+    return _worker_figure
+
+def scale_transform(ax, x_factor, y_factor):
+    """Transformación que dibuja datos en unidades SI sobre ejes escalados, sin copiarlos"""
+    if x_factor == 1 and y_factor == 1:
+        return ax.transData
+    from matplotlib.transforms import Affine2D
+    
+    return Affine2D().scale(x_factor, y_factor) + ax.transData
+
+def draw_waveform(ax, df, spec, n_bins=None):
+    """Dibujar las señales de spec en la ventana visible
+
+    Con n_bins cada señal se reduce a su envolvente min/max (picos exactos)
+    y solo esas muestras se escalan; sin él se dibujan todas las muestras en
+    unidades SI con una transformación de escala (sin copias de los datos).
+    """
+    headers = list(df.columns)
+    time_values = df[headers[0]].to_numpy()
+    x_factor, _ = SCALE_FACTORS.get(spec['x_scale'], (1, ''))
+    y_factor, _ = SCALE_FACTORS.get(spec['y_scale'], (1, ''))
+    x_min, x_max = spec['x_range'] or (None, None)
+    y_min, y_max = spec['y_range'] or (None, None)
+
+    start, stop = visible_index_range(time_values, x_min, x_max, x_factor)
+    time_window = time_values[start:stop]
+    full_transform = None if n_bins else scale_transform(ax, x_factor, y_factor)
+
+    signals = select_signals(headers, spec)
+    lines = []
+    for i, header in enumerate(signals):
+        signal_data = df[header].to_numpy()[start:stop]
+        if n_bins:
+            sample_idx = minmax_envelope_indices(signal_data, n_bins)
+            x_data, y_data = time_window[sample_idx] * x_factor, signal_data[sample_idx] * y_factor
+            transform = ax.transData
+        else:
+            x_data, y_data, transform = time_window, signal_data, full_transform
+        line, = ax.plot(x_data, y_data, transform=transform,
+                        color=LINE_COLORS[i % len(LINE_COLORS)], linewidth=1.5, alpha=0.8,
+                        label=spec['custom_headers'].get(header, header))
+        lines.append(line)
+
+    ax.tick_params(labelsize=8)
+    ax.set_title(spec['title'], fontsize=10, pad=10, weight='bold')
+    ax.set_xlabel(scaled_label(spec['x_scale'], "Tiempo (s)"), fontsize=9)
+    ax.set_ylabel(scaled_label(spec['y_scale'], spec['ylabel']), fontsize=9)
+
+    if spec['grid']:
+        ax.grid(True, alpha=0.3, linestyle='--')
+
+    if spec['legend'] and len(lines) > 1:
+        ax.legend(handles=lines, fontsize=7, loc='best', framealpha=0.9)
+
+    # Rangos personalizados (en unidades escaladas, como en la interfaz)
+    if x_min is not None or x_max is not None:
+        current_xlim = ax.get_xlim()
+        ax.set_xlim(x_min if x_min is not None else current_xlim[0],
+                    x_max if x_max is not None else current_xlim[1])
+    if y_min is not None or y_max is not None:
+        current_ylim = ax.get_ylim()
+        ax.set_ylim(y_min if y_min is not None else current_ylim[0],
+                    y_max if y_max is not None else current_ylim[1])
+
+def render_waveform_figure(df, spec, output_path):
+    """Dibujar y guardar un gráfico de señales en la figura del proceso"""
+    import matplotlib
+    
+    fig = get_worker_figure()
+    with matplotlib.rc_context(WAVEFORM_RC):
+        fig.clear()
+        ax = fig.add_subplot(1, 1, 1)
+        # En raster basta la envolvente a la resolución de salida
+        n_bins = None
+        if spec['image_format'] not in VECTOR_FORMATS:
+            n_bins = int(FIGURE_SIZE[0] * spec['dpi']) * ENVELOPE_OVERSAMPLING
+        draw_waveform(ax, df, spec, n_bins)
+        fig.tight_layout(pad=0.5)
+        fig.savefig(output_path, dpi=spec['dpi'], bbox_inches='tight',
+                    facecolor='white', edgecolor='none', format=spec['image_format'])
+    return output_path
+
+def render_waveform_file(task):
+    """Cargar un archivo una vez y generar todos sus gráficos
+
+    task es un diccionario autocontenido con file_path, figures (lista de
+    configuraciones), output_folder, use_cache, float32 (señales en memoria
+    compacta) y opcionalmente output_stem (nombre base de las imágenes).
+    Devuelve una lista de (ruta, error) por gráfico.
+    """
+    cache = ColumnCache() if task.get('use_cache', True) else None
+    df = load_signal_file(task['file_path'], cache=cache, dtype=storage_dtype(task.get('float32', False)))
+
+    results = []
+    figures = task['figures']
+    for i, spec in enumerate(figures):
+        spec = plot_spec(spec)
+        output_path = os.path.join(task['output_folder'],
+                                   figure_file_name(task['file_path'], spec, i, len(figures),
+                                                    task.get('output_stem')))
+        try:
+            results.append((render_waveform_figure(df, spec, output_path), None))
+        except Exception as e:
+            results.append((output_path, e))
+    return results
+
+def render_waveform_batch(tasks, workers=1, cancel_event=None):
+    """Procesar archivos y producir (task, resultados, error) a medida que terminan
+
+    Con workers > 1 cada archivo se procesa en un pool de procesos (una figura
+    reutilizada por proceso); con 1 se dibuja en el proceso actual.
+    """
+    if workers <= 1:
+        for task in tasks:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            try:
+                yield task, render_waveform_file(task), None
+            except Exception as e:
+                yield task, None, e
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(render_waveform_file, task): task for task in tasks}
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            task = futures[future]
+            try:
+                yield task, future.result(), None
+            except Exception as e:
+                yield task, None, e
+    finally:
+        # Descartar los trabajos pendientes si se canceló o se abandonó el generador
+        executor.shutdown(wait=True, cancel_futures=True)
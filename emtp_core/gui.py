@@ -0,0 +1,239 @@
+# Utilidades compartidas por las interfaces Tk (importa tkinter y el backend TkAgg)
+import tkinter as tk
+from tkinter import ttk
+
+import matplotlib
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+def create_styled_figure(figsize, rc):
+    """Figure con un único eje cuyos textos se crean con el estilo rc"""
+    with matplotlib.rc_context(rc):
+        fig = Figure(figsize=figsize)
+        ax = fig.add_subplot(1, 1, 1)
+    return fig, ax
+
+class StyledFigureCanvas(FigureCanvasTkAgg):
+    """Canvas TkAgg que dibuja con su propio estilo sin modificar rcParams globales"""
+
+    def __init__(self, figure, master, rc):
+        self.rc = rc
+        super().__init__(figure, master)
+
+    def draw(self):
+        with matplotlib.rc_context(self.rc):
+            super().draw()
+
+# Espera (ms) desde la última tecla antes de aplicar un nombre editado
+EDIT_DEBOUNCE_MS = 300
+
+class NameIndex:
+    """Índice de búsqueda sobre los nombres de una lista (original y personalizado)
+
+    El texto en minúsculas de cada elemento se calcula una vez y se actualiza
+    solo para el elemento renombrado; una búsqueda devuelve las posiciones
+    que contienen todas las palabras de la consulta.
+    """
+
+    def __init__(self, texts):
+        self.texts = [text.casefold() for text in texts]
+
+    def update(self, position, text):
+        self.texts[position] = text.casefold()
+
+    def search(self, query):
+        terms = query.casefold().split()
+        if not terms:
+            return list(range(len(self.texts)))
+        return [i for i, text in enumerate(self.texts) if all(term in text for term in terms)]
+
+class FilteredListbox:
+    """Listbox que muestra un subconjunto de los elementos (p. ej. el resultado de una búsqueda)
+
+    La selección se guarda por posición del elemento, así que se conserva al
+    cambiar el filtro, y renombrar un elemento solo reemplaza su fila.
+    """
+
+    def __init__(self, listbox):
+        self.listbox = listbox
+        self.items = []
+        self.shown = []
+        self.rows = {}
+        self.hidden_selection = set()
+
+    def set_items(self, items):
+        """Reemplazar todos los elementos (sin filtro ni selección)"""
+        self.items = list(items)
+        self.hidden_selection = set()
+        self.listbox.selection_clear(0, tk.END)
+        self.show(range(len(self.items)))
+
+    def show(self, positions):
+        """Mostrar solo los elementos de positions, manteniendo la selección de todos"""
+        selected = self.selection()
+        self.shown = list(positions)
+        self.rows = {position: row for row, position in enumerate(self.shown)}
+        self.listbox.delete(0, tk.END)
+        if self.shown:
+            # Una sola llamada a Tk para todas las filas
+            self.listbox.insert(tk.END, *[self.items[i] for i in self.shown])
+        for position in selected:
+            if position in self.rows:
+                self.listbox.select_set(self.rows[position])
+        self.hidden_selection = selected - set(self.rows)
+
+    def selection(self):
+        """Posiciones seleccionadas, visibles o no"""
+        return self.hidden_selection | {self.shown[row] for row in self.listbox.curselection()}
+
+    def selected_positions(self):
+        return sorted(self.selection())
+
+    def rename(self, position, text):
+        self.items[position] = text
+        row = self.rows.get(position)
+        if row is None:
+            return
+        selected = self.listbox.selection_includes(row)
+        self.listbox.delete(row)
+        self.listbox.insert(row, text)
+        if selected:
+            self.listbox.select_set(row)
+
+    def select(self, positions):
+        """Agregar positions a la selección (las ocultas por el filtro también)"""
+        for position in positions:
+            if position in self.rows:
+                self.listbox.select_set(self.rows[position])
+            else:
+                self.hidden_selection.add(position)
+
+    def select_all(self):
+        """Seleccionar todos los elementos visibles"""
+        self.listbox.select_set(0, tk.END)
+
+    def deselect_all(self):
+        """Deseleccionar todo, incluso lo oculto por el filtro"""
+        self.hidden_selection = set()
+        self.listbox.selection_clear(0, tk.END)
+
+class VirtualRowEditor:
+    """Editor de nombres que solo crea widgets para las filas visibles
+
+    Un grupo fijo de filas (Label + Entry) se reutiliza al desplazarse, así
+    que el costo no depende del número de columnas del archivo. Los nombres
+    se guardan en names al escribir y on_change(posición) se llama una sola
+    vez por elemento cuando el usuario deja de escribir (EDIT_DEBOUNCE_MS).
+    """
+
+    def __init__(self, master, n_rows, on_change=None, label_width=40, label_chars=35, entry_width=20, pady=1):
+        self.frame = ttk.Frame(master)
+        self.on_change = on_change
+        self.label_chars = label_chars
+        self.keys = []
+        self.names = {}
+        self.shown = []
+        self.first = 0
+        self._pending = set()
+        self._job = None
+        self._loading = False
+
+        rows_frame = ttk.Frame(self.frame)
+        rows_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.rows = []
+        for row in range(n_rows):
+            row_frame = ttk.Frame(rows_frame)
+            row_frame.pack(fill=tk.X, pady=pady)
+            label = ttk.Label(row_frame, width=label_width)
+            label.pack(side=tk.LEFT)
+            var = tk.StringVar()
+            entry = ttk.Entry(row_frame, textvariable=var, width=entry_width)
+            entry.pack(side=tk.LEFT, padx=(10, 0))
+            var.trace_add('write', lambda *args, row=row: self.on_edit(row))
+            for widget in (row_frame, label, entry):
+                widget.bind("<MouseWheel>", lambda e: self.yview('scroll', int(-1 * (e.delta / 120)), 'units'))
+                widget.bind("<Button-4>", lambda e: self.yview('scroll', -1, 'units'))
+                widget.bind("<Button-5>", lambda e: self.yview('scroll', 1, 'units'))
+            self.rows.append((label, entry, var))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def set_items(self, keys, names):
+        """keys: original de cada posición; names: diccionario original -> nombre (se edita en el lugar)
+
+        Los avisos pendientes se descartan: se refieren a posiciones de la
+        lista anterior (los nombres ya quedaron guardados en names).
+        """
+        if self._job is not None:
+            self.frame.after_cancel(self._job)
+            self._job = None
+        self._pending = set()
+        self.keys = list(keys)
+        self.names = names
+        self.show(range(len(self.keys)))
+
+    def show(self, positions):
+        """Editar solo las posiciones dadas (resultado de una búsqueda)"""
+        self.shown = list(positions)
+        self.first = 0
+        self.refresh()
+
+    def refresh(self):
+        """Cargar en las filas los elementos desde self.first"""
+        self._loading = True
+        for row, (label, entry, var) in enumerate(self.rows):
+            i = self.first + row
+            if i < len(self.shown):
+                key = self.keys[self.shown[i]]
+                label.config(text=f"Original: {key[:self.label_chars]}...")
+                entry.config(state="normal")
+                var.set(self.names[key])
+            else:
+                label.config(text="")
+                var.set("")
+                entry.config(state="disabled")
+        self._loading = False
+
+        n = len(self.shown)
+        if n > len(self.rows):
+            self.scrollbar.set(self.first / n, (self.first + len(self.rows)) / n)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def yview(self, *args):
+        """Protocolo de desplazamiento de ttk.Scrollbar ('moveto', fracción) o ('scroll', n, unidad)"""
+        if args[0] == 'moveto':
+            first = int(float(args[1]) * len(self.shown))
+        elif args[0] == 'scroll':
+            step = len(self.rows) if args[2] == 'pages' else 1
+            first = self.first + int(args[1]) * step
+        else:
+            return
+        first = max(0, min(first, len(self.shown) - len(self.rows)))
+        if first != self.first:
+            self.first = first
+            self.refresh()
+
+    def on_edit(self, row):
+        if self._loading or self.first + row >= len(self.shown):
+            return
+        position = self.shown[self.first + row]
+        self.names[self.keys[position]] = self.rows[row][2].get()
+        self._pending.add(position)
+        if self._job is not None:
+            self.frame.after_cancel(self._job)
+        self._job = self.frame.after(EDIT_DEBOUNCE_MS, self.flush)
+
+    def flush(self):
+        """Aplicar ya los cambios pendientes (llamar antes de leer los nombres)"""
+        if self._job is not None:
+            self.frame.after_cancel(self._job)
+            self._job = None
+        pending, self._pending = self._pending, set()
+        if self.on_change:
+            for position in sorted(pending):
+                self.on_change(position)
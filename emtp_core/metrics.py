@@ -0,0 +1,94 @@
+import numpy as np
+
+from .waveform import MinMaxPyramid, visible_index_range
+
+# Fracciones del pico entre las que se mide el tiempo de subida
+RISE_FRACTIONS = (0.1, 0.9)
+# Columnas del resultado (unidades del archivo: V y s)
+METRIC_COLUMNS = ['señal', 'pico', 'tiempo_pico', 'pico_pu', 'cruce_umbral', 'tiempo_subida', 'asentamiento']
+
+def crossing_time(time_values, y, index, level):
+    """Tiempo en que y llega a level entre las muestras index - 1 e index (interpolación lineal)"""
+    if index <= 0:
+        return float(time_values[0])
+    y0, y1 = float(y[index - 1]), float(y[index])
+    t0, t1 = float(time_values[index - 1]), float(time_values[index])
+    if y1 == y0:
+        return t1
+    fraction = min(max((level - y0) / (y1 - y0), 0.0), 1.0)
+    return t0 + fraction * (t1 - t0)
+
+def signal_metrics(time_values, y, pyramid=None, threshold=None, band=None, band_center=0.0, base=None,
+                   start=0, stop=None, rise=RISE_FRACTIONS):
+    """Pico, tiempos de pico, cruce, subida y asentamiento de una señal en [start, stop)
+
+    Cada métrica es una búsqueda en el índice min/max (O(log n)), así que no
+    se recorren las muestras; si no se pasa pyramid se construye uno.
+    - pico: valor con mayor |y| (con su signo) y tiempo_pico su instante.
+    - pico_pu: |pico| / base.
+    - cruce_umbral: primer instante con |y| > threshold.
+    - tiempo_subida: del rise[0] al rise[1] del pico en la dirección del pico.
+    - asentamiento: instante desde el cual y queda en band_center ± band
+      (NaN si al final sigue fuera).
+    Los cruces se interpolan linealmente entre muestras.
+    """
+    if pyramid is None:
+        pyramid = MinMaxPyramid(y)
+    stop = len(y) if stop is None else min(stop, len(y))
+    result = dict.fromkeys(METRIC_COLUMNS[1:], np.nan)
+    if stop <= start:
+        return result
+
+    # Los extremos de la ventana están entre los de su envolvente
+    envelope = pyramid.query(start, stop, 64)
+    peak_index = int(envelope[np.argmax(np.abs(y[envelope]))])
+    peak = float(y[peak_index])
+    result['pico'] = peak
+    result['tiempo_pico'] = float(time_values[peak_index])
+    if base:
+        result['pico_pu'] = abs(peak) / base
+
+    if threshold is not None:
+        index = pyramid.first_outside(-threshold, threshold, start, stop)
+        if index >= 0:
+            level = threshold if y[index] > 0 else -threshold
+            result['cruce_umbral'] = crossing_time(time_values, y, index, level) if index > start \
+                else float(time_values[index])
+
+    if peak != 0:
+        # Primer paso por cada nivel antes del pico, en la dirección del pico
+        times = []
+        for fraction in rise:
+            level = fraction * peak
+            if peak > 0:
+                index = pyramid.first_outside(-np.inf, level, start, peak_index + 1)
+            else:
+                index = pyramid.first_outside(level, np.inf, start, peak_index + 1)
+            times.append(crossing_time(time_values, y, index, level) if index > start
+                         else float(time_values[index]))
+        result['tiempo_subida'] = times[1] - times[0]
+
+    if band is not None:
+        lo, hi = band_center - band, band_center + band
+        index = pyramid.last_outside(lo, hi, start, stop)
+        if index < 0:
+            result['asentamiento'] = float(time_values[start])
+        elif index < stop - 1:
+            # Entrada a la banda entre la última muestra fuera y la siguiente
+            result['asentamiento'] = crossing_time(time_values, y, index + 1, hi if y[index] > hi else lo)
+    return result
+
+def metrics_table(signals, t_start=None, t_stop=None, **options):
+    """DataFrame con las métricas de varias señales en la ventana [t_start, t_stop] (segundos)
+
+    signals es una lista de (nombre, tiempo, valores, índice min/max o None);
+    cada señal usa su propia base de tiempo. options se pasan a signal_metrics.
+    """
+    import pandas as pd
+
+    rows = []
+    for name, time_values, y, pyramid in signals:
+        # Solo muestras dentro de la ventana: el pico no puede caer fuera de ella
+        start, stop = visible_index_range(time_values, t_start, t_stop, pad=False)
+        rows.append({'señal': name, **signal_metrics(time_values, y, pyramid, start=start, stop=stop, **options)})
+    return pd.DataFrame(rows, columns=METRIC_COLUMNS)
@@ -0,0 +1,143 @@
+import os
+
+import numpy as np
+
+from .waveform import MinMaxPyramid, load_signal_file, visible_index_range
+
+# Puntos máximos de la grilla común de una ventana (si no alcanza el paso más fino)
+MAX_GRID_POINTS = 2_000_000
+
+class WaveformCase:
+    """Un archivo de simulación abierto para comparar
+
+    Guarda las columnas del archivo como arreglos propios (vistas del bloque
+    cargado, sin copiar) y construye el índice min/max de una señal solo la
+    primera vez que se grafica.
+    """
+
+    def __init__(self, file_path, df, pyramids=None):
+        self.file_path = file_path
+        self.name = os.path.splitext(os.path.basename(file_path))[0]
+        self.headers = list(df.columns)
+        self.columns = {header: df[header].to_numpy() for header in self.headers}
+        self.time = self.columns[self.headers[0]]
+        self.pyramids = {} if pyramids is None else pyramids
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self.columns.values())
+
+    def pyramid(self, header):
+        """Índice min/max de una columna (perezoso)"""
+        if header not in self.pyramids:
+            self.pyramids[header] = MinMaxPyramid(self.columns[header])
+        return self.pyramids[header]
+
+    def envelope(self, header, n_bins, t_start=None, t_stop=None):
+        """(tiempo, valores) de la envolvente min/max de la ventana [t_start, t_stop] en segundos"""
+        start, stop = visible_index_range(self.time, t_start, t_stop)
+        sample_idx = self.pyramid(header).query(start, stop, n_bins)
+        return self.time[sample_idx], self.columns[header][sample_idx]
+
+    def mean_step(self, t_start=None, t_stop=None):
+        """Paso de tiempo medio dentro de la ventana (O(1): solo mira los extremos)"""
+        start, stop = visible_index_range(self.time, t_start, t_stop)
+        if stop - start < 2:
+            return np.inf
+        return float(self.time[stop - 1] - self.time[start]) / (stop - start - 1)
+
+def load_case(file_path, progress_callback=None, cache=None, dtype=np.float64):
+    return WaveformCase(file_path, load_signal_file(file_path, progress_callback, cache, dtype))
+
+def common_grid(cases, t_start=None, t_stop=None, max_points=MAX_GRID_POINTS):
+    """Grilla de tiempo común a varios casos dentro de la ventana
+
+    Cubre solo el tramo que todos los casos simularon (fuera de él la
+    interpolación inventaría valores) con el paso medio del caso más fino,
+    limitado a max_points puntos.
+    """
+    first = max(float(case.time[0]) for case in cases)
+    last = min(float(case.time[-1]) for case in cases)
+    if t_start is not None:
+        first = max(first, t_start)
+    if t_stop is not None:
+        last = min(last, t_stop)
+    if not last > first:
+        return np.empty(0)
+
+    step = min(case.mean_step(first, last) for case in cases)
+    n_points = int((last - first) / step) + 1 if np.isfinite(step) and step > 0 else 2
+    return np.linspace(first, last, min(max(n_points, 2), max_points))
+
+def interpolate_columns(time, columns, grid):
+    """Interpolación lineal de varias columnas de un mismo archivo sobre grid
+
+    Solo se usa el tramo del archivo que cubre la grilla (una muestra extra a
+    cada lado), así que el costo depende de la ventana y no del archivo
+    completo. Devuelve una matriz (len(grid), columnas) en float64.
+    """
+    result = np.empty((len(grid), len(columns)), order='F')
+    if not len(grid) or not len(time):
+        result[:] = np.nan
+        return result
+
+    start, stop = visible_index_range(time, grid[0], grid[-1])
+    window = time[start:stop]
+    for j, values in enumerate(columns):
+        result[:, j] = np.interp(grid, window, values[start:stop])
+    return result
+
+class WaveformOverlay:
+    """Varios casos abiertos a la vez y su alineación en una grilla común
+
+    La alineación se calcula solo para la ventana pedida y se reutiliza
+    mientras no cambien la ventana ni las señales (p. ej. al cambiar escalas
+    o la leyenda).
+    """
+
+    def __init__(self):
+        self.cases = {}
+        self._aligned_key = None
+        self._aligned = None
+
+    def add(self, case):
+        """Agregar un caso; devuelve su clave (el nombre del archivo, sin repetir)"""
+        key = case.name
+        suffix = 2
+        while key in self.cases:
+            key = f"{case.name} ({suffix})"
+            suffix += 1
+        self.cases[key] = case
+        return key
+
+    def clear(self):
+        self.cases = {}
+        self._aligned_key = None
+        self._aligned = None
+
+    @property
+    def nbytes(self):
+        return sum(case.nbytes for case in self.cases.values())
+
+    def aligned(self, signals, t_start=None, t_stop=None, max_points=MAX_GRID_POINTS):
+        """(grilla, matriz) con las señales [(caso, header), ...] interpoladas en la grilla común"""
+        # La clave guarda los casos (no su id): uno descartado no puede confundirse con otro nuevo
+        key = (tuple((case, len(case), header) for case, header in signals), t_start, t_stop, max_points)
+        if key == self._aligned_key:
+            return self._aligned
+
+        cases = list({id(case): case for case, _ in signals}.values())
+        grid = common_grid(cases, t_start, t_stop, max_points)
+        matrix = np.empty((len(grid), len(signals)), order='F')
+        # Agrupar por caso: una sola búsqueda de posiciones por archivo
+        for case in cases:
+            positions = [j for j, (other, _) in enumerate(signals) if other is case]
+            matrix[:, positions] = interpolate_columns(
+                case.time, [case.columns[signals[j][1]] for j in positions], grid)
+
+        self._aligned_key = key
+        self._aligned = (grid, matrix)
+        return self._aligned
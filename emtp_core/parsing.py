@@ -0,0 +1,147 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+# Por debajo de este tamaño por bloque no compensa repartir el archivo
+MIN_CHUNK_BYTES = 8 * 1024 * 1024
+# Tamaño de cada bloque en la lectura secuencial con memoria acotada
+STREAM_CHUNK_BYTES = 32 * 1024 * 1024
+
+def _chunk_ranges(file_path, n_chunks, start=0, stop=None):
+    """Dividir el archivo (entre start y stop) en rangos de bytes que terminan en un salto de línea"""
+    size = os.path.getsize(file_path) if stop is None else stop
+    bounds = [start]
+    with open(file_path, 'rb') as f:
+        for i in range(1, n_chunks):
+            f.seek(max(start + (size - start) * i // n_chunks, bounds[-1]))
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _read_range(file_path, start, stop):
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return f.read(stop - start)
+
+def _count_rows(file_path, start, stop):
+    """Cota superior de filas del rango (líneas con salto o línea final sin él)"""
+    raw = _read_range(file_path, start, stop)
+    rows = raw.count(b'\n')
+    if raw and not raw.endswith(b'\n'):
+        rows += 1
+    return rows
+
+def _parse_range(file_path, start, stop, usecols):
+    """Parsear un rango con np.loadtxt (mismos valores que leer el archivo completo)"""
+    text = _read_range(file_path, start, stop).decode('latin-1')
+    return np.loadtxt(io.StringIO(text), usecols=usecols, ndmin=2)
+
+def count_columns(file_path):
+    """Número de valores de la primera línea con datos"""
+    with open(file_path, 'rb') as f:
+        for line in f:
+            fields = line.split(b'#', 1)[0].split()
+            if fields:
+                return len(fields)
+    return 0
+
+def parse_float_matrix(file_path, usecols=None, ndmin=0, workers=None, use_threads=False,
+                       min_chunk_bytes=MIN_CHUNK_BYTES, dtype=np.float64, cancel_event=None):
+    """Leer una matriz numérica separada por espacios en paralelo
+
+    El archivo se divide en rangos de bytes alineados a líneas que se
+    parsean en un pool de procesos (o hilos) y se copian en un único arreglo
+    preasignado. usecols y ndmin se comportan como en np.loadtxt: solo se
+    guardan las columnas pedidas y el resultado tiene la misma forma y valores.
+    Con dtype=np.float32 el arreglo final ocupa la mitad (cada bloque se
+    parsea en float64 y se convierte al copiarlo).
+    Si cancel_event se activa se descartan los bloques pendientes y se
+    devuelve None (un archivo pequeño, leído de una vez, no se interrumpe).
+    """
+    if usecols is not None:
+        usecols = list(usecols)
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(file_path)
+    n_chunks = min(workers * 4, size // min_chunk_bytes)
+    if workers <= 1 or n_chunks < 2:
+        return np.loadtxt(file_path, usecols=usecols, ndmin=ndmin, dtype=dtype)
+
+    ranges = _chunk_ranges(file_path, n_chunks)
+    n_cols = len(usecols) if usecols is not None else count_columns(file_path)
+
+    parsed_rows = [0] * len(ranges)
+    executor_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    with executor_class(max_workers=workers) as executor:
+        # Filas por rango para ubicar cada bloque en el arreglo final: se cuentan en el
+        # pool (tareas encoladas antes que el parseo), no en una pasada previa del proceso principal
+        counts = [executor.submit(_count_rows, file_path, start, stop) for start, stop in ranges]
+        futures = {executor.submit(_parse_range, file_path, start, stop, usecols): i
+                   for i, (start, stop) in enumerate(ranges)}
+        offsets = np.concatenate(([0], np.cumsum([future.result() for future in counts])))
+        data = np.empty((offsets[-1], n_cols), dtype=dtype)
+        for future in as_completed(futures):
+            if cancel_event is not None and cancel_event.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return None
+            i = futures[future]
+            block = future.result()
+            if block.size == 0:
+                continue
+            if block.shape[1] != n_cols:
+                raise ValueError(f"Número de columnas inconsistente: {block.shape[1]} en lugar de {n_cols}")
+            data[offsets[i]:offsets[i] + len(block)] = block
+            parsed_rows[i] = len(block)
+
+    # Compactar si hubo líneas vacías o comentarios (filas contadas de más)
+    rows = 0
+    for i, n in enumerate(parsed_rows):
+        if offsets[i] != rows:
+            data[rows:rows + n] = data[offsets[i]:offsets[i] + n]
+        rows += n
+    data = data[:rows]
+
+    # Misma reducción de dimensiones que np.loadtxt
+    if ndmin < 2 and (data.shape[0] == 1 or data.shape[1] == 1):
+        data = data.squeeze()
+        if ndmin == 1:
+            data = np.atleast_1d(data)
+    return data
+
+def complete_lines_size(file_path):
+    """Bytes del archivo hasta el último salto de línea (excluye una última línea a medio escribir)"""
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        position = size
+        while position > 0:
+            block_start = max(position - 65536, 0)
+            f.seek(block_start)
+            block = f.read(position - block_start)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                return block_start + newline + 1
+            position = block_start
+    return 0
+
+def iter_float_chunks(file_path, usecols=None, start=0, stop=None, chunk_bytes=STREAM_CHUNK_BYTES):
+    """Leer la matriz por bloques de filas consecutivas sin cargar el archivo completo
+
+    Lee los bytes [start, stop) (por defecto todo el archivo) y produce
+    (bloque de 2 dimensiones, posición en bytes donde termina el bloque).
+    """
+    if usecols is not None:
+        usecols = list(usecols)
+    size = os.path.getsize(file_path) if stop is None else stop
+    if size <= start:
+        return
+    n_chunks = -(-(size - start) // chunk_bytes)
+    for chunk_start, chunk_stop in _chunk_ranges(file_path, n_chunks, start, size):
+        block = _parse_range(file_path, chunk_start, chunk_stop, usecols)
+        if block.size:
+            yield block, chunk_stop
@@ -0,0 +1,80 @@
+import numpy as np
+
+from .stats import column_chart_summary, compute_column_statistics
+from .waveform import MinMaxPyramid
+
+# Error relativo admitido frente a float64 (épsilon de float32 ~1.2e-7, con margen)
+FLOAT32_RTOL = 1e-6
+
+def storage_dtype(compact):
+    """Tipo de almacenamiento en memoria: float32 si se pidió memoria compacta"""
+    return np.float32 if compact else np.float64
+
+def _relative_error(reference, value, scale):
+    return abs(float(value) - float(reference)) / max(abs(float(scale)), np.finfo(np.float64).tiny)
+
+def statistics_report(data, columns, factor=1.0, include_percentiles=True, rtol=FLOAT32_RTOL):
+    """Comparar las estadísticas y resúmenes de gráficos calculados con float32 y float64
+
+    data son los datos en float64 (referencia). Cada fila del reporte es
+    (columna, estadístico, valor float64, valor float32, error relativo, ok);
+    el error se mide respecto del rango de la columna para que los valores
+    cercanos a cero no lo inflen.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    reference = compute_column_statistics(data, columns, factor, include_percentiles)
+    compact = compute_column_statistics(data.astype(np.float32), columns, factor, include_percentiles)
+
+    rows = []
+    for i, column in enumerate(columns):
+        if column not in reference:
+            continue
+        stats64, stats32 = reference[column], compact[column]
+        scale = max(abs(stats64['max']), abs(stats64['min']))
+        for key, value in stats64.items():
+            error = _relative_error(value, stats32[key], scale)
+            rows.append((column, key, value, stats32[key], error, error <= rtol))
+
+        # Cuartiles y bigotes del boxplot
+        box64 = column_chart_summary(data[:, i], factor)['box']
+        box32 = column_chart_summary(data[:, i].astype(np.float32), factor)['box']
+        for key in ('q1', 'med', 'q3', 'whislo', 'whishi'):
+            error = _relative_error(box64[key], box32[key], scale)
+            rows.append((column, f'boxplot {key}', box64[key], box32[key], error, error <= rtol))
+    return rows
+
+def waveform_report(df, n_bins=1000, rtol=FLOAT32_RTOL):
+    """Comparar señales guardadas en float32 con la referencia float64 (df)
+
+    Por señal: error máximo de las muestras, del pico y de la envolvente
+    min/max de n_bins columnas (la que se dibuja), relativos al pico. La
+    columna de tiempo se mantiene en float64, así que no se compara.
+    """
+    rows = []
+    for header in df.columns[1:]:
+        values = df[header].to_numpy(dtype=np.float64)
+        if not len(values):
+            continue
+        compact = values.astype(np.float32)
+        peak = np.nanmax(np.abs(values))
+        compact_peak = np.nanmax(np.abs(compact))
+
+        # Envolvente: puede elegir otra muestra si hubo empates al redondear
+        envelope = values[MinMaxPyramid(values).query(0, len(values), n_bins)]
+        compact_envelope = compact[MinMaxPyramid(compact).query(0, len(values), n_bins)]
+
+        errors = {
+            'muestras': (peak, peak, np.nanmax(np.abs(compact - values)) / max(peak, np.finfo(np.float64).tiny)),
+            'pico': (peak, compact_peak, _relative_error(peak, compact_peak, peak)),
+            'envolvente': (peak, compact_peak,
+                           np.nanmax(np.abs(compact_envelope - envelope)) / max(peak, np.finfo(np.float64).tiny)),
+        }
+        for key, (value64, value32, error) in errors.items():
+            rows.append((header, key, value64, float(value32), float(error), error <= rtol))
+    return rows
+
+def report_frame(rows):
+    """DataFrame del reporte (para imprimirlo o guardarlo en CSV)"""
+    import pandas as pd
+
+    return pd.DataFrame(rows, columns=['columna', 'estadistico', 'float64', 'float32', 'error_relativo', 'ok'])
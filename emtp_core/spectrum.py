@@ -0,0 +1,218 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from .waveform import visible_index_range
+
+# Valores (señales x muestras) procesados por bloque: acota la memoria con registros largos
+SPECTRUM_CHUNK_VALUES = 1 << 22
+# Muestras máximas de la FFT de una ventana completa (para más, usar Welch o espectrograma)
+MAX_FFT_SAMPLES = 1 << 24
+# Columnas de tiempo máximas de un espectrograma (se aumenta el avance entre segmentos)
+MAX_SPECTROGRAM_COLUMNS = 1000
+# Desviación relativa del paso de tiempo admitida para considerarlo uniforme
+UNIFORM_STEP_RTOL = 1e-3
+# Memoria máxima de los resultados guardados en la caché
+SPECTRUM_CACHE_BYTES = 256 * 1024 * 1024
+
+SPECTRUM_WINDOWS = {
+    'hann': np.hanning,
+    'hamming': np.hamming,
+    'blackman': np.blackman,
+    'rectangular': np.ones,
+}
+
+class UniformTimeBase:
+    """Grilla de tiempo uniforme de la ventana [start, stop) de un archivo
+
+    Si el paso de EMTP no es uniforme en la ventana, las muestras se
+    remuestrean por interpolación lineal con el paso medio, bloque por
+    bloque y solo cuando se piden.
+    """
+
+    def __init__(self, time_values, start, stop):
+        if stop - start < 2:
+            raise ValueError("La ventana tiene menos de dos muestras")
+        self.time = time_values
+        self.start = start
+        self.stop = stop
+        self.n = stop - start
+        self.t0 = float(time_values[start])
+        self.step = (float(time_values[stop - 1]) - self.t0) / (self.n - 1)
+        if not self.step > 0:
+            raise ValueError("El tiempo no es creciente en la ventana")
+        self.fs = 1 / self.step
+        self.uniform = self._is_uniform()
+
+    def _is_uniform(self):
+        # Por bloques para no crear un diff del tamaño de la ventana
+        for first in range(self.start, self.stop - 1, SPECTRUM_CHUNK_VALUES):
+            steps = np.diff(self.time[first:min(first + SPECTRUM_CHUNK_VALUES, self.stop - 1) + 1])
+            if np.max(np.abs(steps - self.step)) > UNIFORM_STEP_RTOL * self.step:
+                return False
+        return True
+
+    def block(self, columns, first, last):
+        """Muestras first..last-1 de la grilla para cada columna (matriz señales x muestras, float64)"""
+        if self.uniform:
+            return np.stack([np.asarray(values[self.start + first:self.start + last], dtype=np.float64)
+                             for values in columns])
+        grid = self.t0 + np.arange(first, last) * self.step
+        i0, i1 = visible_index_range(self.time, grid[0], grid[-1])
+        i0, i1 = max(i0, self.start), min(i1, self.stop)
+        return np.stack([np.interp(grid, self.time[i0:i1], values[i0:i1]) for values in columns])
+
+def _one_sided(values, n, factor=2):
+    """Sumar la mitad negativa del espectro: escalar las frecuencias que aparecen dos veces"""
+    last = values.shape[-1] - 1 if n % 2 == 0 else values.shape[-1]
+    values[..., 1:last] *= factor
+    return values
+
+def amplitude_spectrum(base, columns, window='hann'):
+    """(frecuencias, [amplitud por señal]) de la FFT de toda la ventana
+
+    Las señales se transforman juntas (rfft por filas) en lotes que no
+    superan SPECTRUM_CHUNK_VALUES valores. La amplitud de una senoidal
+    coincide con su valor pico.
+    """
+    n = base.n
+    if n > MAX_FFT_SAMPLES:
+        raise ValueError(f"La ventana tiene {n:,} muestras (máximo {MAX_FFT_SAMPLES:,} para la FFT); "
+                         "reduzca el rango o use Welch")
+    weights = SPECTRUM_WINDOWS[window](n)
+    freqs = np.fft.rfftfreq(n, base.step)
+    batch = max(SPECTRUM_CHUNK_VALUES // n, 1)
+    spectra = []
+    for i in range(0, len(columns), batch):
+        block = base.block(columns[i:i + batch], 0, n)
+        block *= weights
+        amplitude = np.abs(np.fft.rfft(block, axis=1)) / weights.sum()
+        spectra.extend(_one_sided(amplitude, n))
+    return freqs, spectra
+
+def segment_starts(n, nperseg, hop):
+    return np.arange(0, n - nperseg + 1, hop)
+
+def _segment_power(base, columns, starts, nperseg, weights):
+    """Potencia |rfft|^2 de los segmentos que empiezan en starts, por bloques solapados
+
+    Genera (índices de los segmentos, potencia señales x segmentos x frecuencias)
+    leyendo solo el tramo de datos que cubre cada bloque de segmentos.
+    """
+    # Acotar tanto los segmentos del bloque como el tramo leído (con avance mayor que el segmento)
+    per_block = SPECTRUM_CHUNK_VALUES // (len(columns) * nperseg)
+    if len(starts) > 1:
+        span = SPECTRUM_CHUNK_VALUES // len(columns) - nperseg
+        per_block = min(per_block, span // int(starts[1] - starts[0]) + 1)
+    per_block = max(per_block, 1)
+    for i in range(0, len(starts), per_block):
+        block_starts = starts[i:i + per_block]
+        first = int(block_starts[0])
+        data = base.block(columns, first, int(block_starts[-1]) + nperseg)
+        frames = np.lib.stride_tricks.sliding_window_view(data, nperseg, axis=1)[:, block_starts - first]
+        # Sin la componente continua de cada segmento
+        frames = (frames - frames.mean(axis=2, keepdims=True)) * weights
+        yield slice(i, i + len(block_starts)), np.abs(np.fft.rfft(frames, axis=2)) ** 2
+
+def welch_psd(base, columns, nperseg=4096, overlap=0.5, window='hann'):
+    """(frecuencias, [densidad espectral por señal]) promediando segmentos solapados (Welch)"""
+    nperseg = min(int(nperseg), base.n)
+    hop = max(int(nperseg * (1 - overlap)), 1)
+    starts = segment_starts(base.n, nperseg, hop)
+    weights = SPECTRUM_WINDOWS[window](nperseg)
+
+    total = np.zeros((len(columns), nperseg // 2 + 1))
+    for _, power in _segment_power(base, columns, starts, nperseg, weights):
+        total += power.sum(axis=1)
+    psd = _one_sided(total / (len(starts) * base.fs * np.sum(weights ** 2)), nperseg)
+    return np.fft.rfftfreq(nperseg, base.step), list(psd)
+
+def spectrogram(base, columns, nperseg=1024, overlap=0.5, window='hann'):
+    """(tiempos, frecuencias, [densidad espectral frecuencias x tiempos por señal])
+
+    Si los segmentos superan MAX_SPECTROGRAM_COLUMNS se aumenta el avance
+    entre ellos (la resolución temporal se adapta al largo del registro).
+    """
+    nperseg = min(int(nperseg), base.n)
+    hop = max(int(nperseg * (1 - overlap)), 1,
+              -(-(base.n - nperseg) // max(MAX_SPECTROGRAM_COLUMNS - 1, 1)))
+    starts = segment_starts(base.n, nperseg, hop)
+    weights = SPECTRUM_WINDOWS[window](nperseg)
+
+    result = np.empty((len(columns), nperseg // 2 + 1, len(starts)))
+    scale = 1 / (base.fs * np.sum(weights ** 2))
+    for segments, power in _segment_power(base, columns, starts, nperseg, weights):
+        result[:, :, segments] = _one_sided(power * scale, nperseg).transpose(0, 2, 1)
+    times = base.t0 + (starts + nperseg / 2) * base.step
+    return times, np.fft.rfftfreq(nperseg, base.step), list(result)
+
+SPECTRUM_FUNCTIONS = {
+    'fft': amplitude_spectrum,
+    'welch': welch_psd,
+    'spectrogram': spectrogram,
+}
+
+class SpectrumCache:
+    """Resultados por (señal, tipo, parámetros, rango); descarta primero los menos usados"""
+
+    def __init__(self, max_bytes=SPECTRUM_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+
+    @staticmethod
+    def _size(result):
+        return sum(np.asarray(part).nbytes for part in result)
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is not None:
+            self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        if key in self.entries:
+            self.nbytes -= self._size(self.entries.pop(key))
+        self.entries[key] = result
+        self.nbytes += self._size(result)
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= self._size(old)
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+def compute_spectra(kind, time_values, columns, start=0, stop=None, cache=None, **options):
+    """Espectros de varias señales que comparten la base de tiempo
+
+    columns es un diccionario nombre -> valores. Devuelve nombre -> resultado
+    (las tuplas de amplitude_spectrum, welch_psd o spectrogram para una señal).
+    Solo se calculan, en un único lote, las señales que no están en la caché.
+    La caché identifica la ventana por su primer instante y su número de
+    muestras, así que time_values y columns pueden ser el archivo completo o
+    solo el tramo visible (con start=0).
+    """
+    stop = len(time_values) if stop is None else stop
+    params = tuple(sorted(options.items()))
+    window = (float(time_values[start]) if stop > start else None, stop - start)
+    keys = {name: (name, kind, params, *window) for name in columns}
+
+    results = {}
+    missing = []
+    for name, key in keys.items():
+        cached = cache.get(key) if cache is not None else None
+        if cached is None:
+            missing.append(name)
+        else:
+            results[name] = cached
+
+    if missing:
+        base = UniformTimeBase(time_values, start, stop)
+        computed = SPECTRUM_FUNCTIONS[kind](base, [columns[name] for name in missing], **options)
+        *axes, values = computed
+        for name, value in zip(missing, values):
+            results[name] = (*axes, value)
+            if cache is not None:
+                cache.put(keys[name], results[name])
+    return {name: results[name] for name in columns}
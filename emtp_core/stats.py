@@ -0,0 +1,98 @@
+import numpy as np
+
+# Valores por tramo de columnas al acumular desviaciones en float64
+ACCUMULATE_CHUNK_VALUES = 1 << 22
+
+def _sorted_quantile(sorted_data, counts, q):
+    """Cuantil q de cada columna ya ordenada (interpolación lineal, como np.percentile)"""
+    position = q * (counts - 1)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, counts - 1)
+    fraction = position - lower
+    columns = np.arange(sorted_data.shape[1])
+    low_values = sorted_data[lower, columns]
+    high_values = sorted_data[upper, columns]
+    return low_values + (high_values - low_values) * fraction
+
+def compute_column_statistics(data, columns, factor=1.0, include_percentiles=False):
+    """Calcular las estadísticas de todas las columnas de una vez
+
+    Usa reducciones vectorizadas por columna y un único ordenamiento para la
+    mediana y los percentiles. Los NaN se ignoran (equivale a dropna). Devuelve
+    {columna: stats} con las claves que usan los gráficos y los resúmenes CSV,
+    ya convertidas con factor; las columnas sin datos válidos se omiten.
+    Datos float32 se ordenan en float32 pero media y varianza se acumulan en float64.
+    """
+    data = np.asarray(data)
+    if data.dtype not in (np.float32, np.float64):
+        data = data.astype(np.float64)
+    sorted_data = np.sort(data.reshape(len(data), -1), axis=0)
+    valid = ~np.isnan(sorted_data)
+    counts = valid.sum(axis=0)
+    has_data = counts > 0
+    safe_counts = np.maximum(counts, 1)
+
+    # Los NaN quedan al final del ordenamiento y se excluyen con where
+    mean = np.sum(sorted_data, axis=0, dtype=np.float64, where=valid) / safe_counts
+    # Desviaciones en float64 por tramos de columnas (sin una copia float64 completa)
+    m2 = np.empty(sorted_data.shape[1])
+    step = max(ACCUMULATE_CHUNK_VALUES // max(len(sorted_data), 1), 1)
+    for start in range(0, sorted_data.shape[1], step):
+        part = slice(start, start + step)
+        deviation = sorted_data[:, part] - mean[part]
+        m2[part] = np.sum(deviation ** 2, axis=0, where=valid[:, part])
+    std = np.sqrt(m2 / safe_counts)
+
+    last = np.maximum(counts - 1, 0)
+    column_idx = np.arange(sorted_data.shape[1])
+    results = {
+        'mean': mean * factor,
+        'median': _sorted_quantile(sorted_data, safe_counts, 0.5) * factor,
+        'std': std * abs(factor),
+        'min': sorted_data[0] * factor,
+        'max': sorted_data[last, column_idx] * factor,
+    }
+    if include_percentiles:
+        results['25%'] = _sorted_quantile(sorted_data, safe_counts, 0.25) * factor
+        results['75%'] = _sorted_quantile(sorted_data, safe_counts, 0.75) * factor
+
+    statistics = {}
+    for i, column in enumerate(columns):
+        if not has_data[i]:
+            continue
+        stats = {key: values[i] for key, values in results.items() if '%' not in key}
+        stats['count'] = int(counts[i])
+        stats.update({key: values[i] for key, values in results.items() if '%' in key})
+        statistics[column] = stats
+    return statistics
+
+def column_chart_summary(values, factor=1.0, n_bins=20):
+    """Histograma y resumen de boxplot de una columna, calculados en sus unidades originales
+
+    Solo los resultados (bordes, cuartiles, bigotes y atípicos) se convierten
+    con factor: la columna no se copia para cambiar de unidad. Mismos valores
+    que ax.hist(bins=n_bins) y ax.boxplot, en el formato de
+    StreamingStatistics.chart_summary. Los NaN se ignoran.
+    """
+    values = np.asarray(values)
+    valid = ~np.isnan(values)
+    if not valid.all():
+        values = values[valid]
+
+    counts, edges = np.histogram(values, bins=n_bins)
+    edges = edges.astype(np.float64)
+    q1, median, q3 = np.percentile(values, [25, 50, 75]).astype(np.float64)
+    iqr = q3 - q1
+    # Bigotes: extremos de los datos dentro de 1.5 IQR (como matplotlib.cbook.boxplot_stats)
+    whislo = np.min(values, where=values >= q1 - 1.5 * iqr, initial=np.inf)
+    whishi = np.max(values, where=values <= q3 + 1.5 * iqr, initial=-np.inf)
+    whislo = min(whislo, q1)
+    whishi = max(whishi, q3)
+    fliers = values[(values < whislo) | (values > whishi)]
+
+    box = {
+        'med': median * factor, 'q1': q1 * factor, 'q3': q3 * factor,
+        'whislo': whislo * factor, 'whishi': whishi * factor,
+        'fliers': fliers * factor,
+    }
+    return {'histogram': (counts, edges * factor), 'box': box}
@@ -0,0 +1,403 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .parsing import STREAM_CHUNK_BYTES, complete_lines_size, iter_float_chunks
+from .stats import _sorted_quantile
+
+# Parámetro de precisión del sketch de cuantiles (error de rango ~ 1/k)
+SKETCH_K = 1024
+# Bins finos por columna del histograma adaptativo (debe ser par)
+HISTOGRAM_BINS = 1024
+# Bytes del archivo (al inicio y antes de la posición leída) que identifican los datos ya procesados
+SIGNATURE_BYTES = 65536
+
+class QuantileSketch:
+    """Sketch de cuantiles tipo KLL para varias columnas a la vez
+
+    Todas las columnas reciben el mismo número de valores, así que cada nivel
+    del compactador es un arreglo (elementos, columnas) y se compacta de forma
+    vectorizada. Un elemento del nivel h representa 2**h valores. Mientras no
+    se compacta nada los cuantiles son exactos.
+    """
+
+    def __init__(self, n_columns, k=SKETCH_K, seed=0):
+        self.n_columns = n_columns
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.empty((0, n_columns))]
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(self.k * (2 / 3) ** depth), 2)
+
+    def is_exact(self):
+        return len(self.levels) == 1
+
+    def update(self, block):
+        self.levels[0] = np.concatenate((self.levels[0], block))
+        self._compress()
+
+    def merge(self, other):
+        """Combinar otro sketch de las mismas columnas"""
+        for h, items in enumerate(other.levels):
+            if h == len(self.levels):
+                self.levels.append(np.empty((0, self.n_columns)))
+            self.levels[h] = np.concatenate((self.levels[h], items))
+        self._compress()
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) <= self.capacity(h):
+                h += 1
+                continue
+            # Ordenar, conservar un elemento si el número es impar y promover la mitad
+            items = np.sort(items, axis=0)
+            n_even = len(items) - len(items) % 2
+            offset = int(self.rng.integers(2))
+            promoted = items[offset:n_even:2]
+            self.levels[h] = items[n_even:]
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty((0, self.n_columns)))
+            self.levels[h + 1] = np.concatenate((self.levels[h + 1], promoted))
+            # La capacidad de los niveles inferiores cambia si se creó uno nuevo
+            h = 0
+
+    def items(self):
+        """Elementos retenidos y su peso (cantidad de valores que representa cada uno)"""
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        return np.concatenate(self.levels), weights
+
+    def quantiles(self, qs):
+        """Cuantiles qs de cada columna, arreglo (len(qs), columnas); NaN se ignoran"""
+        items, weights = self.items()
+        sorted_items = np.sort(items, axis=0)
+        valid = ~np.isnan(sorted_items)
+        counts = valid.sum(axis=0)
+        safe_counts = np.maximum(counts, 1)
+
+        if self.is_exact():
+            # Misma interpolación lineal que compute_column_statistics
+            return np.array([_sorted_quantile(sorted_items, safe_counts, q) for q in qs])
+
+        order = np.argsort(items, axis=0)
+        sorted_weights = np.where(valid, weights[order], 0.0)
+        cumulative = np.cumsum(sorted_weights, axis=0)
+        total = cumulative[-1]
+        last = np.maximum(counts - 1, 0)
+        column_idx = np.arange(self.n_columns)
+
+        results = []
+        for q in qs:
+            # Primer elemento cuyo peso acumulado alcanza q del total
+            position = (cumulative < q * total).sum(axis=0)
+            position = np.minimum(position, last)
+            results.append(sorted_items[position, column_idx])
+        return np.array(results)
+
+class StreamingHistogram:
+    """Histograma de bins finos por columna que se amplía a medida que llegan datos
+
+    Cada columna tiene su origen y ancho de bin. Si un valor cae fuera del
+    rango se duplica el ancho (sumando bins de a pares) hasta cubrirlo.
+    """
+
+    def __init__(self, n_columns, n_bins=HISTOGRAM_BINS):
+        self.n_bins = n_bins
+        self.origin = np.full(n_columns, np.nan)
+        self.width = np.full(n_columns, np.nan)
+        self.counts = np.zeros((n_columns, n_bins), dtype=np.int64)
+
+    def _widen(self, column, low, high):
+        """Duplicar el ancho de bin de una columna hasta cubrir [low, high]"""
+        half = self.n_bins // 2
+        while low < self.origin[column] or high >= self.origin[column] + self.n_bins * self.width[column]:
+            merged = self.counts[column].reshape(half, 2).sum(axis=1)
+            self.counts[column] = 0
+            if low < self.origin[column]:
+                # Ampliar hacia la izquierda: los bins actuales pasan a la mitad derecha
+                self.origin[column] -= self.n_bins * self.width[column]
+                self.counts[column, half:] = merged
+            else:
+                self.counts[column, :half] = merged
+            self.width[column] *= 2
+
+    def update(self, block):
+        valid = ~np.isnan(block)
+        has_data = valid.any(axis=0)
+        low = np.where(valid, block, np.inf).min(axis=0)
+        high = np.where(valid, block, -np.inf).max(axis=0)
+
+        # Primer bloque con datos: el rango inicial cubre exactamente el bloque
+        new = has_data & np.isnan(self.origin)
+        span = np.where(high > low, high - low, np.maximum(np.abs(low), 1.0) * 1e-6)
+        self.origin = np.where(new, low, self.origin)
+        self.width = np.where(new, span * (1 + 1e-9) / self.n_bins, self.width)
+
+        top = self.origin + self.n_bins * self.width
+        for column in np.flatnonzero(has_data & ((low < self.origin) | (high >= top))):
+            self._widen(column, low[column], high[column])
+
+        idx = np.floor((block - self.origin) / self.width)
+        idx = np.clip(np.nan_to_num(idx), 0, self.n_bins - 1).astype(np.intp)
+        flat = (idx + np.arange(block.shape[1]) * self.n_bins)[valid]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other):
+        """Combinar otro histograma de las mismas columnas"""
+        for column in range(len(self.origin)):
+            if np.isnan(other.origin[column]):
+                continue
+            other_edges = other.origin[column] + other.width[column] * np.arange(other.n_bins + 1)
+            other_counts = other.counts[column]
+            if np.isnan(self.origin[column]):
+                self.origin[column] = other.origin[column]
+                self.width[column] = other.width[column]
+            nonzero = np.flatnonzero(other_counts)
+            if not len(nonzero):
+                continue
+            self._widen(column, other_edges[nonzero[0]], other_edges[nonzero[-1] + 1] * (1 - 1e-12))
+            # Cada bin del otro histograma se asigna al bin propio que contiene su centro
+            centers = (other_edges[nonzero] + other_edges[nonzero + 1]) / 2
+            idx = np.floor((centers - self.origin[column]) / self.width[column]).astype(np.intp)
+            np.add.at(self.counts[column], np.clip(idx, 0, self.n_bins - 1), other_counts[nonzero])
+
+    def chart_histogram(self, column, low, high, n_bins=20):
+        """Conteos en n_bins bins iguales entre low y high (reparto lineal dentro de cada bin fino)"""
+        edges = np.linspace(low, high, n_bins + 1)
+        fine_edges = self.origin[column] + self.width[column] * np.arange(self.n_bins + 1)
+        cumulative = np.concatenate(([0], np.cumsum(self.counts[column])))
+        counts = np.diff(np.interp(edges, fine_edges, cumulative))
+        return counts, edges
+
+class StreamingStatistics:
+    """Estadísticas de varias columnas acumuladas en una sola pasada
+
+    count, media, desviación estándar, mínimo y máximo son exactos (media y
+    varianza con el método de Welford/Chan por bloques); mediana y
+    percentiles salen del sketch de cuantiles y los histogramas de los bins
+    finos, con memoria acotada independiente del número de filas.
+    """
+
+    def __init__(self, n_columns, k=SKETCH_K, histogram_bins=HISTOGRAM_BINS, seed=0):
+        self.n_columns = n_columns
+        self.count = np.zeros(n_columns, dtype=np.int64)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+        self.sketch = QuantileSketch(n_columns, k, seed)
+        self.histogram = StreamingHistogram(n_columns, histogram_bins)
+
+    def _merge_moments(self, count, mean, m2):
+        total = self.count + count
+        safe_total = np.maximum(total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / safe_total
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * count / safe_total
+        self.count = total
+
+    def update(self, block):
+        """Agregar un bloque de filas (arreglo filas x columnas)"""
+        block = np.asarray(block, dtype=np.float64).reshape(len(block), -1)
+        valid = ~np.isnan(block)
+        count = valid.sum(axis=0)
+        filled = np.where(valid, block, 0.0)
+        mean = filled.sum(axis=0) / np.maximum(count, 1)
+        m2 = (np.where(valid, block - mean, 0.0) ** 2).sum(axis=0)
+        self._merge_moments(count, mean, m2)
+
+        self.min = np.minimum(self.min, np.where(valid, block, np.inf).min(axis=0))
+        self.max = np.maximum(self.max, np.where(valid, block, -np.inf).max(axis=0))
+        self.sketch.update(block)
+        self.histogram.update(block)
+
+    def merge(self, other):
+        """Combinar las estadísticas de otro conjunto de filas de las mismas columnas"""
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+
+    def statistics(self, columns, factor=1.0, include_percentiles=False):
+        """Mismo diccionario {columna: stats} que compute_column_statistics"""
+        qs = [0.5, 0.25, 0.75] if include_percentiles else [0.5]
+        # Los cuantiles aproximados se limitan al rango exacto de los datos
+        quantiles = np.clip(self.sketch.quantiles(qs), self.min, self.max)
+        std = np.sqrt(self.m2 / np.maximum(self.count, 1))
+
+        statistics = {}
+        for i, column in enumerate(columns):
+            if self.count[i] == 0:
+                continue
+            stats = {
+                'mean': self.mean[i] * factor,
+                'median': quantiles[0, i] * factor,
+                'std': std[i] * abs(factor),
+                'min': self.min[i] * factor,
+                'max': self.max[i] * factor,
+                'count': int(self.count[i]),
+            }
+            if include_percentiles:
+                stats['25%'] = quantiles[1, i] * factor
+                stats['75%'] = quantiles[2, i] * factor
+            statistics[column] = stats
+        return statistics
+
+    def chart_summary(self, column_index, factor=1.0, n_bins=20):
+        """Histograma y resumen de boxplot de una columna, ya convertidos con factor
+
+        Los valores atípicos del boxplot son los elementos del sketch fuera de
+        los bigotes (una muestra representativa, no todos los valores).
+        """
+        low, high = self.min[column_index], self.max[column_index]
+        counts, edges = self.histogram.chart_histogram(column_index, low, high, n_bins)
+
+        q1, median, q3 = np.clip(self.sketch.quantiles([0.25, 0.5, 0.75])[:, column_index], low, high)
+        iqr = q3 - q1
+        items, _ = self.sketch.items()
+        items = items[:, column_index]
+        items = np.concatenate((items[~np.isnan(items)], [low, high]))
+        inside = items[(items >= q1 - 1.5 * iqr) & (items <= q3 + 1.5 * iqr)]
+        fliers = np.unique(items[(items < q1 - 1.5 * iqr) | (items > q3 + 1.5 * iqr)])
+
+        box = {
+            'med': median * factor, 'q1': q1 * factor, 'q3': q3 * factor,
+            'whislo': inside.min() * factor, 'whishi': inside.max() * factor,
+            'fliers': fliers * factor,
+        }
+        return {'histogram': (counts, edges * factor), 'box': box}
+
+    def save(self, path, meta=None):
+        """Guardar el estado completo (y metadatos JSON) en un .npz, de forma atómica"""
+        arrays = {
+            'count': self.count, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max,
+            'histogram_origin': self.histogram.origin, 'histogram_width': self.histogram.width,
+            'histogram_counts': self.histogram.counts,
+        }
+        for h, items in enumerate(self.sketch.levels):
+            arrays[f'sketch_level_{h}'] = items
+        state = {
+            'n_columns': self.n_columns,
+            'k': self.sketch.k,
+            'n_levels': len(self.sketch.levels),
+            'rng': self.sketch.rng.bit_generator.state,
+            'meta': meta or {},
+        }
+        arrays['state'] = np.array(json.dumps(state))
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Leer un estado guardado con save; devuelve (estadísticas, metadatos)"""
+        with np.load(path) as arrays:
+            state = json.loads(str(arrays['state']))
+            statistics = cls(state['n_columns'], state['k'], arrays['histogram_counts'].shape[1])
+            statistics.count = arrays['count']
+            statistics.mean = arrays['mean']
+            statistics.m2 = arrays['m2']
+            statistics.min = arrays['min']
+            statistics.max = arrays['max']
+            statistics.histogram.origin = arrays['histogram_origin']
+            statistics.histogram.width = arrays['histogram_width']
+            statistics.histogram.counts = arrays['histogram_counts']
+            statistics.sketch.levels = [arrays[f'sketch_level_{h}'] for h in range(state['n_levels'])]
+        statistics.sketch.rng.bit_generator.state = state['rng']
+        return statistics, state['meta']
+
+def file_signature(file_path, position):
+    """Huella de los bytes ya procesados: el inicio del archivo y lo anterior a position"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(min(SIGNATURE_BYTES, position)))
+        tail_start = max(position - SIGNATURE_BYTES, 0)
+        f.seek(tail_start)
+        digest.update(f.read(position - tail_start))
+    return digest.hexdigest()
+
+def stream_file_statistics(file_path, usecols, chunk_bytes=STREAM_CHUNK_BYTES, k=SKETCH_K,
+                           cancel_event=None, log=None, statistics=None, start=0, stop=None):
+    """Estadísticas de las columnas usecols de un archivo, leído por bloques en una pasada
+
+    Con statistics y start se continúa un estado anterior leyendo solo desde
+    el byte start. Devuelve (estadísticas, byte hasta donde se leyó).
+    """
+    if statistics is None:
+        statistics = StreamingStatistics(len(usecols), k)
+    size = os.path.getsize(file_path) if stop is None else stop
+    reported = 0
+    position = start
+    for block, chunk_stop in iter_float_chunks(file_path, usecols, start, size, chunk_bytes):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        statistics.update(block)
+        position = chunk_stop
+        # Informar el avance cada 10% de lo que hay que leer
+        done = (position - start) * 10 // max(size - start, 1)
+        if log and done > reported:
+            reported = done
+            log(f"Leídos {(position - start) / 1e6:.0f} de {(size - start) / 1e6:.0f} MB "
+                f"({statistics.count.max():,} filas)")
+    return statistics, position
+
+def update_file_statistics(file_path, usecols, state_path, chunk_bytes=STREAM_CHUNK_BYTES,
+                           cancel_event=None, log=None):
+    """Estadísticas incrementales: leer solo las filas agregadas desde el último estado guardado
+
+    El estado en state_path se reutiliza si corresponde al mismo archivo y
+    columnas y los bytes ya procesados no cambiaron (el archivo solo creció);
+    si no, se recalcula desde el inicio. Una última línea a medio escribir se
+    deja para la próxima actualización.
+    Devuelve (estadísticas, metadatos del estado anterior, filas nuevas, cancelado).
+    """
+    source = os.path.abspath(file_path)
+    stop = complete_lines_size(file_path)
+    statistics, meta, start = None, {}, 0
+    if os.path.exists(state_path):
+        try:
+            statistics, meta = StreamingStatistics.load(state_path)
+        except (OSError, ValueError, KeyError) as e:
+            if log:
+                log(f"⚠️  Estado incremental ilegible, se recalcula: {e}")
+            statistics, meta = None, {}
+
+    if statistics is not None:
+        offset = meta.get('offset', 0)
+        if (meta.get('source') != source or meta.get('usecols') != list(usecols)
+                or offset > stop or meta.get('signature') != file_signature(file_path, offset)):
+            if log:
+                log("El archivo o las columnas cambiaron: se recalcula el estado incremental")
+            statistics, meta = None, {}
+        else:
+            start = offset
+
+    previous_rows = int(statistics.count.max()) if statistics is not None and statistics.n_columns else 0
+    if log and start:
+        log(f"Estado incremental: {previous_rows:,} filas ya procesadas, "
+            f"{(stop - start) / 1e6:.1f} MB nuevos")
+    statistics, position = stream_file_statistics(file_path, usecols, chunk_bytes, cancel_event=cancel_event,
+                                                  log=log, statistics=statistics, start=start, stop=stop)
+    cancelled = cancel_event is not None and cancel_event.is_set()
+
+    # También se guarda lo leído antes de una cancelación (hasta el último bloque completo)
+    meta.update({
+        'source': source,
+        'usecols': list(usecols),
+        'offset': position,
+        'signature': file_signature(file_path, position),
+    })
+    if not start:
+        # Los gráficos guardados corresponden a otros datos
+        meta.pop('charts', None)
+    statistics.save(state_path, meta)
+    new_rows = (int(statistics.count.max()) if statistics.n_columns else 0) - previous_rows
+    return statistics, meta, new_rows, cancelled
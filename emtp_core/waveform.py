@@ -0,0 +1,487 @@
+import os
+
+import numpy as np
+
+from .parsing import complete_lines_size, iter_float_chunks
+
+# Filas por bloque al leer el cuerpo numérico (se ajusta al número de columnas)
+LOAD_CHUNK_VALUES = 1_000_000
+# Tamaño del bloque binario usado para contar líneas
+COUNT_BLOCK_BYTES = 16 * 1024 * 1024
+# Valores por tramo en argmin/argmax: numpy copia completo un arreglo de solo
+# lectura (las columnas de un DataFrame), así la copia queda acotada
+ARG_CHUNK_VALUES = 1 << 18
+
+def sniff_headers(file_path):
+    """Leer solo las primeras líneas del archivo y devolver (headers, línea de inicio de datos)"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        skipped = 0
+        line1 = file.readline()
+        while line1 and not line1.strip():
+            skipped += 1
+            line1 = file.readline()
+        line2 = file.readline()
+    
+    if not line1:
+        raise ValueError("El archivo está vacío")
+    
+    # Extraer headers (primera línea)
+    header1 = line1.lstrip().rstrip('\r\n').split('\t')
+    line2 = line2.rstrip('\r\n')
+    
+    # Si hay segunda línea de headers, combinarla
+    if line2 and any(word in line2.lower() for word in ['time', 'voltage', 's)', 'v)']):
+        header2 = line2.split('\t')
+        headers = []
+        for h1, h2 in zip(header1, header2):
+            combined = f'{h1.strip()} {h2.strip()}' if h2.strip() else h1.strip()
+            headers.append(combined.strip())
+        data_start = skipped + 2
+    else:
+        headers = [h.strip() for h in header1]
+        data_start = skipped + 1
+    
+    return headers, data_start
+
+def count_lines(file_path):
+    """Contar líneas leyendo bloques binarios (sin cargar el archivo completo)"""
+    count = 0
+    last = b''
+    with open(file_path, 'rb') as file:
+        while True:
+            block = file.read(COUNT_BLOCK_BYTES)
+            if not block:
+                break
+            count += block.count(b'\n')
+            last = block
+    # Última línea sin salto final
+    if last and not last.endswith(b'\n'):
+        count += 1
+    return count
+
+def signal_frame(headers, data, time_values=None):
+    """DataFrame que envuelve las columnas sin copiarlas
+    
+    Con time_values (float64) data contiene solo las señales, p. ej. en float32.
+    """
+    import pandas as pd
+    
+    if time_values is None:
+        return pd.DataFrame(data, columns=headers, copy=False)
+    # Un bloque por columna: el tiempo conserva float64 y las señales su propio tipo
+    columns = [time_values] + [data[:, i] for i in range(data.shape[1])]
+    df = pd.DataFrame(dict(enumerate(columns)), copy=False)
+    df.columns = headers
+    return df
+
+def load_signal_file(file_path, progress_callback=None, cache=None, dtype=np.float64):
+    """Cargar un TXT de EMTP por bloques en columnas preasignadas
+    
+    Devuelve un DataFrame que envuelve el arreglo final sin copiarlo.
+    progress_callback(filas_leidas, filas_totales) se llama tras cada bloque.
+    Si se pasa una ColumnCache, las aperturas siguientes usan el binario mapeado.
+    Con dtype=np.float32 las señales ocupan la mitad; la columna de tiempo
+    sigue en float64 para no perder resolución en simulaciones largas.
+    """
+    # Importación diferida: pandas solo hace falta al cargar un archivo
+    import pandas as pd
+    
+    compact = np.dtype(dtype) != np.float64
+    variant = f'signals_{np.dtype(dtype).name}' if compact else 'signals'
+    if cache is not None:
+        cached = cache.get(file_path, variant=variant)
+        cached_time = cache.get(file_path, variant='signals_time') if compact else None
+        if cached is not None and (not compact or cached_time is not None):
+            data, meta = cached
+            return signal_frame(meta['headers'], data, cached_time[0] if compact else None)
+    
+    headers, data_start = sniff_headers(file_path)
+    n_cols = len(headers)
+    
+    # Cota superior de filas (las líneas vacías se descartan al final)
+    max_rows = max(count_lines(file_path) - data_start, 0)
+    
+    # Orden Fortran: cada columna queda contigua en memoria
+    data = np.empty((max_rows, n_cols - 1 if compact else n_cols), dtype=dtype, order='F')
+    time_values = np.empty(max_rows) if compact else None
+    chunk_rows = max(1000, LOAD_CHUNK_VALUES // max(n_cols, 1))
+    
+    rows = 0
+    with open(file_path, 'r', encoding='utf-8') as file:
+        reader = pd.read_csv(file, sep='\t', names=headers, header=None, index_col=False,
+                             skiprows=data_start, dtype=np.float64, chunksize=chunk_rows)
+        for chunk in reader:
+            n = len(chunk)
+            # Cada bloque se parsea en float64 y se convierte al copiarlo
+            values = chunk.to_numpy(dtype=np.float64)
+            if compact:
+                time_values[rows:rows + n] = values[:, 0]
+                data[rows:rows + n] = values[:, 1:]
+            else:
+                data[rows:rows + n] = values
+            rows += n
+            if progress_callback:
+                progress_callback(rows, max_rows)
+    
+    data = data[:rows]
+    if compact:
+        time_values = time_values[:rows]
+    if cache is not None:
+        cache.put(file_path, data, {'headers': headers}, variant=variant)
+        if compact:
+            cache.put(file_path, time_values, variant='signals_time')
+    
+    return signal_frame(headers, data, time_values)
+
+class SignalFollower:
+    """Lectura incremental de un TXT de EMTP que la simulación todavía está escribiendo
+    
+    Cada poll parsea solo los bytes agregados desde la última lectura (hasta
+    el último salto de línea) y los agrega a columnas que crecen con capacidad
+    duplicada. Si el archivo se acorta (simulación reiniciada) se vuelve a leer.
+    Con dtype=np.float32 las señales se guardan como en load_signal_file.
+    """
+    
+    def __init__(self, file_path, dtype=np.float64):
+        self.file_path = file_path
+        self.headers, data_start = sniff_headers(file_path)
+        with open(file_path, 'rb') as f:
+            for _ in range(data_start):
+                f.readline()
+            self.data_offset = f.tell()
+        self.offset = self.data_offset
+        # Orden Fortran como load_signal_file: cada columna contigua
+        self.compact = np.dtype(dtype) != np.float64
+        n_cols = len(self.headers) - 1 if self.compact else len(self.headers)
+        self.buffer = GrowableArray(n_cols, dtype=dtype, order='F')
+        self.time_buffer = GrowableArray() if self.compact else None
+    
+    def poll(self):
+        """Leer las filas nuevas; devuelve (filas agregadas, True si se volvió a leer desde el inicio)"""
+        restarted = os.path.getsize(self.file_path) < self.offset
+        if restarted:
+            self.buffer.truncate(0)
+            if self.compact:
+                self.time_buffer.truncate(0)
+            self.offset = self.data_offset
+        
+        stop = complete_lines_size(self.file_path)
+        previous_rows = self.buffer.size
+        for block, position in iter_float_chunks(self.file_path, start=self.offset, stop=stop):
+            if block.shape[1] != len(self.headers):
+                raise ValueError(f"Número de columnas inconsistente: {block.shape[1]} en lugar de {len(self.headers)}")
+            if self.compact:
+                self.time_buffer.append(block[:, 0])
+                self.buffer.append(block[:, 1:])
+            else:
+                self.buffer.append(block)
+        self.offset = max(stop, self.offset)
+        return self.buffer.size - previous_rows, restarted
+    
+    def frame(self):
+        """DataFrame que envuelve las filas leídas sin copiarlas"""
+        return signal_frame(self.headers, self.buffer.data, self.time_buffer.data if self.compact else None)
+
+def block_arg_extremes(blocks):
+    """Índices (dentro de cada fila) del mínimo y máximo de cada fila, por tramos de filas"""
+    step = max(ARG_CHUNK_VALUES // max(blocks.shape[1], 1), 1)
+    idx_min = np.empty(len(blocks), dtype=np.intp)
+    idx_max = np.empty(len(blocks), dtype=np.intp)
+    for start in range(0, len(blocks), step):
+        part = blocks[start:start + step]
+        idx_min[start:start + step] = part.argmin(axis=1)
+        idx_max[start:start + step] = part.argmax(axis=1)
+    return idx_min, idx_max
+
+def minmax_envelope_indices(y, n_bins):
+    """Índices del mínimo y máximo de cada columna de píxel, en orden temporal
+    
+    Conserva exactamente los picos y transitorios rápidos: cada grupo de
+    muestras se reduce a su mínimo y su máximo.
+    """
+    n = len(y)
+    if n_bins <= 0 or n <= 2 * n_bins:
+        return np.arange(n)
+    
+    # Grupos de igual tamaño (el resto forma un grupo final más corto)
+    bucket = n // n_bins
+    main = bucket * n_bins
+    blocks = y[:main].reshape(n_bins, bucket)
+    offsets = np.arange(n_bins) * bucket
+    idx_min, idx_max = block_arg_extremes(blocks)
+    idx_min += offsets
+    idx_max += offsets
+    
+    if main < n:
+        tail = y[main:]
+        idx_min = np.append(idx_min, main + tail.argmin())
+        idx_max = np.append(idx_max, main + tail.argmax())
+    
+    # Mínimo y máximo de cada grupo ordenados en el tiempo
+    pairs = np.sort(np.column_stack((idx_min, idx_max)), axis=1)
+    return pairs.ravel()
+
+class GrowableArray:
+    """Arreglo que crece por filas duplicando su capacidad (agregar es O(1) amortizado)
+    
+    data es una vista de las filas ocupadas; un append que realoca la deja
+    desactualizada, así que hay que volver a pedirla.
+    """
+    
+    def __init__(self, n_columns=None, dtype=np.float64, capacity=1024, order='C'):
+        shape = (capacity,) if n_columns is None else (capacity, n_columns)
+        self.order = order
+        self.size = 0
+        self._array = np.empty(shape, dtype=dtype, order=order)
+    
+    def append(self, values):
+        values = np.asarray(values, dtype=self._array.dtype)
+        needed = self.size + len(values)
+        if needed > len(self._array):
+            capacity = max(needed, 2 * len(self._array))
+            grown = np.empty((capacity,) + self._array.shape[1:], dtype=self._array.dtype, order=self.order)
+            grown[:self.size] = self._array[:self.size]
+            self._array = grown
+        self._array[self.size:needed] = values
+        self.size = needed
+    
+    def truncate(self, size):
+        """Descartar las filas desde size (la capacidad se conserva)"""
+        self.size = min(size, self.size)
+    
+    @property
+    def data(self):
+        return self._array[:self.size]
+
+class MinMaxPyramid:
+    """Índice multirresolución de mínimos/máximos para una columna
+    
+    Cada nivel guarda, por bloque de muestras, el índice del mínimo y del
+    máximo. El bloque del nivel k tiene base_block * 2**k muestras.
+    Con extend el índice se actualiza cuando y crece por el final.
+    """
+    
+    def __init__(self, y, base_block=16, min_blocks=64):
+        self.base_block = base_block
+        self.min_blocks = min_blocks
+        self.index_dtype = np.int32 if len(y) < 2**31 else np.int64
+        self.y = np.asarray(y)[:0]
+        self.levels = []
+        self._buffers = []
+        self.extend(y)
+    
+    def _block_extremes(self, first_block):
+        """Índices del mínimo y máximo de los bloques del nivel 0 desde first_block"""
+        n = len(self.y)
+        start = first_block * self.base_block
+        main = start + (n - start) // self.base_block * self.base_block
+        blocks = self.y[start:main].reshape(-1, self.base_block)
+        offsets = start + np.arange(len(blocks), dtype=self.index_dtype) * self.base_block
+        idx_min, idx_max = block_arg_extremes(blocks)
+        idx_min = idx_min.astype(self.index_dtype) + offsets
+        idx_max = idx_max.astype(self.index_dtype) + offsets
+        if main < n:
+            tail = self.y[main:]
+            idx_min = np.append(idx_min, self.index_dtype(main + tail.argmin()))
+            idx_max = np.append(idx_max, self.index_dtype(main + tail.argmax()))
+        return idx_min, idx_max
+    
+    def extend(self, y):
+        """Actualizar el índice después de agregar muestras al final de y
+        
+        Solo se recalculan los bloques desde el último (que pudo quedar
+        incompleto), así que el costo es proporcional a las muestras nuevas.
+        """
+        old_n = len(self.y)
+        self.y = np.asarray(y)
+        n = len(self.y)
+        if n < old_n or (n >= 2**31 and self.index_dtype == np.int32):
+            # Datos reiniciados (o índices que ya no caben en int32): reconstruir
+            self.index_dtype = np.int32 if n < 2**31 else np.int64
+            self._buffers = []
+            old_n = 0
+        
+        # Nivel 0: reducción directa de bloques de base_block muestras
+        if not self._buffers:
+            if -(-n // self.base_block) < 2:
+                self.levels = []
+                return
+            self._buffers.append((GrowableArray(dtype=self.index_dtype), GrowableArray(dtype=self.index_dtype)))
+        first = old_n // self.base_block
+        for buffer, idx in zip(self._buffers[0], self._block_extremes(first)):
+            buffer.truncate(first)
+            buffer.append(idx)
+        
+        # Niveles superiores: combinar bloques de a pares desde el primer par modificado
+        level = 0
+        while True:
+            below_min, below_max = self._buffers[level]
+            if level + 1 == len(self._buffers):
+                if below_min.size <= self.min_blocks:
+                    break
+                self._buffers.append((GrowableArray(dtype=self.index_dtype),
+                                      GrowableArray(dtype=self.index_dtype)))
+                first = 0
+            else:
+                first //= 2
+            level_min, level_max = self._buffers[level + 1]
+            level_min.truncate(first)
+            level_min.append(self._merge_pairs(below_min.data[2 * first:], np.less_equal))
+            level_max.truncate(first)
+            level_max.append(self._merge_pairs(below_max.data[2 * first:], np.greater_equal))
+            level += 1
+        
+        self.levels = [(idx_min.data, idx_max.data) for idx_min, idx_max in self._buffers]
+    
+    def _merge_pairs(self, idx, compare):
+        """Reducir a la mitad un nivel eligiendo el extremo de cada par de bloques"""
+        even = idx[0:len(idx) - 1:2]
+        odd = idx[1::2]
+        merged = np.where(compare(self.y[even], self.y[odd]), even, odd)
+        if len(idx) % 2:
+            merged = np.append(merged, idx[-1])
+        return merged
+    
+    def block_size(self, level):
+        return self.base_block << level
+    
+    def query(self, start, stop, n_bins):
+        """Índices ordenados de la envolvente de y[start:stop] para n_bins columnas
+        
+        Si la ventana tiene pocas muestras se devuelven todas.
+        """
+        start = max(int(start), 0)
+        stop = min(int(stop), len(self.y))
+        n = stop - start
+        if n <= 0:
+            return np.arange(0)
+        if n <= 2 * n_bins:
+            return np.arange(start, stop)
+        
+        # Nivel más grueso que aún da al menos n_bins bloques en la ventana
+        target = n // n_bins
+        level = -1
+        for k in range(len(self.levels)):
+            if self.block_size(k) <= target:
+                level = k
+        if level < 0:
+            return start + minmax_envelope_indices(self.y[start:stop], n_bins)
+        
+        size = self.block_size(level)
+        idx_min, idx_max = self.levels[level]
+        first_block = -(-start // size)
+        last_block = stop // size
+        
+        parts = []
+        # Bordes parciales: reducir las muestras crudas fuera de los bloques completos
+        head_stop = min(first_block * size, stop)
+        if head_stop > start:
+            parts.append(start + minmax_envelope_indices(self.y[start:head_stop], 1))
+        if last_block > first_block:
+            pairs = np.column_stack((idx_min[first_block:last_block],
+                                     idx_max[first_block:last_block]))
+            parts.append(np.sort(pairs, axis=1).ravel())
+        tail_start = max(last_block * size, head_stop)
+        if stop > tail_start:
+            parts.append(tail_start + minmax_envelope_indices(self.y[tail_start:stop], 1))
+        
+        return np.concatenate(parts).astype(np.intp, copy=False)
+
+    def first_outside(self, lo, hi, start=0, stop=None):
+        """Primer índice de [start, stop) con y < lo o y > hi (-1 si no hay)
+        
+        Baja por los niveles del índice hasta un bloque del nivel 0: solo se
+        revisan muestras crudas en ese bloque y en los bordes de la ventana.
+        """
+        return self._search_outside(lo, hi, start, stop, first=True)
+    
+    def last_outside(self, lo, hi, start=0, stop=None):
+        """Último índice de [start, stop) con y < lo o y > hi (-1 si no hay)"""
+        return self._search_outside(lo, hi, start, stop, first=False)
+    
+    def _search_outside(self, lo, hi, start, stop, first):
+        start = max(int(start), 0)
+        stop = len(self.y) if stop is None else min(int(stop), len(self.y))
+        if stop <= start:
+            return -1
+        
+        # Nivel más grueso con al menos dos bloques completos en la ventana
+        level = -1
+        for k in range(len(self.levels)):
+            if stop // self.block_size(k) - -(-start // self.block_size(k)) >= 2:
+                level = k
+        if level < 0:
+            segment = self.y[start:stop]
+            hits = np.flatnonzero((segment < lo) | (segment > hi))
+            if not len(hits):
+                return -1
+            return start + int(hits[0] if first else hits[-1])
+        
+        size = self.block_size(level)
+        first_block = -(-start // size)
+        last_block = stop // size
+        
+        def search_blocks():
+            idx_min, idx_max = self.levels[level]
+            outside = ((self.y[idx_min[first_block:last_block]] < lo)
+                       | (self.y[idx_max[first_block:last_block]] > hi))
+            hits = np.flatnonzero(outside)
+            if not len(hits):
+                return -1
+            block = first_block + int(hits[0] if first else hits[-1])
+            return self._search_outside(lo, hi, block * size, (block + 1) * size, first)
+        
+        # Borde inicial, bloques completos y borde final (en orden inverso para el último)
+        parts = [lambda: self._search_outside(lo, hi, start, first_block * size, first),
+                 search_blocks,
+                 lambda: self._search_outside(lo, hi, last_block * size, stop, first)]
+        for part in (parts if first else reversed(parts)):
+            index = part()
+            if index >= 0:
+                return index
+        return -1
+
+# Factores de escalado de los ejes (multiplicador, prefijo de la unidad)
+SCALE_FACTORS = {
+    'ninguno': (1, ''),
+    'mili': (1e3, 'm'),
+    'kilo': (1e-3, 'k'),
+    'mega': (1e-6, 'M')
+}
+
+def scaled_label(scale_type, original_label):
+    """Etiqueta con el prefijo de la escala insertado en la unidad entre paréntesis"""
+    if scale_type not in SCALE_FACTORS:
+        return original_label
+    
+    _, prefix = SCALE_FACTORS[scale_type]
+    
+    if prefix:
+        if '(' in original_label and ')' in original_label:
+            start = original_label.find('(')
+            end = original_label.find(')')
+            base_label = original_label[:start+1]
+            unit = original_label[start+1:end]
+            rest = original_label[end:]
+            new_label = f"{base_label}{prefix}{unit}{rest}"
+        else:
+            new_label = f"{original_label} ({prefix})"
+    else:
+        new_label = original_label
+    
+    return new_label
+
+def visible_index_range(time_values, x_min=None, x_max=None, factor=1, pad=True):
+    """Rango de muestras [inicio, fin) entre x_min y x_max (en unidades escaladas por factor)
+
+    Con pad se incluye una muestra extra a cada lado para que la curva llegue
+    al borde; sin él solo las muestras dentro de [x_min, x_max] (métricas).
+    """
+    n = len(time_values)
+    start, stop = 0, n
+    extra = 1 if pad else 0
+    if x_min is not None:
+        start = max(int(np.searchsorted(time_values, x_min / factor, side='left')) - extra, 0)
+    if x_max is not None:
+        stop = min(int(np.searchsorted(time_values, x_max / factor, side='right')) + extra, n)
+    return start, max(stop, start)
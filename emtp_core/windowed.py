@@ -0,0 +1,85 @@
+import numpy as np
+
+def window_samples(time_values, seconds):
+    """Muestras que abarca una ventana de seconds segundos con el paso medio del archivo"""
+    if len(time_values) < 2:
+        return 1
+    step = (float(time_values[-1]) - float(time_values[0])) / (len(time_values) - 1)
+    return max(int(round(seconds / step)), 1) if step > 0 else 1
+
+# Muestras por bloque al restar las sumas acumuladas en el lugar
+_DIFFERENCE_BLOCK = 1 << 16
+
+def _window_means(total, n):
+    """Convertir sumas acumuladas (float64) en medias de las últimas n muestras, en el lugar
+
+    Se resta de atrás hacia adelante por bloques: cada bloque solo lee sumas
+    anteriores que todavía no se modificaron, así que no hace falta una copia
+    del arreglo completo.
+    """
+    m = len(total)
+    for last in range(m, n, -_DIFFERENCE_BLOCK):
+        first = max(last - _DIFFERENCE_BLOCK, n)
+        total[first:last] -= total[first - n:last - n]
+    # Ventanas parciales al principio
+    head = min(n, m)
+    total[:head] /= np.arange(1, head + 1)
+    total[head:] /= n
+    return total
+
+def moving_mean(x, n):
+    """Media de las últimas n muestras (ventana parcial al principio), con sumas acumuladas"""
+    return _window_means(np.cumsum(x, dtype=np.float64), n)
+
+def moving_rms(x, n):
+    squares = np.square(x, dtype=np.float64)
+    means = _window_means(np.cumsum(squares, out=squares), n)
+    # Las restas de sumas grandes pueden dar negativos mínimos
+    np.maximum(means, 0, out=means)
+    return np.sqrt(means, out=means)
+
+def _moving_extreme(x, n, accumulate, combine, pad_value):
+    """Máximo o mínimo de las últimas n muestras en O(n) (van Herk / Gil-Werman)
+
+    Se divide la señal en bloques de n muestras y se calcula el acumulado
+    hacia adelante y hacia atrás de cada bloque; toda ventana de n muestras
+    cruza a lo sumo dos bloques, así que su extremo es la combinación del
+    acumulado hacia atrás en su inicio y del acumulado hacia adelante en su
+    fin (tres comparaciones por muestra, sin importar n).
+    """
+    x = np.asarray(x)
+    if x.dtype.kind != 'f':
+        x = x.astype(np.float64)
+    m = len(x)
+    n = min(n, m)
+    if n <= 1:
+        return x.copy()
+
+    # n - 1 muestras neutras al principio: las primeras ventanas quedan parciales
+    padded = np.full(-(-(m + n - 1) // n) * n, pad_value, dtype=x.dtype)
+    padded[n - 1:n - 1 + m] = x
+    blocks = padded.reshape(-1, n)
+    forward = accumulate(blocks, axis=1).ravel()
+    backward = accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    # La ventana de la muestra i cubre padded[i:i + n]
+    return combine(backward[:m], forward[n - 1:n - 1 + m])
+
+def moving_max(x, n):
+    return _moving_extreme(x, n, np.maximum.accumulate, np.maximum, -np.inf)
+
+def moving_min(x, n):
+    return _moving_extreme(x, n, np.minimum.accumulate, np.minimum, np.inf)
+
+# Estadísticas de ventana: f(señal, muestras); la ventana termina en cada muestra
+WINDOW_KERNELS = {
+    'rms': moving_rms,
+    'mean': moving_mean,
+    'max': moving_max,
+    'min': moving_min,
+}
+
+def moving_statistic(kind, values, n, start=0, stop=None):
+    """Estadística de ventana en [start, stop), leyendo solo las n - 1 muestras previas necesarias"""
+    stop = len(values) if stop is None else stop
+    lead = max(start - (n - 1), 0)
+    return WINDOW_KERNELS[kind](values[lead:stop], n)[start - lead:]